@@ -0,0 +1,81 @@
+"""
+Benchmark computing AST metrics in one traversal against one walk per metric.
+
+Usage:
+    uv run python benchmarks/bench_ast_metrics.py [--functions N] [--repeat N]
+"""
+
+import argparse
+import ast
+
+from bench_statements import best_of, generate_module
+
+from pycole.analyzer import count_statements
+from pycole.astmetrics import AST_METRICS, measure_tree
+
+
+def parse_only(code: str) -> ast.Module:
+    """Parse the module without computing anything."""
+    return ast.parse(code)
+
+
+def single_pass(code: str, metrics: tuple[str, ...] = AST_METRICS) -> dict[str, int]:
+    """Parse once and compute every metric in one traversal."""
+    return measure_tree(ast.parse(code), metrics)
+
+
+def walk_per_metric(code: str) -> dict[str, int]:
+    """Parse once, then walk the whole tree once per metric (the naive approach)."""
+    tree = ast.parse(code)
+    functions = [node for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    return {
+        "statements": sum(1 for node in ast.walk(tree) if isinstance(node, ast.stmt)),
+        "functions": len(functions),
+        "classes": sum(1 for node in ast.walk(tree) if isinstance(node, ast.ClassDef)),
+        "complexity": sum(
+            1 + sum(1 for node in ast.walk(function) if isinstance(node, (ast.If, ast.For, ast.While, ast.BoolOp)))
+            for function in functions
+        ),
+        "docstring_lines": sum(
+            len(docstring.splitlines())
+            for node in ast.walk(tree)
+            if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+            and (docstring := ast.get_docstring(node, clean=False))
+        ),
+    }
+
+
+def parse_per_metric(code: str) -> list[dict[str, int]]:
+    """Parse and traverse the module once per metric."""
+    return [measure_tree(ast.parse(code), (name,)) for name in AST_METRICS]
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--functions", type=int, default=5000, help="Functions in the generated module")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    code = generate_module(args.functions)
+    assert single_pass(code)["statements"] == count_statements(code)
+
+    print(f"Module: {len(code.splitlines()):,} lines, {len(code) / 1e6:.1f} MB\n")
+    timings = {
+        name: best_of(args.repeat, func, code)
+        for name, func in [
+            ("ast.parse only (baseline)", parse_only),
+            ("count_statements (ast)", count_statements),
+            ("single pass: structure metrics", lambda code: single_pass(code, ("functions", "classes", "max_nesting"))),
+            ("single pass: all metrics", single_pass),
+            ("one walk per metric", walk_per_metric),
+            ("one parse per metric", parse_per_metric),
+        ]
+    }
+    baseline = timings["ast.parse only (baseline)"]
+    for name, elapsed in timings.items():
+        print(f"{name:<36} {elapsed * 1000:>9.1f} ms {elapsed / baseline:>6.2f}x parse")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark the overhead of --checkpoint and the time saved by resuming an interrupted run.
+
+A generated tree is analyzed without a checkpoint, with a fresh
+checkpoint, after an interruption halfway through, and with a complete
+checkpoint.
+
+Usage:
+    uv run python benchmarks/bench_checkpoint.py [--files N] [--repeat N]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from pycole.analyzer import analyze_directory, iter_file_metrics
+from pycole.bench import CorpusSpec, generate_corpus
+from pycole.checkpoint import Checkpoint
+
+
+def run(root: Path, checkpoint_file: Path, interrupt_after: int | None = None) -> float:
+    """Analyze the tree with a checkpoint, interrupting after some files, and return the elapsed time."""
+    start = time.perf_counter()
+    with Checkpoint(checkpoint_file) as checkpoint:
+        for index, _ in enumerate(iter_file_metrics(root, checkpoint=checkpoint)):
+            if index + 1 == interrupt_after:
+                break
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000, help="Files in the generated tree")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "tree"
+        generate_corpus(root, CorpusSpec(files=args.files))
+        checkpoint_file = Path(tmpdir) / "run.ckpt"
+
+        def fresh() -> float:
+            checkpoint_file.unlink(missing_ok=True)
+            return run(root, checkpoint_file)
+
+        def resumed() -> float:
+            checkpoint_file.unlink(missing_ok=True)
+            run(root, checkpoint_file, interrupt_after=args.files // 2)
+            return run(root, checkpoint_file)
+
+        def no_checkpoint() -> float:
+            start = time.perf_counter()
+            analyze_directory(root)
+            return time.perf_counter() - start
+
+        timings = {
+            name: min(func() for _ in range(args.repeat))
+            for name, func in [
+                ("no checkpoint", no_checkpoint),
+                ("fresh checkpoint", fresh),
+                ("resumed halfway", resumed),
+                ("complete checkpoint", lambda: run(root, checkpoint_file)),
+            ]
+        }
+        print(f"Tree: {args.files:,} files, checkpoint {checkpoint_file.stat().st_size / 1024:.0f} KiB\n")
+        baseline = timings["no checkpoint"]
+        for name, elapsed in timings.items():
+            print(f"{name:<22} {elapsed * 1000:>9.1f} ms {elapsed / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark reusing the metrics of byte-identical files against analyzing every copy.
+
+A generated corpus is analyzed as is, to measure the cost of looking for
+copies in a tree without any, and after copying a share of its files to
+other directories, like vendored packages and generated `__init__.py` files.
+
+Usage:
+    uv run python benchmarks/bench_dedup.py [--files N] [--duplicates RATIO] [--repeat N]
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+from bench_statements import best_of
+
+from pycole.analyzer import analyze_directory
+from pycole.bench import CorpusSpec, generate_corpus
+from pycole.dedup import Deduplicator
+
+
+def add_copies(root: Path, files: list[Path], ratio: float) -> int:
+    """Copy a share of the files to a vendored directory, so that `ratio` of all files are copies."""
+    copies = round(len(files) * ratio / (1 - ratio))
+    for index, filepath in enumerate(random.Random(0).choices(files, k=copies)):
+        target = root / "vendored" / str(index) / filepath.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(filepath, target)
+    return copies
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=4000, help="Files in the generated corpus")
+    parser.add_argument("--duplicates", type=float, default=0.15, help="Share of copies in the second tree")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        files = generate_corpus(root, CorpusSpec(files=args.files))
+
+        timings = {}
+        for label in ("no copies", f"{args.duplicates:.0%} copies"):
+            if label != "no copies":
+                copies = add_copies(root, files, args.duplicates)
+                print(f"Added {copies:,} copies of corpus files\n")
+            dedup = Deduplicator()
+            assert analyze_directory(root, dedup=dedup) == analyze_directory(root)
+            print(f"{label}: {dedup.files_hashed:,} files hashed, {dedup.files_reused:,} reused")
+            timings[f"{label}, every file"] = best_of(args.repeat, lambda: analyze_directory(root))
+            timings[f"{label}, deduplicated"] = best_of(
+                args.repeat, lambda: analyze_directory(root, dedup=Deduplicator())
+            )
+
+    print()
+    for name, elapsed in timings.items():
+        print(f"{name:<28} {elapsed * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark `pycole history` against checking out and analyzing every revision.
+
+A repository is generated from a synthetic corpus, followed by commits
+that each modify a few files. The metrics of every commit are then
+computed by checking each commit out and analyzing the tree, and by
+reading the object store with every distinct blob analyzed once.
+
+Usage:
+    uv run python benchmarks/bench_history.py [--files N] [--commits N] [--changes N] [--jobs N]
+"""
+
+import argparse
+import random
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from pycole.analyzer import CodeMetrics, analyze_directory
+from pycole.bench import CorpusSpec, generate_corpus
+from pycole.history import analyze_history, list_revisions
+
+
+def git(repo: Path, *args: str) -> str:
+    """Run a git command in the benchmark repository."""
+    return subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def generate_repository(repo: Path, files: int, commits: int, changes: int) -> None:
+    """Commit a corpus, then `commits` commits that each append to `changes` random files."""
+    generate_corpus(repo, CorpusSpec(files=files))
+    git(repo, "init", "-q")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "corpus")
+    sources = sorted(repo.rglob("*.py"))
+    rng = random.Random(0)
+    for index in range(commits - 1):
+        for filepath in rng.sample(sources, changes):
+            with filepath.open("a") as file:
+                file.write(f"value_{index} = {index}\n")
+        git(repo, "commit", "-q", "-a", "-m", f"change {index}")
+
+
+def checkout_each(repo: Path) -> list[CodeMetrics]:
+    """Check out every commit of the `bench` branch and analyze the working tree."""
+    results = []
+    for commit, _ in list_revisions(repo, "bench"):
+        git(repo, "checkout", "-q", commit)
+        results.append(analyze_directory(repo))
+    git(repo, "checkout", "-q", "bench")
+    return results
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=500, help="Files in the generated corpus")
+    parser.add_argument("--commits", type=int, default=100, help="Commits in the generated history")
+    parser.add_argument("--changes", type=int, default=5, help="Files modified by every commit")
+    parser.add_argument("--jobs", type=int, default=4, help="Worker processes of the parallel run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo = Path(tmpdir)
+        generate_repository(repo, args.files, args.commits, args.changes)
+        git(repo, "checkout", "-q", "-b", "bench")
+        versions = args.files * args.commits
+        unique = args.files + (args.commits - 1) * args.changes
+        print(f"History: {args.commits} commits, {versions:,} file versions, {unique:,} distinct\n")
+
+        def history(jobs: int) -> list[CodeMetrics]:
+            return [entry.metrics for entry in analyze_history(repo, "bench", jobs=jobs)]
+
+        timings = {}
+        results = {}
+        for name, func in [
+            ("checkout and analyze each commit", lambda: checkout_each(repo)),
+            ("history, serial", lambda: history(1)),
+            (f"history, {args.jobs} jobs", lambda: history(args.jobs)),
+        ]:
+            start = time.perf_counter()
+            results[name] = func()
+            timings[name] = time.perf_counter() - start
+
+        assert all(result == results["history, serial"] for result in results.values())
+        baseline = timings["checkout and analyze each commit"]
+        for name, elapsed in timings.items():
+            print(f"{name:<34} {elapsed * 1000:>9.1f} ms {elapsed / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
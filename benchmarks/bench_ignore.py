@@ -0,0 +1,58 @@
+"""
+Benchmark gitignore-aware discovery on a tree with large ignored build outputs.
+
+A source tree is generated next to `build/` and `dist/` trees that are
+listed in `.gitignore`, and the tree is walked and analyzed with and
+without honoring ignore files. The walk is also timed on a tree without
+ignored directories but with many rules, to show the matching overhead.
+
+Usage:
+    uv run python benchmarks/bench_ignore.py [--files N] [--build-files N] [--repeat N]
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from bench_statements import best_of
+
+from pycole.analyzer import analyze_directory
+from pycole.bench import CorpusSpec, generate_corpus
+from pycole.walker import iter_python_files
+
+# Typical rules of a Python project's .gitignore, none of which match the generated sources
+RULES = "\n".join(
+    ["__pycache__/", "*.py[cod]", "*.egg-info/", ".tox/", ".nox/", "htmlcov/", ".coverage", "*.so", "docs/_build/"]
+    + [f"generated_{index}/**/*.pb.py" for index in range(50)]
+)
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=500, help="Source files in the generated tree")
+    parser.add_argument("--build-files", type=int, default=2000, help="Files in each of build/ and dist/")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        generate_corpus(root / "src", CorpusSpec(files=args.files))
+        generate_corpus(root / "build", CorpusSpec(files=args.build_files, seed=1))
+        generate_corpus(root / "dist", CorpusSpec(files=args.build_files, seed=2))
+        (root / ".gitignore").write_text(f"{RULES}\n/build/\n/dist/\n")
+
+        print(f"Tree: {args.files:,} source files, {2 * args.build_files:,} ignored build files\n")
+        for name, func in [
+            ("walk, ignore files honored", lambda: list(iter_python_files(root))),
+            ("walk, --no-ignore", lambda: list(iter_python_files(root, use_ignore_files=False))),
+            ("walk src/ only, no rules", lambda: list(iter_python_files(root / "src", use_ignore_files=False))),
+            ("walk src/ only, with rules", lambda: list(iter_python_files(root / "src"))),
+            ("analyze, ignore files honored", lambda: analyze_directory(root)),
+            ("analyze, --no-ignore", lambda: analyze_directory(root, use_ignore_files=False)),
+        ]:
+            print(f"{name:<32} {best_of(args.repeat, func) * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark reading files ahead in I/O threads on a simulated slow filesystem.
+
+Every file open is delayed by a fixed latency, standing in for a network
+or cold-cache filesystem, and a generated tree is analyzed in a single
+process with on-demand reads and with increasing numbers of I/O threads.
+
+Usage:
+    uv run python benchmarks/bench_io.py [--files N] [--latency MS] [--threads N ...]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from pycole.analyzer import analyze_directory
+from pycole.bench import CorpusSpec, generate_corpus
+
+_open = Path.open
+
+
+def slow_filesystem(latency: float):
+    """Patch `Path.open` so that every open blocks for `latency` seconds."""
+
+    def slow_open(self, *args, **kwargs):
+        time.sleep(latency)
+        return _open(self, *args, **kwargs)
+
+    return patch.object(Path, "open", slow_open)
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=500, help="Files in the generated tree")
+    parser.add_argument("--lines", type=int, default=200, help="Mean lines per generated file")
+    parser.add_argument("--latency", type=float, default=2.0, help="Milliseconds added to every file open")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16], help="I/O thread counts to compare")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        generate_corpus(root, CorpusSpec(files=args.files, lines=args.lines))
+        expected = analyze_directory(root)
+
+        print(f"Tree: {args.files:,} files, {args.latency:.1f} ms per open\n")
+        baseline = None
+        with slow_filesystem(args.latency / 1000):
+            for io_threads in [0, *args.threads]:
+                start = time.perf_counter()
+                metrics = analyze_directory(root, io_threads=io_threads)
+                elapsed = time.perf_counter() - start
+                assert metrics == expected
+                baseline = baseline or elapsed
+                name = "on-demand reads (baseline)" if io_threads == 0 else f"{io_threads} I/O threads"
+                print(f"{name:<28} {elapsed * 1000:>9.1f} ms {baseline / elapsed:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark the size and time limits on a tree with one pathological file.
+
+A generated corpus gets one large generated module that takes seconds to
+parse. The tree is analyzed serially without limits, with a size limit,
+and with a time limit. The corpus is also analyzed without the
+pathological file, to measure the overhead of the killable workers.
+
+Usage:
+    uv run python benchmarks/bench_limits.py [--files N] [--slow-lines N] [--timeout SECONDS]
+"""
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from pycole.analyzer import CodeMetrics, analyze_directory
+from pycole.bench import CorpusSpec, generate_corpus
+from pycole.limits import FileLimits
+
+
+def timed(func: Callable[[], CodeMetrics]) -> float:
+    """Return the wall time of one call."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=1000, help="Files in the generated corpus")
+    parser.add_argument("--slow-lines", type=int, default=300_000, help="Lines of the pathological module")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Seconds of --file-timeout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        generate_corpus(root, CorpusSpec(files=args.files))
+
+        overhead = {
+            "no limits": timed(lambda: analyze_directory(root)),
+            "--file-timeout": timed(lambda: analyze_directory(root, limits=FileLimits(file_timeout=args.timeout))),
+        }
+
+        slow = root / "generated.py"
+        slow.write_text("x = (1 + 2) * 3\n" * args.slow_lines)
+        print(f"Corpus: {args.files:,} files, plus a {slow.stat().st_size / 1e6:.1f} MB generated module\n")
+        with_slow = {
+            "no limits": timed(lambda: analyze_directory(root)),
+            "--max-file-size 1000000": timed(lambda: analyze_directory(root, limits=FileLimits(max_file_size=10**6))),
+            f"--file-timeout {args.timeout:g}": timed(
+                lambda: analyze_directory(root, limits=FileLimits(file_timeout=args.timeout))
+            ),
+        }
+
+    for title, timings in [("Corpus only", overhead), ("With the generated module", with_slow)]:
+        print(title)
+        for name, elapsed in timings.items():
+            print(f"  {name:<26} {elapsed * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark accurate code line classification against the fast byte-level one.
+
+Usage:
+    uv run python benchmarks/bench_line_mode.py [--functions N] [--repeat N]
+"""
+
+import argparse
+import tokenize
+from io import StringIO
+
+from bench_statements import best_of, generate_module
+
+from pycole.analyzer import (
+    count_lines_bytes,
+    count_statements,
+    count_statements_and_code_lines,
+    count_statements_tokenize,
+)
+
+
+def fast_ast(code: str) -> tuple[int, int]:
+    """Count code lines from the bytes and statements from the AST (the default modes)."""
+    return count_statements(code), count_lines_bytes(code.encode())[1]
+
+
+def fast_tokenize(code: str) -> tuple[int, int]:
+    """Count code lines from the bytes and statements from the token stream."""
+    return count_statements_tokenize(code), count_lines_bytes(code.encode())[1]
+
+
+def retokenize(code: str) -> tuple[int, int]:
+    """Count statements from the tokens, then tokenize again to find lines with code tokens (the naive approach)."""
+    lines = set()
+    for tok_type, _, (start_row, _), (end_row, _), _ in tokenize.generate_tokens(StringIO(code).readline):
+        if tok_type not in (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT):
+            lines.update(range(start_row, end_row + 1))
+    return count_statements_tokenize(code), len(lines)
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--functions", type=int, default=5000, help="Functions in the generated module")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    code = generate_module(args.functions)
+    print(f"Module: {len(code.splitlines()):,} lines, {len(code) / 1e6:.1f} MB")
+    print(f"Code lines: {fast_ast(code)[1]:,} fast, {count_statements_and_code_lines(code)[1]:,} accurate\n")
+
+    timings = {
+        name: best_of(args.repeat, func, code)
+        for name, func in [
+            ("fast lines + ast statements", fast_ast),
+            ("fast lines + tokenize statements", fast_tokenize),
+            ("accurate lines, single token pass", count_statements_and_code_lines),
+            ("accurate lines, second token pass", retokenize),
+        ]
+    }
+    baseline = timings["fast lines + ast statements"]
+    for name, elapsed in timings.items():
+        print(f"{name:<36} {elapsed * 1000:>9.1f} ms {elapsed / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark byte-level line counting against decoding and splitting the text.
+
+Usage:
+    uv run python benchmarks/bench_lines.py [--lines N] [--repeat N]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from pycole.analyzer import analyze_file, count_lines, count_lines_bytes
+from pycole.bench import _generate_module
+
+
+def text_path(filepath: Path) -> tuple[int, int]:
+    """Read, decode and count lines per line string (the original implementation)."""
+    return count_lines(filepath.read_text(encoding="utf-8"))
+
+
+def bytes_path(filepath: Path) -> tuple[int, int]:
+    """Read and count lines on the raw bytes."""
+    return count_lines_bytes(filepath.read_bytes())
+
+
+def best_of(repeat: int, func, *args) -> float:
+    """Return the best wall time of `repeat` calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_memory(func, *args) -> int:
+    """Return the peak memory allocated by a call, in bytes."""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=200_000, help="Lines in the generated module")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    code = _generate_module(random.Random(0), args.lines, comment_density=0.15)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        module = Path(tmpdir) / "test_generated.py"
+        module.write_text(code, encoding="utf-8")
+        assert bytes_path(module) == text_path(module)
+
+        print(f"Module: {args.lines:,} lines, {module.stat().st_size / 1e6:.1f} MB\n")
+        timings = {
+            "read_text + count_lines (baseline)": text_path,
+            "read_bytes + count_lines_bytes": bytes_path,
+        }
+        baseline = None
+        for name, func in timings.items():
+            elapsed = best_of(args.repeat, func, module)
+            baseline = baseline or elapsed
+            peak = peak_memory(func, module)
+            print(f"{name:<36} {elapsed * 1000:>9.1f} ms {baseline / elapsed:>6.2f}x {peak / 1e6:>8.1f} MB peak")
+
+        # Test files are not parsed, so this is reading and line counting end to end
+        elapsed = best_of(args.repeat, analyze_file, module)
+        print(f"\n{'analyze_file (test file)':<36} {elapsed * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
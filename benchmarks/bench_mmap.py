@@ -0,0 +1,69 @@
+"""
+Measure the peak RSS of analyzing a giant generated file with and without memory mapping.
+
+Usage:
+    uv run python benchmarks/bench_mmap.py [--lines N]
+"""
+
+import argparse
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from pycole.bench import _generate_module
+
+# Run in a fresh interpreter so every measurement starts from the same baseline. The peak RSS
+# is read from /proc (Linux only): unlike ru_maxrss, VmHWM is not inherited from the parent.
+CHILD = """
+import sys, time
+from pathlib import Path
+from pycole.analyzer import analyze_file
+
+def peak_rss():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+
+before = peak_rss()
+start = time.perf_counter()
+analyze_file(Path(sys.argv[1]), statement_mode=sys.argv[2], mmap_threshold=int(sys.argv[3]))
+elapsed = time.perf_counter() - start
+print(peak_rss() - before, elapsed)
+"""
+
+
+def measure(filepath: Path, statement_mode: str, mmap_threshold: int) -> tuple[float, float]:
+    """Return the peak RSS growth in MB and the wall time of analyzing a file in a child process."""
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, str(filepath), statement_mode, str(mmap_threshold)],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.split()
+    return int(output[0]) / 1024, float(output[1])
+
+
+def main() -> None:
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=500_000, help="Lines in the generated files")
+    args = parser.parse_args()
+
+    code = _generate_module(random.Random(0), args.lines, comment_density=0.15)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_module = Path(tmpdir) / "test_generated.py"
+        module = Path(tmpdir) / "generated_pb2.py"
+        test_module.write_text(code, encoding="utf-8")
+        module.write_text(code, encoding="utf-8")
+        print(f"Files: {args.lines:,} lines, {module.stat().st_size / 1e6:.1f} MB\n")
+
+        cases = [("test file", test_module, "ast"), ("module (tokenize)", module, "tokenize")]
+        for name, filepath, statement_mode in cases:
+            for label, threshold in [("read", 0), ("mmap", 1)]:
+                rss, elapsed = measure(filepath, statement_mode, threshold)
+                print(f"{name:<20} {label:<6} {rss:>9.1f} MB peak RSS growth {elapsed * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark the memory and query times of the columnar results store against a list of results.
+
+Synthetic per-file results for a large tree are kept either as a list of
+`(Path, CodeMetrics)` pairs or in a `MetricsColumns` with each backend, and
+the retained memory and the time of totals, group-by and top-N queries
+are compared.
+
+Usage:
+    uv run python benchmarks/bench_results.py [--files N] [--repeat N]
+"""
+
+import argparse
+import importlib.util
+import random
+import tracemalloc
+from collections import defaultdict
+from dataclasses import replace
+from pathlib import Path
+
+from bench_statements import best_of
+
+from pycole.analyzer import CodeMetrics, is_test_file
+from pycole.results import MetricsColumns
+
+
+def generate_results(files: int, seed: int = 0) -> list[tuple[Path, CodeMetrics]]:
+    """Generate per-file results spread over directories of a monorepo."""
+    rng = random.Random(seed)
+    results = []
+    for index in range(files):
+        directory = f"repo/service_{index % 200}/pkg_{index % 37}"
+        name = "__init__.py" if index % 9 == 0 else f"module_{index}.py"
+        if index % 4 == 0:
+            directory, name = f"{directory}/tests", f"test_{name}"
+        total = rng.randint(1, 2000)
+        code = total * 3 // 4
+        metrics = CodeMetrics(total, code, code // 2, 0, 0, functions=code // 15, max_complexity=rng.randint(1, 30))
+        results.append((Path(directory, name), metrics))
+    return results
+
+
+def retained(build) -> tuple[object, int]:
+    """Build an object and return it with the memory it retains."""
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def list_queries(results: list[tuple[Path, CodeMetrics]]) -> None:
+    """Run the queries of the benchmark on a list of results."""
+    sum((metrics for _, metrics in results), CodeMetrics(0, 0, 0, 0, 0))
+    groups: dict[Path, CodeMetrics] = defaultdict(lambda: CodeMetrics(0, 0, 0, 0, 0))
+    for path, metrics in results:
+        groups[path.parent] += metrics
+    tests: dict[bool, CodeMetrics] = defaultdict(lambda: CodeMetrics(0, 0, 0, 0, 0))
+    for path, metrics in results:
+        tests[is_test_file(path)] += metrics
+    sorted(results, key=lambda result: result[1].code_lines, reverse=True)[:20]
+
+
+def table_queries(table: MetricsColumns) -> None:
+    """Run the queries of the benchmark on a table."""
+    table.totals()
+    table.group_by("directory")
+    table.group_by("is_test")
+    table.top(20)
+
+
+def main() -> None:
+    """Run the benchmark and print a memory and timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=100_000, help="Number of per-file results")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    source = generate_results(args.files)
+    # Copy the results, so that the list does not share objects with the source
+    results, list_size = retained(lambda: [(Path(str(path)), replace(metrics)) for path, metrics in source])
+    print(f"Results: {args.files:,} files\n")
+    print(f"{'store':<24} {'memory':>10} {'queries':>12}")
+    elapsed = best_of(args.repeat, list_queries, results)
+    print(f"{'list of results':<24} {list_size / 2**20:>7.1f} MiB {elapsed * 1000:>9.1f} ms")
+
+    backends = ["array"] + (["numpy"] if importlib.util.find_spec("numpy") is not None else [])
+    for backend in backends:
+        table, size = retained(
+            lambda: MetricsColumns.from_results(source, backend)  # pylint: disable=cell-var-from-loop
+        )
+        elapsed = best_of(args.repeat, table_queries, table)
+        print(f"{f'table ({backend})':<24} {size / 2**20:>7.1f} MiB {elapsed * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
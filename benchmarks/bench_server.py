@@ -0,0 +1,77 @@
+"""
+Benchmark `pycole --daemon` against cold in-process runs of the CLI.
+
+A corpus is analyzed repeatedly, as editors and pre-commit hooks do: by a
+new `pycole` process each time, by the same process with a warm daemon,
+and after touching a few files so that the daemon analyzes them again.
+
+Usage:
+    uv run python benchmarks/bench_server.py [--files N] [--touched N] [--repeat N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from bench_statements import best_of
+
+from pycole.bench import CorpusSpec, generate_corpus
+from pycole.server import AnalysisServer, analyze_paths_remote
+
+
+def run_cli(*args: str) -> None:
+    """Run the pycole CLI in a new process."""
+    command = [sys.executable, "-c", "from pycole.cli import main; main()", *args]
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000, help="Files in the generated corpus")
+    parser.add_argument("--touched", type=int, default=5, help="Files modified before the incremental request")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir, "corpus")
+        files = generate_corpus(root, CorpusSpec(files=args.files))
+        socket_path = Path(tmpdir, "pycole.sock")
+        print(f"Corpus: {len(files):,} files\n")
+
+        server = AnalysisServer(socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            analyze_paths_remote(socket_path, [root])
+
+            def touch() -> None:
+                for filepath in files[: args.touched]:
+                    os.utime(filepath, ns=(0, os.stat(filepath).st_mtime_ns + 1))
+                analyze_paths_remote(socket_path, [root])
+
+            timings = {
+                name: best_of(args.repeat, func)
+                for name, func in [
+                    ("cold CLI process, -j 1", lambda: run_cli(str(root), "-j", "1")),
+                    ("CLI process, --daemon", lambda: run_cli(str(root), "--daemon", "--socket", str(socket_path))),
+                    ("daemon request, warm", lambda: analyze_paths_remote(socket_path, [root])),
+                    (f"daemon request, {args.touched} touched", touch),
+                ]
+            }
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+    baseline = timings["cold CLI process, -j 1"]
+    for name, elapsed in timings.items():
+        print(f"{name:<28} {elapsed * 1000:>9.1f} ms {elapsed / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark analyzing in-memory sources against writing them to temporary files first.
+
+Usage:
+    uv run python benchmarks/bench_sources.py [--files N] [--jobs N] [--repeat N]
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from bench_statements import best_of
+
+from pycole.analyzer import analyze_directory, analyze_source, analyze_sources
+from pycole.bench import CorpusSpec, generate_corpus
+
+
+def via_temp_files(sources: list[tuple[str, bytes]]) -> None:
+    """Write the sources to a temporary directory and analyze it (the workaround)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, data in sources:
+            filepath = Path(tmpdir, name)
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            filepath.write_bytes(data)
+        analyze_directory(Path(tmpdir), use_ignore_files=False)
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000, help="Number of sources")
+    parser.add_argument("--jobs", type=int, default=4, help="Worker processes of the batch run")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        generate_corpus(root, CorpusSpec(files=args.files))
+        sources = [(filepath.relative_to(root).as_posix(), filepath.read_bytes()) for filepath in root.rglob("*.py")]
+    print(f"Sources: {len(sources):,}, {sum(len(data) for _, data in sources) / 1e6:.1f} MB\n")
+
+    timings = {
+        name: best_of(args.repeat, func)
+        for name, func in [
+            ("temporary files", lambda: via_temp_files(sources)),
+            ("analyze_source", lambda: [analyze_source(data, name) for name, data in sources]),
+            (f"analyze_sources, {args.jobs} jobs", lambda: analyze_sources(sources, jobs=args.jobs)),
+        ]
+    }
+    baseline = timings["temporary files"]
+    for name, elapsed in timings.items():
+        print(f"{name:<28} {elapsed * 1000:>9.1f} ms {elapsed / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
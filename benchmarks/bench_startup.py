@@ -0,0 +1,32 @@
+"""
+Benchmark the import time of the pycole CLI with `python -X importtime`.
+
+Prints the modules that take longest to import after click, and compares
+the total with the startup budget enforced by the test suite.
+
+Usage:
+    uv run python benchmarks/bench_startup.py [--module NAME] [--repeat N] [--top N]
+"""
+
+import argparse
+
+from pycole.bench import STARTUP_BUDGET_US, measure_import_time
+
+
+def main() -> None:
+    """Run the benchmark and print the slowest imports."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="pycole.cli", help="Module to import")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed interpreter runs")
+    parser.add_argument("--top", type=int, default=15, help="Number of modules to list")
+    args = parser.parse_args()
+
+    times = measure_import_time(args.module, repeat=args.repeat)
+    for name, cumulative in sorted(times.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"{cumulative / 1000:>8.1f} ms  {name}")
+    total = times[args.module]
+    print(f"\n{args.module} after click: {total / 1000:.1f} ms (budget {STARTUP_BUDGET_US / 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
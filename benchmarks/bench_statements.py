@@ -0,0 +1,101 @@
+"""
+Benchmark statement counting strategies on a large generated module.
+
+Usage:
+    uv run python benchmarks/bench_statements.py [--functions N] [--repeat N]
+"""
+
+import argparse
+import ast
+import tempfile
+import time
+from pathlib import Path
+
+from pycole.analyzer import analyze_file, count_statements, count_statements_tokenize
+
+
+def generate_module(functions: int) -> str:
+    """Generate a module with a mix of simple and compound statements."""
+    parts = ['"""Generated module."""', "", "import os", ""]
+    for i in range(functions):
+        parts.append(
+            f'''
+@decorator
+def function_{i}(value: int, items: list[int]) -> int:
+    """Docstring for function {i}."""
+    # Accumulate a result
+    total = 0
+    for item in items:
+        if item % 2 == 0: total += item
+        elif item > {i}:
+            total -= item
+        else:
+            continue
+    try:
+        result = {{"key": lambda x: x + {i}, "values": [v for v in items if v]}}
+    except (KeyError, ValueError) as exc:
+        raise RuntimeError("failed") from exc
+    finally:
+        os.getcwd(); total += 1
+    return total + value
+'''
+        )
+    return "\n".join(parts)
+
+
+def ast_walk_baseline(code: str) -> int:
+    """Count statements by visiting every AST node (the original implementation)."""
+    try:
+        return sum(1 for node in ast.walk(ast.parse(code)) if isinstance(node, ast.stmt))
+    except SyntaxError:
+        return 0
+
+
+def best_of(repeat: int, func, *args) -> float:
+    """Return the best wall time of `repeat` calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--functions", type=int, default=5000, help="Functions in the generated module")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    code = generate_module(args.functions)
+    expected = ast_walk_baseline(code)
+    assert count_statements(code) == expected
+    assert count_statements_tokenize(code) == expected
+
+    print(f"Module: {len(code.splitlines()):,} lines, {len(code) / 1e6:.1f} MB, {expected:,} statements\n")
+    timings = {
+        name: best_of(args.repeat, func, code)
+        for name, func in [
+            ("ast.parse + ast.walk (baseline)", ast_walk_baseline),
+            ("count_statements (ast)", count_statements),
+            ("count_statements_tokenize", count_statements_tokenize),
+        ]
+    }
+    baseline = timings["ast.parse + ast.walk (baseline)"]
+    for name, elapsed in timings.items():
+        print(f"{name:<36} {elapsed * 1000:>9.1f} ms {baseline / elapsed:>6.2f}x")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        module = Path(tmpdir) / "module.py"
+        test_module = Path(tmpdir) / "test_module.py"
+        module.write_text(code)
+        test_module.write_text(code)
+        print()
+        for name, filepath in [("analyze_file (module)", module), ("analyze_file (test file)", test_module)]:
+            elapsed = best_of(args.repeat, analyze_file, filepath)
+            print(f"{name:<36} {elapsed * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
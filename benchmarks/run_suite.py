@@ -0,0 +1,61 @@
+"""
+Run the benchmark suite on several synthetic corpus profiles.
+
+Each profile is written to `<output-dir>/<profile>.json`. Pass a previous
+output directory with `--compare` to fail on regressions.
+
+Usage:
+    uv run python benchmarks/run_suite.py [--output-dir DIR] [--compare DIR] [--repeat N]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+from pycole.bench import CorpusSpec, compare_results, generate_corpus, run_benchmark
+
+PROFILES = {
+    "small_files": CorpusSpec(files=2000, lines=40),
+    "large_files": CorpusSpec(files=50, lines=5000),
+    "comment_heavy": CorpusSpec(files=500, lines=200, comment_density=0.5),
+    "test_heavy": CorpusSpec(files=500, lines=200, test_ratio=0.7),
+}
+
+
+def main() -> None:
+    """Run every profile and optionally compare against a previous run."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output-dir", type=Path, default=Path("bench_results"), help="Where to write results")
+    parser.add_argument("--compare", type=Path, default=None, help="Directory with baseline results")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown counted as a regression")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per phase")
+    parser.add_argument("--jobs", type=int, default=1, help="Workers for an additional parallel run")
+    args = parser.parse_args()
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    failed = False
+    for name, spec in PROFILES.items():
+        with tempfile.TemporaryDirectory(prefix=f"pycole-{name}-") as tmpdir:
+            generate_corpus(Path(tmpdir), spec)
+            results = run_benchmark(Path(tmpdir), repeat=args.repeat, jobs=args.jobs)
+        results["corpus"]["spec"] = asdict(spec)
+        (args.output_dir / f"{name}.json").write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+        total = results["phases"]["analyze_directory"]["min"]
+        print(f"{name:<16} {results['corpus']['files']:>6} files {total * 1000:>10.1f} ms")
+
+        baseline = args.compare / f"{name}.json" if args.compare else None
+        if baseline is not None and baseline.exists():
+            regressions = compare_results(json.loads(baseline.read_text(encoding="utf-8")), results, args.threshold)
+            for phase, ratio in regressions.items():
+                print(f"  regression: {phase} is {ratio:.2f}x slower", file=sys.stderr)
+                failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Python code length analyzer.
+
+The names exported here are the library API: analysis of files,
+directories and in-memory sources, one at a time, lazily or in batches.
+"""
+
+from .analyzer import (
+    CodeMetrics,
+    analyze_directory,
+    analyze_file,
+    analyze_path,
+    analyze_paths,
+    analyze_source,
+    analyze_sources,
+    iter_file_metrics,
+    iter_source_metrics,
+)
+
+__all__ = [
+    "CodeMetrics",
+    "analyze_directory",
+    "analyze_file",
+    "analyze_path",
+    "analyze_paths",
+    "analyze_source",
+    "analyze_sources",
+    "iter_file_metrics",
+    "iter_source_metrics",
+]
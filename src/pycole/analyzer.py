@@ -1,19 +1,95 @@
 """Core analyzer module for counting lines and statements in Python code."""
 
 import ast
+import codecs
+import io
+import mmap
+import os
+import tokenize
+from collections.abc import Callable, Container, Iterable, Iterator
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Protocol
 
+from .astmetrics import BODY_FIELDS, measure_tree
+from .walker import iter_python_files
 
-@dataclass
-class CodeMetrics:
-    """Metrics for a Python file or project."""
+if TYPE_CHECKING:
+    from .checkpoint import Checkpoint
+    from .dedup import Deduplicator
+    from .limits import FileLimits
+    from .profiling import FileProfile, Profiler
+
+
+@dataclass(slots=True)
+class CodeMetrics:  # pylint: disable=too-many-instance-attributes
+    """
+    Metrics for a Python file or project.
+
+    The AST metrics after `test_code_lines` are only computed when requested
+    (see `pycole.astmetrics`) and are 0 otherwise. Like statements, they
+    exclude test files. Adding metrics sums them, except for the `max_*`
+    metrics, which take the maximum. Subtracting gives the plain difference
+    of every field, so a `max_*` metric cannot be removed from a total by
+    subtracting a file's metrics.
+    """
 
     total_lines: int
     code_lines: int  # Lines without comments and blank lines
     statements: int
     test_lines: int
     test_code_lines: int  # Test lines without comments and blank lines
+    functions: int = 0
+    classes: int = 0
+    complexity: int = 0  # Sum of the cyclomatic complexity of every function
+    max_complexity: int = 0  # Highest cyclomatic complexity of a function
+    max_nesting: int = 0  # Deepest nesting of a statement in blocks
+    docstring_lines: int = 0
+
+    def __add__(self, other: "CodeMetrics") -> "CodeMetrics":
+        return CodeMetrics(
+            total_lines=self.total_lines + other.total_lines,
+            code_lines=self.code_lines + other.code_lines,
+            statements=self.statements + other.statements,
+            test_lines=self.test_lines + other.test_lines,
+            test_code_lines=self.test_code_lines + other.test_code_lines,
+            functions=self.functions + other.functions,
+            classes=self.classes + other.classes,
+            complexity=self.complexity + other.complexity,
+            max_complexity=max(self.max_complexity, other.max_complexity),
+            max_nesting=max(self.max_nesting, other.max_nesting),
+            docstring_lines=self.docstring_lines + other.docstring_lines,
+        )
+
+    def __sub__(self, other: "CodeMetrics") -> "CodeMetrics":
+        return CodeMetrics(
+            total_lines=self.total_lines - other.total_lines,
+            code_lines=self.code_lines - other.code_lines,
+            statements=self.statements - other.statements,
+            test_lines=self.test_lines - other.test_lines,
+            test_code_lines=self.test_code_lines - other.test_code_lines,
+            functions=self.functions - other.functions,
+            classes=self.classes - other.classes,
+            complexity=self.complexity - other.complexity,
+            max_complexity=self.max_complexity - other.max_complexity,
+            max_nesting=self.max_nesting - other.max_nesting,
+            docstring_lines=self.docstring_lines - other.docstring_lines,
+        )
+
+
+class FileCache(Protocol):  # pylint: disable=too-few-public-methods
+    """Per-file metrics cache accepted by the analyzer functions, such as `pycole.cache.MetricsCache`."""
+
+    def analyze_files(
+        self,
+        files: Iterable[Path],
+        analyze: Callable[[list[Path]], Iterable[tuple[Path, CodeMetrics]]],
+        root: Path | None = None,
+        abandoned: Container[Path] = (),
+    ) -> Iterator[tuple[Path, CodeMetrics]]:
+        """Yield `(filepath, metrics)` pairs for files, passing those missing from the cache to `analyze`."""
 
 
 def is_test_file(filepath: Path) -> bool:
@@ -26,35 +102,420 @@ def is_test_file(filepath: Path) -> bool:
 def count_statements(code: str) -> int:
     """Count the number of statements in Python code using AST."""
     try:
-        tree = ast.parse(code)
-        return sum(1 for _ in ast.walk(tree) if isinstance(_, ast.stmt))
+        return _count_statements_ast(code)
     except SyntaxError:
         return 0
 
 
-def analyze_file(filepath: Path) -> CodeMetrics:
-    """Analyze a single Python file and return metrics."""
+def _count_statements_ast(code: str) -> int:
+    """Count statements using AST, raising SyntaxError for invalid code."""
+    tree = ast.parse(code)
+
+    # Only descend into statement lists instead of visiting every expression node
+    statements = 0
+    stack: list[ast.AST] = [tree]
+    while stack:
+        node = stack.pop()
+        for field in BODY_FIELDS:
+            children = getattr(node, field, None)
+            if children:
+                statements += sum(1 for child in children if isinstance(child, ast.stmt))
+                stack.extend(children)
+    return statements
+
+
+# Keywords that start a clause header ending in a block colon
+_COMPOUND_KEYWORDS = frozenset(
+    {"if", "elif", "else", "for", "while", "try", "except", "finally", "with", "def", "class", "async", "match", "case"}
+)
+# Clause headers that are part of another statement rather than statements themselves
+_CLAUSE_KEYWORDS = frozenset({"else", "except", "finally", "case"})
+# Tokens that may follow a `match`/`case` soft keyword in a pattern or subject
+_PATTERN_START = frozenset({"(", "[", "{", "-", "*", "~"})
+_IGNORED_TOKENS = frozenset({tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER})
+
+
+def count_statements_tokenize(code: str) -> int:
+    """
+    Count the number of statements in Python code from its token stream.
+
+    See `_count_statements_tokens` for how statements are recognized.
+    """
     try:
-        content = filepath.read_text(encoding="utf-8")
-    except (UnicodeDecodeError, PermissionError):
-        return CodeMetrics(0, 0, 0, 0, 0)
+        return _count_statements_tokens(code)
+    except (tokenize.TokenError, SyntaxError):
+        return 0
+
+
+def _count_statements_tokens(code: str) -> int:
+    """
+    Count statements from the token stream, raising TokenError or SyntaxError.
+
+    This avoids building an AST. Each logical line counts as one statement,
+    except decorators and `else`/`except`/`finally`/`case` clause headers;
+    simple statements after a block colon or a semicolon on the same line
+    are counted separately. The result matches `count_statements` for valid
+    code, but invalid code that still tokenizes is counted instead of
+    reported as 0.
+    """
+    return _scan_tokens(code, classify_lines=False)[0]
+
+
+def count_statements_and_code_lines(code: str) -> tuple[int, int]:
+    """
+    Count statements and code lines of Python code in a single pass over its token stream.
+
+    Statements are counted like `count_statements_tokenize`. A line is a code
+    line if a token other than a comment starts, ends or continues on it,
+    except for the tokens of statements that consist of nothing but a string
+    (docstrings, and strings used as block comments). So unlike `count_lines`,
+    lines inside multi-line strings count as code lines if the string is part
+    of a statement, including blank lines and lines starting with `#`.
+
+    Args:
+        code: Python source code
+
+    Returns:
+        Number of statements and number of code lines
+
+    Raises:
+        tokenize.TokenError, SyntaxError: If the code cannot be tokenized
+    """
+    return _scan_tokens(code, classify_lines=True)
+
+
+def _scan_tokens(code: str, classify_lines: bool) -> tuple[int, int]:
+    """Count statements and, if `classify_lines`, code lines from the token stream; see the two callers."""
+    # pylint: disable=too-many-branches,too-many-statements
+    statements = 0
+    depth = 0
+    lambdas = 0
+    line_start = True
+    header = False  # The logical line is a clause header whose colon was not seen yet
+    pending = False  # The next token on this line starts another statement
+    soft = False  # The logical line starts with the `match` or `case` soft keyword
+    soft_clause = False  # The logical line starts with `case`
+    code_lines = 0
+    last_code_line = 0  # Last line already counted as a code line
+    strings: tuple[int, int] | None = None  # Lines of a statement that is only strings so far
+
+    for tok_type, string, (start_row, _), (end_row, _), _ in tokenize.generate_tokens(io.StringIO(code).readline):
+        if tok_type in _IGNORED_TOKENS:
+            continue
+        if tok_type == tokenize.NEWLINE:
+            if soft_clause and header:
+                # `case` without a block colon was an identifier, not a clause
+                statements += 1
+            line_start = True
+            pending = False
+            strings = None
+            continue
+
+        if classify_lines:
+            if tok_type == tokenize.STRING and (line_start or pending or strings is not None):
+                # A statement starting with a string is not code unless other tokens follow
+                strings = (strings[0] if strings is not None else start_row, end_row)
+                start_row = 0
+            elif strings is not None and tok_type == tokenize.OP and string == ";":
+                strings = None
+                start_row = 0
+            elif strings is not None:
+                start_row = strings[0]
+                strings = None
+            if start_row and end_row > last_code_line:
+                code_lines += end_row - max(start_row, last_code_line + 1) + 1
+                last_code_line = end_row
+
+        if line_start:
+            line_start = False
+            depth = 0
+            lambdas = 0
+            is_name = tok_type == tokenize.NAME
+            header = is_name and string in _COMPOUND_KEYWORDS
+            soft = is_name and string in ("match", "case")
+            soft_clause = is_name and string == "case"
+            if not (is_name and string in _CLAUSE_KEYWORDS) and string != "@":
+                statements += 1
+        else:
+            if soft and tok_type == tokenize.OP and string not in _PATTERN_START:
+                # `match`/`case` followed by an operator is an identifier
+                header = False
+                if soft_clause:
+                    statements += 1
+                    soft_clause = False
+            soft = False
+            if pending:
+                statements += 1
+                pending = False
+
+        if tok_type == tokenize.OP:
+            if string in "([{":
+                depth += 1
+            elif string in ")]}":
+                depth -= 1
+            elif depth == 0 and string == ";":
+                pending = True
+            elif depth == 0 and string == ":" and header:
+                if lambdas:
+                    lambdas -= 1
+                else:
+                    header = False
+                    pending = True
+        elif tok_type == tokenize.NAME and string == "lambda" and depth == 0:
+            lambdas += 1
+    return statements, code_lines
 
+
+STATEMENT_COUNTERS = {
+    "ast": count_statements,
+    "tokenize": count_statements_tokenize,
+}
+# Ways to classify code lines: from the raw bytes by their first character, or from the token stream
+LINE_MODES = ("fast", "accurate")
+# Counters that raise on invalid code, so parse failures can be reported
+_STATEMENT_PARSERS = {
+    "ast": _count_statements_ast,
+    "tokenize": _count_statements_tokens,
+}
+
+
+def count_lines(content: str) -> tuple[int, int]:
+    """Count the total lines and the code lines (non-blank, non-comment lines) of Python code."""
     lines = content.splitlines()
-    total_lines = len(lines)
+    code_lines = sum(1 for line in lines if (stripped := line.strip()) and not stripped.startswith("#"))
+    return len(lines), code_lines
+
+
+# Bytes that `str.splitlines` treats as line breaks, and the marker byte used below
+_FALLBACK_BYTES = (b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e", b"\x00")
+# Non-ASCII line breaks: U+0085, U+2028 and U+2029
+_UNICODE_BREAKS = (b"\xc2\x85", b"\xe2\x80\xa8", b"\xe2\x80\xa9")
+# ASCII characters removed by `str.strip` that are not line breaks
+_ASCII_BLANKS = b" \t\x1f\r"
+# Maps every non-ASCII byte to 0x80
+_HIGH_BYTES = bytes(range(128)) + b"\x80" * 128
+# Bytes classified at a time; chunks are extended to the next newline
+LINE_CHUNK_SIZE = 256 * 1024
+
+
+def _release(data: bytes | mmap.mmap, start: int, end: int) -> None:
+    """Drop the pages of a memory-mapped range from the resident set; they are re-read if accessed again."""
+    if isinstance(data, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED"):
+        page_start = start - start % mmap.PAGESIZE
+        data.madvise(mmap.MADV_DONTNEED, page_start, end - page_start)
+
+
+def _iter_chunks(data: bytes | mmap.mmap, release: bool = True) -> Iterator[bytes]:
+    """Yield content in chunks of at least `LINE_CHUNK_SIZE` bytes that end at a line break."""
+    start = 0
+    while start < len(data):
+        end = data.find(b"\n", start + LINE_CHUNK_SIZE) + 1 or len(data)
+        yield bytes(data[start:end])
+        if release:
+            _release(data, start, end)
+        start = end
+
+
+def count_lines_bytes(data: bytes | mmap.mmap, release: bool = True) -> tuple[int, int]:
+    """
+    Count the total lines and the code lines of UTF-8 encoded Python code without decoding it.
+
+    Lines are classified a chunk at a time with a few whole-chunk passes
+    instead of splitting the content into one string per line: every line
+    start is marked with a NUL byte, blanks are deleted, and blank and comment
+    lines are found by counting NUL bytes followed by a newline or `#`.
+    Content with line breaks other than LF and CRLF, or with lines starting
+    with a non-ASCII character (which may be Unicode whitespace), is decoded
+    and counted by `count_lines`, so the result always matches `count_lines`.
+
+    Args:
+        data: File content, as bytes or an mmap
+        release: Release the pages of an mmap from the resident set once they have been
+            counted; keep them when the content is read again afterwards
+
+    Returns:
+        Total lines and code lines (non-blank, non-comment lines)
+
+    Raises:
+        UnicodeDecodeError: If the content is not valid UTF-8 and needs to be decoded
+    """
+    total_lines = blank_or_comment = 0
+    for chunk in _iter_chunks(data, release):
+        is_ascii = chunk.isascii()
+        if (
+            any(byte in chunk for byte in _FALLBACK_BYTES)
+            or (b"\r" in chunk and chunk.count(b"\r") != chunk.count(b"\r\n"))
+            or (not is_ascii and any(sequence in chunk for sequence in _UNICODE_BREAKS))
+        ):
+            return count_lines(bytes(data).decode("utf-8"))
+
+        if not chunk.endswith(b"\n"):
+            chunk += b"\n"  # Last line without a line break
+        stripped = (b"\x00" + chunk.replace(b"\n", b"\n\x00")).translate(None, _ASCII_BLANKS)
+        if not is_ascii and b"\x00\x80" in stripped.translate(_HIGH_BYTES):
+            return count_lines(bytes(data).decode("utf-8"))
+
+        total_lines += stripped.count(b"\n\x00")
+        blank_or_comment += stripped.count(b"\x00\n") + stripped.count(b"\x00#")
+    return total_lines, total_lines - blank_or_comment
+
+
+def _decode(data: bytes | mmap.mmap) -> str:
+    """Decode UTF-8 file content with universal newlines, like `Path.read_text`."""
+    content = str(data, "utf-8")
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
+
+
+def _check_utf8(data: bytes | mmap.mmap) -> None:
+    """Raise UnicodeDecodeError if content is not valid UTF-8, decoding only non-ASCII chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in _iter_chunks(data):
+        # A chunk must also be decoded if the previous one ended inside a multi-byte sequence
+        if not chunk.isascii() or decoder.getstate()[0]:
+            decoder.decode(chunk)
+    decoder.decode(b"", final=True)
+
+
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1024 * 1024
+
+
+@contextmanager
+def _open_content(filepath: Path, mmap_threshold: int) -> Iterator[bytes | mmap.mmap]:
+    """
+    Yield the content of a file, memory-mapped if it has at least `mmap_threshold` bytes.
+
+    Files that cannot be mapped (e.g. emptied in the meantime, or special
+    files) are read instead. A threshold of 0 never maps files.
+    """
+    with filepath.open("rb") as file:
+        if mmap_threshold and os.fstat(file.fileno()).st_size >= mmap_threshold:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                mapped = None
+            if mapped is not None:
+                with mapped:
+                    yield mapped
+                return
+        yield file.read()
+
+
+def analyze_file(
+    filepath: Path,
+    statement_mode: str = "ast",
+    profile: "FileProfile | None" = None,
+    mmap_threshold: int = MMAP_THRESHOLD,
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+) -> CodeMetrics:
+    """
+    Analyze a single Python file and return metrics.
+
+    Statements are only counted for non-test files, so test files are never parsed
+    (but they are tokenized in accurate line mode).
+    Lines are counted from the raw bytes, and large files are memory-mapped,
+    so the text of a file is only materialized when it is parsed.
+
+    Args:
+        filepath: Python file to analyze
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        profile: Optional profile that receives per-phase timings and counters
+        mmap_threshold: Size in bytes from which files are memory-mapped; 0 always reads them
+        ast_metrics: AST metrics to compute in the same pass as the statements (see
+            `pycole.astmetrics.AST_METRICS`); statements are then counted from the AST
+        line_mode: Code line classification to use: 'fast' classifies lines by their first
+            character, 'accurate' with `count_statements_and_code_lines`, which then also
+            counts the statements unless AST metrics are requested
+
+    Returns:
+        Metrics of the file
+    """
+    try:
+        with _open_content(filepath, mmap_threshold) as data:
+            return _analyze_content(filepath, data, statement_mode, profile, ast_metrics, line_mode)
+    except PermissionError:
+        if profile is not None:
+            profile.skipped = True
+            profile.lap("read")
+        return CodeMetrics(0, 0, 0, 0, 0)
+
+
+def analyze_source(
+    source: str | bytes,
+    filename: str | Path = "<source>",
+    statement_mode: str = "ast",
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+) -> CodeMetrics:
+    """
+    Analyze Python source code held in memory, such as a file from an artifact store.
 
-    # Count code lines (non-blank, non-comment lines)
-    file_code_lines = sum(1 for line in lines if (stripped := line.strip()) and not stripped.startswith("#"))
+    The result is the same as that of `analyze_file` for a file with this
+    content, so nothing needs to be written to disk first.
 
-    # Count statements
-    file_statements = count_statements(content)
+    Args:
+        source: Source code, as text or as UTF-8 encoded bytes; bytes that are
+            not valid UTF-8 give zero metrics, like unreadable files
+        filename: Path of the source, used to tell test files from other files
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        ast_metrics: AST metrics to compute in the same pass as the statements
+        line_mode: Code line classification to use ('fast' or 'accurate')
 
+    Returns:
+        Metrics of the source
+
+    Raises:
+        UnicodeEncodeError: If text contains lone surrogates
+    """
+    data = source.encode() if isinstance(source, str) else source
+    return _analyze_content(Path(filename), data, statement_mode, None, ast_metrics, line_mode)
+
+
+def _analyze_content(
+    filepath: Path,
+    data: bytes | mmap.mmap,
+    statement_mode: str,
+    profile: "FileProfile | None" = None,
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+) -> CodeMetrics:
+    """Analyze the content of a Python file that was already read or mapped."""
     # Determine if this is a test file
     is_test = is_test_file(filepath)
 
+    accurate = line_mode == "accurate"
+    try:
+        # Lines are counted before decoding, so the pages of a mapping are released once, after the last pass
+        total_lines, file_code_lines = count_lines_bytes(data, release=False)
+        if profile is not None:
+            profile.bytes_read = len(data)
+            profile.lap("count_lines")
+
+        # Test files are never parsed, so they are only checked to be valid UTF-8 unless they are tokenized
+        if is_test and not accurate:
+            _check_utf8(data)
+            content = ""
+        else:
+            content = _decode(data)
+            _release(data, 0, len(data))
+        if profile is not None:
+            profile.lap("read")
+    except UnicodeDecodeError:
+        if profile is not None:
+            profile.skipped = True
+            profile.lap("read")
+        return CodeMetrics(0, 0, 0, 0, 0)
+
+    ast_values: dict[str, int] = {}
     if is_test:
         # For test files: don't count in main metrics, only in test metrics
         test_lines = total_lines
         test_code_lines = file_code_lines
+        if accurate:
+            test_code_lines = _count_tokens(content, file_code_lines, profile, "count_lines")[1]
         code_lines = 0
         statements = 0
     else:
@@ -62,7 +523,22 @@ def analyze_file(filepath: Path) -> CodeMetrics:
         test_lines = 0
         test_code_lines = 0
         code_lines = file_code_lines
-        statements = file_statements
+        if ast_metrics:
+            ast_values = _measure_ast(content, ast_metrics, profile)
+            statements = ast_values.pop("statements")
+            if accurate:
+                code_lines = _count_tokens(content, file_code_lines, profile, "count_lines")[1]
+        elif accurate:
+            statements, code_lines = _count_tokens(content, file_code_lines, profile)
+        elif profile is None:
+            statements = STATEMENT_COUNTERS[statement_mode](content)
+        else:
+            try:
+                statements = _STATEMENT_PARSERS[statement_mode](content)
+            except (tokenize.TokenError, SyntaxError):
+                statements = 0
+                profile.parse_failed = True
+            profile.lap("count_statements")
 
     return CodeMetrics(
         total_lines=total_lines,
@@ -70,46 +546,480 @@ def analyze_file(filepath: Path) -> CodeMetrics:
         statements=statements,
         test_lines=test_lines,
         test_code_lines=test_code_lines,
+        **ast_values,
     )
 
 
-def analyze_directory(dirpath: Path) -> CodeMetrics:
-    """Analyze all Python files in a directory recursively."""
-    total_lines = 0
-    code_lines = 0
-    statements = 0
-    test_lines = 0
-    test_code_lines = 0
+def _count_tokens(
+    content: str, code_lines: int, profile: "FileProfile | None", phase: str = "count_statements"
+) -> tuple[int, int]:
+    """Count statements and code lines from the token stream, keeping `code_lines` if the content does not tokenize."""
+    try:
+        statements, code_lines = count_statements_and_code_lines(content)
+    except (tokenize.TokenError, SyntaxError):
+        statements = 0
+        if profile is not None:
+            profile.parse_failed = True
+    if profile is not None:
+        profile.lap(phase)
+    return statements, code_lines
 
-    # Find all Python files recursively
-    python_files = list(dirpath.rglob("*.py"))
 
-    for filepath in python_files:
-        # Skip virtual environments and common ignore patterns
-        skip_patterns = [".venv", "venv", "__pycache__", ".git", "node_modules"]
-        if any(part in filepath.parts for part in skip_patterns):
-            continue
+def _measure_ast(content: str, ast_metrics: tuple[str, ...], profile: "FileProfile | None") -> dict[str, int]:
+    """Count statements and compute AST metrics from a single parse of a module."""
+    try:
+        values = measure_tree(ast.parse(content), ast_metrics)
+    except SyntaxError:
+        values = {"statements": 0}
+        if profile is not None:
+            profile.parse_failed = True
+    if profile is not None:
+        profile.lap("count_statements")
+    return values
 
-        metrics = analyze_file(filepath)
-        total_lines += metrics.total_lines
-        code_lines += metrics.code_lines
-        statements += metrics.statements
-        test_lines += metrics.test_lines
-        test_code_lines += metrics.test_code_lines
 
-    return CodeMetrics(
-        total_lines=total_lines,
-        code_lines=code_lines,
-        statements=statements,
-        test_lines=test_lines,
-        test_code_lines=test_code_lines,
+def _iter_contents(
+    files: Iterable[Path], io_threads: int, mmap_threshold: int
+) -> Iterator[tuple[Path, bytes | None]]:
+    """Pair files with their content read ahead in threads, or with None if they are to be opened on demand."""
+    if not io_threads:
+        return ((filepath, None) for filepath in files)
+    from .prefetch import prefetch_files  # pylint: disable=import-outside-toplevel
+
+    # Files that will be memory-mapped are left to `analyze_file`
+    return prefetch_files(files, io_threads, max_size=mmap_threshold)
+
+
+def _analyze_serial(
+    files: Iterable[Path],
+    statement_mode: str,
+    profiler: "Profiler | None" = None,
+    mmap_threshold: int = MMAP_THRESHOLD,
+    io_threads: int = 0,
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+) -> Iterator[tuple[Path, CodeMetrics]]:
+    """Analyze files one at a time in the current process, optionally reading ahead in threads."""
+    if profiler is not None:
+        from .profiling import FileProfile  # pylint: disable=import-outside-toplevel
+
+    profile = None
+    for filepath, data in _iter_contents(files, io_threads, mmap_threshold):
+        if profiler is not None:
+            profile = FileProfile()
+        if data is None:
+            metrics = analyze_file(filepath, statement_mode, profile, mmap_threshold, ast_metrics, line_mode)
+        else:
+            metrics = _analyze_content(filepath, data, statement_mode, profile, ast_metrics, line_mode)
+        if profiler is not None and profile is not None:
+            profiler.add_file(filepath, profile)
+        yield filepath, metrics
+
+
+def _iter_metrics(
+    files: Iterable[Path],
+    root: Path | None,
+    jobs: int,
+    cache: "FileCache | None",
+    statement_mode: str,
+    profiler: "Profiler | None" = None,
+    mmap_threshold: int = MMAP_THRESHOLD,
+    io_threads: int = 0,
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+    checkpoint: "Checkpoint | None" = None,
+    dedup: "Deduplicator | None" = None,
+    limits: "FileLimits | None" = None,
+) -> Iterator[tuple[Path, CodeMetrics]]:
+    """Analyze files serially or in a process pool, serving unchanged files from the cache."""
+    with ExitStack() as stack:
+        analyze = _make_analyze(
+            stack, jobs, statement_mode, profiler, mmap_threshold, io_threads, ast_metrics, line_mode, limits
+        )
+        yield from _analyze_files(files, root, analyze, cache, profiler, checkpoint, dedup, limits)
+
+
+def _make_analyze(
+    stack: ExitStack,
+    jobs: int,
+    statement_mode: str,
+    profiler: "Profiler | None",
+    mmap_threshold: int,
+    io_threads: int,
+    ast_metrics: tuple[str, ...],
+    line_mode: str,
+    limits: "FileLimits | None" = None,
+) -> Callable[[Iterable[Path]], Iterator[tuple[Path, CodeMetrics]]]:
+    """Return a function analyzing files serially or in a process pool that is closed with `stack`."""
+    if limits is not None and limits.file_timeout is not None:
+        from .limits import KillableEngine  # pylint: disable=import-outside-toplevel
+
+        killable = KillableEngine(limits, jobs, statement_mode, mmap_threshold, ast_metrics, line_mode)
+        return stack.enter_context(killable).analyze
+    if jobs > 1:
+        from .parallel import ParallelEngine  # pylint: disable=import-outside-toplevel
+
+        engine = ParallelEngine(
+            jobs,
+            statement_mode=statement_mode,
+            profiler=profiler,
+            mmap_threshold=mmap_threshold,
+            io_threads=io_threads,
+            ast_metrics=ast_metrics,
+            line_mode=line_mode,
+        )
+        return stack.enter_context(engine).analyze
+    return partial(
+        _analyze_serial,
+        statement_mode=statement_mode,
+        profiler=profiler,
+        mmap_threshold=mmap_threshold,
+        io_threads=io_threads,
+        ast_metrics=ast_metrics,
+        line_mode=line_mode,
     )
 
 
-def analyze_path(path: Path) -> CodeMetrics:
-    """Analyze a file or directory and return metrics."""
+def _analyze_files(
+    files: Iterable[Path],
+    root: Path | None,
+    analyze: Callable[[Iterable[Path]], Iterator[tuple[Path, CodeMetrics]]],
+    cache: "FileCache | None",
+    profiler: "Profiler | None",
+    checkpoint: "Checkpoint | None" = None,
+    dedup: "Deduplicator | None" = None,
+    limits: "FileLimits | None" = None,
+) -> Iterator[tuple[Path, CodeMetrics]]:
+    """Analyze files with `analyze`, serving unchanged files from the cache or the checkpoint, and copies once."""
+    if profiler is not None:
+        files = profiler.timed_iter("walk", files)
+    # Files abandoned by the analyzer get line-only metrics, which are not cached or checkpointed
+    abandoned: Container[Path] = () if limits is None else limits.abandoned
+    if dedup is not None:
+        analyze = partial(dedup.analyze_files, analyze=analyze, limits=limits)
+    if checkpoint is not None:
+        analyze = partial(checkpoint.analyze_files, analyze=analyze, abandoned=abandoned)
+    if cache is not None:
+        analyze = partial(cache.analyze_files, analyze=analyze, root=root, abandoned=abandoned)
+    if limits is None:
+        return analyze(files)
+    # Outermost, so files over the size limit are reported on every run rather than served from the cache
+    return limits.analyze_files(files, analyze)
+
+
+def _sum_metrics(results: Iterable[tuple[Path, CodeMetrics]], profiler: "Profiler | None" = None) -> CodeMetrics:
+    """Sum per-file metrics."""
+    totals = CodeMetrics(0, 0, 0, 0, 0)
+    if profiler is None:
+        for _, metrics in results:
+            totals += metrics
+        return totals
+
+    for _, metrics in results:
+        with profiler.phase("aggregate"):
+            totals += metrics
+    return totals
+
+
+def iter_file_metrics(
+    path: Path,
+    jobs: int = 1,
+    exclude: Iterable[str] = (),
+    cache: "FileCache | None" = None,
+    statement_mode: str = "ast",
+    profiler: "Profiler | None" = None,
+    mmap_threshold: int = MMAP_THRESHOLD,
+    io_threads: int = 0,
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+    use_ignore_files: bool = True,
+    checkpoint: "Checkpoint | None" = None,
+    dedup: "Deduplicator | None" = None,
+    limits: "FileLimits | None" = None,
+) -> Iterator[tuple[Path, CodeMetrics]]:
+    """
+    Lazily analyze a file or all Python files in a directory.
+
+    Files are discovered, analyzed and yielded one at a time, so memory use
+    does not grow with the number of files.
+
+    Args:
+        path: File or directory to analyze
+        jobs: Number of worker processes; 1 analyzes files in the current process
+        exclude: Glob patterns for files and directories to skip
+        cache: Optional cache of per-file metrics from previous runs
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        profiler: Optional profiler that receives per-phase timings and counters
+        mmap_threshold: Size in bytes from which files are memory-mapped; 0 always reads them
+        io_threads: Number of threads reading files ahead of their analysis; 0 reads them on demand
+        ast_metrics: AST metrics to compute in the same pass as the statements
+        line_mode: Code line classification to use ('fast' or 'accurate')
+        use_ignore_files: Skip what `.gitignore` and `.ignore` files and the `[tool.pycole]`
+            exclude list ignore in directories
+        checkpoint: Optional checkpoint that records per-file metrics as they are computed
+            and serves the files recorded by an interrupted run
+        dedup: Optional deduplicator that analyzes byte-identical files once and reuses
+            their metrics for the copies
+        limits: Optional size and time limits; files over them get line-only metrics
+            and are recorded in `limits.skipped`
+
+    Returns:
+        Iterator of `(filepath, metrics)` pairs, one per analyzed file
+    """
+    options = (
+        statement_mode, profiler, mmap_threshold, io_threads, ast_metrics, line_mode, checkpoint, dedup, limits
+    )
     if path.is_file():
-        return analyze_file(path)
+        return _iter_metrics([path], None, 1, cache, *options)
     if path.is_dir():
-        return analyze_directory(path)
+        python_files = iter_python_files(path, exclude, use_ignore_files)
+        return _iter_metrics(python_files, path, jobs, cache, *options)
     raise ValueError(f"Path {path} is neither a file nor a directory")
+
+
+def iter_source_metrics(
+    sources: Iterable[tuple[str | Path, str | bytes]],
+    jobs: int = 1,
+    statement_mode: str = "ast",
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+) -> Iterator[tuple[str | Path, CodeMetrics]]:
+    """
+    Lazily analyze Python sources held in memory.
+
+    Sources are consumed and yielded one at a time, so memory use does not
+    grow with their number. With several jobs, sources are analyzed in a
+    process pool in batches, with a bounded number of batches in flight,
+    and the pool is shut down once the iterator is exhausted or closed.
+
+    Args:
+        sources: `(filename, source)` pairs; see `analyze_source`
+        jobs: Number of worker processes; 1 analyzes sources in the current process
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        ast_metrics: AST metrics to compute in the same pass as the statements
+        line_mode: Code line classification to use ('fast' or 'accurate')
+
+    Returns:
+        Iterator of `(filename, metrics)` pairs, one per source, in input order
+    """
+    if jobs <= 1:
+        for filename, source in sources:
+            yield filename, analyze_source(source, filename, statement_mode, ast_metrics, line_mode)
+        return
+
+    from .parallel import ParallelEngine  # pylint: disable=import-outside-toplevel
+
+    with ParallelEngine(jobs, statement_mode=statement_mode, ast_metrics=ast_metrics, line_mode=line_mode) as engine:
+        yield from engine.analyze_sources(sources)
+
+
+def analyze_sources(
+    sources: Iterable[tuple[str | Path, str | bytes]],
+    jobs: int | None = None,
+    statement_mode: str = "ast",
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+) -> list[tuple[str | Path, CodeMetrics]]:
+    """
+    Analyze many Python sources held in memory at once, in a process pool.
+
+    Args:
+        sources: `(filename, source)` pairs; see `analyze_source`
+        jobs: Number of worker processes (defaults to the CPU count); small
+            batches are analyzed in the current process
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        ast_metrics: AST metrics to compute in the same pass as the statements
+        line_mode: Code line classification to use ('fast' or 'accurate')
+
+    Returns:
+        `(filename, metrics)` pairs, one per source, in input order
+    """
+    if jobs is None:
+        jobs = os.process_cpu_count() or 1
+    return list(iter_source_metrics(sources, jobs, statement_mode, ast_metrics, line_mode))
+
+
+def analyze_directory(
+    dirpath: Path,
+    jobs: int = 1,
+    exclude: Iterable[str] = (),
+    cache: "FileCache | None" = None,
+    statement_mode: str = "ast",
+    profiler: "Profiler | None" = None,
+    mmap_threshold: int = MMAP_THRESHOLD,
+    io_threads: int = 0,
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+    use_ignore_files: bool = True,
+    checkpoint: "Checkpoint | None" = None,
+    dedup: "Deduplicator | None" = None,
+    limits: "FileLimits | None" = None,
+) -> CodeMetrics:
+    """
+    Analyze all Python files in a directory recursively.
+
+    Args:
+        dirpath: Directory to analyze
+        jobs: Number of worker processes; 1 analyzes files in the current process
+        exclude: Glob patterns for files and directories to skip
+        cache: Optional cache of per-file metrics from previous runs
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        profiler: Optional profiler that receives per-phase timings and counters
+        mmap_threshold: Size in bytes from which files are memory-mapped; 0 always reads them
+        io_threads: Number of threads reading files ahead of their analysis; 0 reads them on demand
+        ast_metrics: AST metrics to compute in the same pass as the statements
+        line_mode: Code line classification to use ('fast' or 'accurate')
+        use_ignore_files: Skip what `.gitignore` and `.ignore` files and the `[tool.pycole]`
+            exclude list ignore in directories
+        checkpoint: Optional checkpoint that records per-file metrics as they are computed
+            and serves the files recorded by an interrupted run
+        dedup: Optional deduplicator that analyzes byte-identical files once and reuses
+            their metrics for the copies
+        limits: Optional size and time limits; files over them get line-only metrics
+            and are recorded in `limits.skipped`
+
+    Returns:
+        Summed metrics of all analyzed files
+    """
+    python_files = iter_python_files(dirpath, exclude, use_ignore_files)
+    options = (
+        statement_mode, profiler, mmap_threshold, io_threads, ast_metrics, line_mode, checkpoint, dedup, limits
+    )
+    results = _iter_metrics(python_files, dirpath, jobs, cache, *options)
+    return _sum_metrics(results, profiler)
+
+
+def analyze_path(
+    path: Path,
+    jobs: int = 1,
+    exclude: Iterable[str] = (),
+    cache: "FileCache | None" = None,
+    statement_mode: str = "ast",
+    profiler: "Profiler | None" = None,
+    mmap_threshold: int = MMAP_THRESHOLD,
+    io_threads: int = 0,
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+    use_ignore_files: bool = True,
+    checkpoint: "Checkpoint | None" = None,
+    dedup: "Deduplicator | None" = None,
+    limits: "FileLimits | None" = None,
+) -> CodeMetrics:
+    """Analyze a file or directory and return metrics."""
+    if path.is_file() and all(option is None for option in (cache, profiler, checkpoint, dedup, limits)):
+        # A single file gains nothing from reading ahead
+        return analyze_file(path, statement_mode, None, mmap_threshold, ast_metrics, line_mode)
+    results = iter_file_metrics(
+        path,
+        jobs,
+        exclude,
+        cache,
+        statement_mode,
+        profiler,
+        mmap_threshold,
+        io_threads,
+        ast_metrics,
+        line_mode,
+        use_ignore_files,
+        checkpoint,
+        dedup,
+        limits,
+    )
+    return _sum_metrics(results, profiler)
+
+
+def analyze_paths(
+    paths: Iterable[Path],
+    jobs: int = 1,
+    exclude: Iterable[str] = (),
+    cache: "FileCache | None" = None,
+    statement_mode: str = "ast",
+    profiler: "Profiler | None" = None,
+    mmap_threshold: int = MMAP_THRESHOLD,
+    io_threads: int = 0,
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+    use_ignore_files: bool = True,
+    checkpoint: "Checkpoint | None" = None,
+    dedup: "Deduplicator | None" = None,
+    limits: "FileLimits | None" = None,
+) -> list[tuple[Path, CodeMetrics]]:
+    """
+    Analyze several files or directories in one run, sharing the worker pool and cache.
+
+    A file reachable from more than one path is only counted once, towards
+    the first path that contains it, so the per-path metrics add up to the
+    grand total. Paths that are listed more than once are reported once.
+
+    Args:
+        paths: Files or directories to analyze
+        jobs: Number of worker processes; 1 analyzes files in the current process
+        exclude: Glob patterns for files and directories to skip
+        cache: Optional cache of per-file metrics from previous runs
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        profiler: Optional profiler that receives per-phase timings and counters
+        mmap_threshold: Size in bytes from which files are memory-mapped; 0 always reads them
+        io_threads: Number of threads reading files ahead of their analysis; 0 reads them on demand
+        ast_metrics: AST metrics to compute in the same pass as the statements
+        line_mode: Code line classification to use ('fast' or 'accurate')
+        use_ignore_files: Skip what `.gitignore` and `.ignore` files and the `[tool.pycole]`
+            exclude list ignore in directories
+        checkpoint: Optional checkpoint that records per-file metrics as they are computed
+            and serves the files recorded by an interrupted run
+        dedup: Optional deduplicator that analyzes byte-identical files once and reuses
+            their metrics for the copies
+        limits: Optional size and time limits; files over them get line-only metrics
+            and are recorded in `limits.skipped`
+
+    Returns:
+        `(path, metrics)` pairs, one per distinct path, in input order
+    """
+    roots: dict[str, Path] = {}
+    for path in paths:
+        if not path.is_file() and not path.is_dir():
+            raise ValueError(f"Path {path} is neither a file nor a directory")
+        roots.setdefault(os.path.realpath(path), path)
+    overlapping = _overlapping_roots(list(roots))
+
+    results = []
+    seen: set[str] = set()
+    with ExitStack() as stack:
+        analyze = _make_analyze(
+            stack, jobs, statement_mode, profiler, mmap_threshold, io_threads, ast_metrics, line_mode, limits
+        )
+        for resolved, path in roots.items():
+            if path.is_file():
+                files: Iterable[Path] = [path]
+            else:
+                files = iter_python_files(path, exclude, use_ignore_files)
+            if resolved in overlapping:
+                files = _unseen_files(files, path, resolved, seen)
+            # Files of an overlapping root may be counted under another root, so none are evicted
+            root = path if path.is_dir() and resolved not in overlapping else None
+            path_results = _analyze_files(files, root, analyze, cache, profiler, checkpoint, dedup, limits)
+            results.append((path, _sum_metrics(path_results, profiler)))
+    return results
+
+
+def _overlapping_roots(roots: list[str]) -> set[str]:
+    """Return the resolved roots that contain or are contained in another root."""
+    overlapping: set[str] = set()
+    # Paths below a root sort right after it, so only the following roots need checking
+    prefixes = sorted(os.path.join(root, "") for root in roots)
+    for index, prefix in enumerate(prefixes):
+        following = index + 1
+        while following < len(prefixes) and prefixes[following].startswith(prefix):
+            overlapping.update((os.path.dirname(prefix), os.path.dirname(prefixes[following])))
+            following += 1
+    return overlapping
+
+
+def _unseen_files(files: Iterable[Path], root: Path, resolved: str, seen: set[str]) -> Iterator[Path]:
+    """Yield the files not yielded for an earlier root, recording them in `seen`."""
+    prefix = os.path.join(str(root), "")
+    for filepath in files:
+        text = str(filepath)
+        key = os.path.join(resolved, text[len(prefix) :]) if text.startswith(prefix) else os.path.realpath(filepath)
+        if key not in seen:
+            seen.add(key)
+            yield filepath
@@ -0,0 +1,151 @@
+"""Single-pass computation of AST metrics of a module."""
+
+import ast
+from collections.abc import Collection
+
+# Metrics that can be computed from the AST in addition to the statement count
+AST_METRICS = ("functions", "classes", "complexity", "max_complexity", "max_nesting", "docstring_lines")
+# Metrics that are merged across files by taking the maximum instead of the sum
+MAX_METRICS = frozenset({"max_complexity", "max_nesting"})
+
+# Fields through which statements nest; statements never appear inside expressions
+BODY_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+# Nodes holding statement lists; everything else below a statement is part of an expression
+_BLOCK_NODES = (ast.stmt, ast.excepthandler, ast.match_case)
+# Expression nodes that cannot contain branches, so they are not descended into
+_LEAVES = (ast.Name, ast.Constant, ast.expr_context, ast.operator, ast.unaryop, ast.cmpop, ast.boolop)
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+# Nodes adding one path through a function
+_BRANCHES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.match_case, ast.Assert)
+
+
+def parse_metrics(value: str) -> tuple[str, ...]:
+    """
+    Parse a comma-separated list of AST metrics.
+
+    Args:
+        value: Metric names, or `all` for every metric
+
+    Returns:
+        Metric names in the order of `AST_METRICS`
+    """
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    if names == {"all"}:
+        return AST_METRICS
+    unknown = names.difference(AST_METRICS)
+    if unknown or not names:
+        expected = ",".join(AST_METRICS)
+        raise ValueError(f"Invalid metrics {value!r}, expected all or a comma-separated list of {expected}")
+    return tuple(name for name in AST_METRICS if name in names)
+
+
+def measure_tree(tree: ast.Module, metrics: Collection[str] = AST_METRICS) -> dict[str, int]:
+    """
+    Count statements and compute AST metrics in a single traversal of a module.
+
+    Only statement lists are descended into, as when just counting
+    statements. The expressions of each statement are only visited when a
+    complexity metric is requested.
+
+    - functions, classes: number of function (including methods) and class definitions
+    - complexity, max_complexity: sum and maximum of the cyclomatic complexity of
+      every function, one plus its branches (`if`, `elif`, loops, `except`,
+      `case`, `assert`, conditional expressions, comprehension clauses and
+      every `and`/`or` operand after the first); nested functions are measured
+      separately
+    - max_nesting: maximum number of blocks a statement is nested in, where an
+      `elif` does not count as a block of its own
+    - docstring_lines: lines of module, class and function docstrings
+
+    Args:
+        tree: Parsed module
+        metrics: Names of the metrics to compute, from `AST_METRICS`
+
+    Returns:
+        Mapping of `statements` and the requested metrics to their values
+    """
+    complexity = "complexity" in metrics or "max_complexity" in metrics
+    docstrings = "docstring_lines" in metrics
+
+    statements = functions = classes = docstring_lines = max_nesting = 0
+    complexities: list[int] = []
+    # (node, nesting depth of the node, index of the innermost function in `complexities` or -1)
+    stack: list[tuple[ast.AST, int, int]] = [(tree, -1, -1)]
+    while stack:
+        node, depth, scope = stack.pop()
+        if isinstance(node, ast.stmt):
+            statements += 1
+            max_nesting = max(max_nesting, depth)
+        if complexity and scope >= 0:
+            complexities[scope] += _branches(node)
+
+        body_scope = scope
+        if isinstance(node, _FUNCTIONS):
+            functions += 1
+            body_scope = len(complexities)
+            complexities.append(1)
+        elif isinstance(node, ast.ClassDef):
+            classes += 1
+        if docstrings and isinstance(node, (*_FUNCTIONS, ast.ClassDef, ast.Module)):
+            docstring_lines += _docstring_lines(node)
+
+        for field in BODY_FIELDS:
+            children = getattr(node, field, None)
+            if not children:
+                continue
+            if field in ("handlers", "cases"):
+                # Clauses sit at the level of their statement, their bodies one level deeper
+                stack.extend((child, depth, body_scope) for child in children)
+            elif field == "orelse" and _is_elif(node, children):
+                stack.append((children[0], depth, body_scope))
+            else:
+                stack.extend((child, depth + 1, body_scope) for child in children)
+
+    values = {
+        "functions": functions,
+        "classes": classes,
+        "complexity": sum(complexities),
+        "max_complexity": max(complexities, default=0),
+        "max_nesting": max_nesting,
+        "docstring_lines": docstring_lines,
+    }
+    return {"statements": statements, **{name: values[name] for name in metrics}}
+
+
+def _branches(node: ast.AST) -> int:
+    """Count the branches a statement or clause adds, including those in its expressions."""
+    branches = 1 if isinstance(node, _BRANCHES) else 0
+    stack = [child for child in ast.iter_child_nodes(node) if not isinstance(child, (*_BLOCK_NODES, *_LEAVES))]
+    while stack:
+        child = stack.pop()
+        if isinstance(child, ast.BoolOp):
+            branches += len(child.values) - 1
+        elif isinstance(child, ast.IfExp):
+            branches += 1
+        elif isinstance(child, ast.comprehension):
+            branches += 1 + len(child.ifs)
+        stack.extend(grandchild for grandchild in ast.iter_child_nodes(child) if not isinstance(grandchild, _LEAVES))
+    return branches
+
+
+def _is_elif(node: ast.AST, orelse: list[ast.stmt]) -> bool:
+    """Check if the `else` branch of a statement is an `elif` clause."""
+    return (
+        isinstance(node, ast.If)
+        and len(orelse) == 1
+        and isinstance(orelse[0], ast.If)
+        and orelse[0].col_offset == node.col_offset
+    )
+
+
+def _docstring_lines(node: ast.Module | ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef) -> int:
+    """Count the lines of the docstring of a module, class or function."""
+    first = node.body[0] if node.body else None
+    if (
+        isinstance(first, ast.Expr)
+        and isinstance(first.value, ast.Constant)
+        and isinstance(first.value.value, str)
+        and first.end_lineno is not None
+    ):
+        return first.end_lineno - first.lineno + 1
+    return 0
@@ -0,0 +1,249 @@
+"""Synthetic corpus generator and per-phase benchmarks for pycole."""
+
+import ast
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from importlib import metadata
+from pathlib import Path
+
+from .analyzer import (
+    CodeMetrics,
+    analyze_directory,
+    analyze_file,
+    count_lines,
+    count_lines_bytes,
+    count_statements,
+    count_statements_and_code_lines,
+    count_statements_tokenize,
+    is_test_file,
+)
+from .astmetrics import measure_tree
+from .walker import iter_python_files
+
+# Share of blank lines in generated files
+BLANK_DENSITY = 0.1
+# Number of body lines per generated function
+FUNCTION_LENGTH = 20
+# Import time in microseconds that `pycole.cli` may add on top of click and the modules click imports
+STARTUP_BUDGET_US = 20_000
+
+
+@dataclass
+class CorpusSpec:
+    """Parameters of a synthetic corpus."""
+
+    files: int = 1000
+    lines: int = 200  # Mean lines per file; actual sizes vary between half and one and a half times this
+    comment_density: float = 0.15  # Share of comment-only lines
+    test_ratio: float = 0.3  # Share of test files
+    seed: int = 0
+
+
+def _generate_module(rng: random.Random, lines: int, comment_density: float) -> str:
+    """Generate a valid Python module of roughly `lines` lines."""
+    out = ['"""Generated module."""', "", "import os", ""]
+    function = 0
+    while len(out) < lines:
+        out += ["", f"def function_{function}(value, items):", f'    """Docstring of function {function}."""']
+        out.append("    result = value")
+        for i in range(FUNCTION_LENGTH):
+            roll = rng.random()
+            if roll < comment_density:
+                out.append(f"    # Comment {i} explaining the next step")
+            elif roll < comment_density + BLANK_DENSITY:
+                out.append("")
+            elif i % 5 == 0:
+                out += [f"    for item in items[:{i}]:", "        result += item"]
+            elif i % 7 == 0:
+                out += [f"    if result > {i}:", f"        result = os.path.join(str(result), '{i}')"]
+            else:
+                out.append(f"    result = f'{{result}}-{i}' if isinstance(result, str) else result + {i}")
+        out.append("    return result")
+        function += 1
+    return "\n".join(out) + "\n"
+
+
+def generate_corpus(root: Path, spec: CorpusSpec) -> list[Path]:
+    """
+    Deterministically generate a tree of Python files.
+
+    The same spec always produces byte-identical trees. Files are spread
+    over nested packages, and test files are placed in `tests` directories.
+
+    Args:
+        root: Directory to generate the corpus in
+        spec: Corpus parameters
+
+    Returns:
+        Paths of the generated files
+    """
+    rng = random.Random(spec.seed)
+    files = []
+    for index in range(spec.files):
+        package = root / f"package_{index % 10}" / f"module_group_{index // 100}"
+        if rng.random() < spec.test_ratio:
+            filepath = package / "tests" / f"test_module_{index}.py"
+        else:
+            filepath = package / f"module_{index}.py"
+        lines = max(1, int(spec.lines * rng.uniform(0.5, 1.5)))
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_text(_generate_module(rng, lines, spec.comment_density), encoding="utf-8")
+        files.append(filepath)
+    return files
+
+
+def _time(func: Callable[[], object], repeat: int) -> dict[str, float]:
+    """Time a callable, returning wall time statistics in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings), "max": max(timings)}
+
+
+def _version() -> str:
+    """Return the installed pycole version."""
+    try:
+        return metadata.version("pycole")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def run_benchmark(root: Path, repeat: int = 3, jobs: int = 1) -> dict:
+    """
+    Time each phase of the analysis of a tree separately.
+
+    Phases: walking the tree, reading files, counting lines (from decoded
+    text and from bytes), counting statements (with each statement counter),
+    counting statements together with every AST metric in one pass,
+    counting statements together with accurately classified code lines,
+    aggregating per-file metrics and the end-to-end `analyze_directory` run.
+
+    Args:
+        root: Directory to benchmark
+        repeat: Number of runs per phase; the minimum is the headline number
+        jobs: Number of worker processes for an additional parallel end-to-end run
+
+    Returns:
+        JSON-serializable benchmark results
+    """
+    files = list(iter_python_files(root))
+    raw = [filepath.read_bytes() for filepath in files]
+    contents = [data.decode("utf-8") for data in raw]
+    sources = [content for filepath, content in zip(files, contents) if not is_test_file(filepath)]
+    per_file = [analyze_file(filepath) for filepath in files]
+
+    def aggregate() -> CodeMetrics:
+        totals = CodeMetrics(0, 0, 0, 0, 0)
+        for metrics in per_file:
+            totals += metrics
+        return totals
+
+    phases = {
+        "walk": lambda: list(iter_python_files(root)),
+        "read": lambda: [filepath.read_bytes() for filepath in files],
+        "count_lines": lambda: [count_lines(content) for content in contents],
+        "count_lines_bytes": lambda: [count_lines_bytes(data) for data in raw],
+        "count_statements_ast": lambda: [count_statements(source) for source in sources],
+        "count_statements_tokenize": lambda: [count_statements_tokenize(source) for source in sources],
+        "ast_metrics": lambda: [measure_tree(ast.parse(source)) for source in sources],
+        "count_statements_and_code_lines": lambda: [count_statements_and_code_lines(source) for source in sources],
+        "aggregate": aggregate,
+        "analyze_directory": lambda: analyze_directory(root),
+    }
+    if jobs > 1:
+        phases[f"analyze_directory_jobs_{jobs}"] = lambda: analyze_directory(root, jobs=jobs)
+
+    totals = aggregate()
+    return {
+        "pycole": _version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "corpus": {
+            "files": len(files),
+            "bytes": sum(len(data) for data in raw),
+            "metrics": asdict(totals),
+        },
+        "phases": {name: _time(func, repeat) for name, func in phases.items()},
+    }
+
+
+def measure_import_time(module: str = "pycole.cli", preload: str = "click", repeat: int = 5) -> dict[str, int]:
+    """
+    Measure the import time of a module in fresh interpreters with `python -X importtime`.
+
+    `preload` is imported first, so its own imports are not attributed to
+    `module`. Bytecode is cached in a temporary directory and a first,
+    untimed run compiles it, so the timings do not include compilation.
+
+    Args:
+        module: Module to import
+        preload: Module imported before `module`, or an empty string
+        repeat: Number of timed runs; the minimum of each module is kept
+
+    Returns:
+        Mapping of every module imported after `preload` to its cumulative
+        import time in microseconds
+    """
+    statement = f"import {preload}; import {module}" if preload else f"import {module}"
+    with tempfile.TemporaryDirectory(prefix="pycole-pyc-") as pycache:
+        env = {**os.environ, "PYTHONPYCACHEPREFIX": pycache}
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        times: dict[str, int] = {}
+        for run in range(repeat + 1):
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", statement],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            if run == 0:
+                continue
+
+            lines = result.stderr.splitlines()
+            if preload:
+                # Everything up to and including the preloaded module belongs to it
+                end = next(index for index, line in enumerate(lines) if line.endswith(f"| {preload}"))
+                lines = lines[end + 1 :]
+            for line in lines:
+                if not line.startswith("import time:") or "|" not in line:
+                    continue
+                _, cumulative, name = line.split("|")
+                if cumulative.strip().isdigit():
+                    name = name.strip()
+                    times[name] = min(times.get(name, sys.maxsize), int(cumulative))
+    return times
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1) -> dict[str, float]:
+    """
+    Find phases that got slower than a baseline run.
+
+    Args:
+        baseline: Results of a previous `run_benchmark`
+        current: Results of the current `run_benchmark`
+        threshold: Relative slowdown of the minimum time that counts as a regression
+
+    Returns:
+        Mapping of regressed phase names to their slowdown ratio
+    """
+    regressions = {}
+    for name, timings in current["phases"].items():
+        base = baseline.get("phases", {}).get(name)
+        if base is None or base["min"] <= 0:
+            continue
+        ratio = timings["min"] / base["min"]
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
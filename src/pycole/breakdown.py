@@ -0,0 +1,99 @@
+"""Per-directory and per-package breakdown of metrics as an aggregation tree."""
+
+import os
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .analyzer import CodeMetrics
+
+
+@dataclass
+class BreakdownNode:
+    """Directory in a breakdown tree with the summed metrics of all files below it."""
+
+    path: Path
+    depth: int
+    package: bool = False  # The directory contains an `__init__.py`
+    files: int = 0
+    metrics: CodeMetrics = field(default_factory=lambda: CodeMetrics(0, 0, 0, 0, 0))
+    children: dict[str, "BreakdownNode"] = field(default_factory=dict)
+
+
+def parse_depth(value: str) -> int:
+    """
+    Parse a breakdown spec of the form `depth=N`.
+
+    Args:
+        value: Breakdown spec
+
+    Returns:
+        Maximum depth of the tree below the analyzed directory
+    """
+    key, _, depth = value.partition("=")
+    if key.strip() != "depth" or not depth.strip().isdigit():
+        raise ValueError(f"Invalid breakdown {value!r}, expected depth=N")
+    return int(depth)
+
+
+def build_breakdown(root: Path, results: Iterable[tuple[Path, CodeMetrics]], depth: int) -> BreakdownNode:
+    """
+    Aggregate per-file metrics into a tree of directories in a single pass.
+
+    Each file is added to the directory that contains it, or to its ancestor
+    at `depth` if it is nested deeper. Subtree totals are then summed bottom
+    up, so no directory is walked or analyzed twice.
+
+    Args:
+        root: Directory that was analyzed
+        results: `(filepath, metrics)` pairs of the files below `root`
+        depth: Maximum depth of the tree; 0 only keeps the root
+
+    Returns:
+        Root node of the tree
+    """
+    tree = BreakdownNode(root, 0)
+    prefix = os.path.join(str(root), "")
+    for filepath, metrics in results:
+        text = str(filepath)
+        relpath = text[len(prefix) :] if text.startswith(prefix) else str(filepath.relative_to(root))
+        parts = relpath.split(os.sep)
+        directories = parts[:-1][:depth]
+
+        node = tree
+        for name in directories:
+            child = node.children.get(name)
+            if child is None:
+                child = node.children[name] = BreakdownNode(node.path / name, node.depth + 1)
+            node = child
+        node.files += 1
+        node.metrics += metrics
+        if len(parts) <= depth + 1 and parts[-1] == "__init__.py":
+            node.package = True
+
+    _sum_subtrees(tree)
+    return tree
+
+
+def _sum_subtrees(tree: BreakdownNode) -> None:
+    """Add the totals of every node's children to the node, deepest nodes first."""
+    order = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(node.children.values())
+    # Parents come before their children in `order`
+    for node in reversed(order):
+        for child in node.children.values():
+            node.files += child.files
+            node.metrics += child.metrics
+
+
+def iter_breakdown(tree: BreakdownNode) -> Iterator[BreakdownNode]:
+    """Yield the nodes of a tree depth-first, with children sorted by name."""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children[name] for name in sorted(node.children, reverse=True))
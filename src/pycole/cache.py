@@ -0,0 +1,201 @@
+"""Persistent per-file metrics cache stored in a single SQLite database."""
+
+import hashlib
+import os
+import sqlite3
+from collections.abc import Callable, Container, Iterable, Iterator
+from dataclasses import astuple, fields
+from pathlib import Path
+
+from .analyzer import CodeMetrics
+
+DEFAULT_CACHE_DIR = ".pycole_cache"
+CACHE_FILENAME = "metrics.sqlite"
+# Bump whenever the analysis rules change so stale results are discarded
+CACHE_VERSION = 1
+
+# Number of cache misses handed to the analyzer at a time
+MISS_CHUNK_SIZE = 1024
+# Files held back at most while waiting for the misses before them, when misses are rare
+PENDING_LIMIT = 16 * MISS_CHUNK_SIZE
+
+METRIC_COLUMNS = tuple(field.name for field in fields(CodeMetrics))
+
+
+def file_digest(filepath: Path) -> bytes:
+    """Return a short content hash for a file, streamed in chunks; empty if it cannot be read."""
+    try:
+        with filepath.open("rb") as file:
+            return hashlib.file_digest(file, lambda: hashlib.blake2b(digest_size=16)).digest()
+    except OSError:
+        return b""
+
+
+class MetricsCache:
+    """
+    On-disk cache of per-file metrics keyed by path, mtime, size and content hash.
+
+    A file whose mtime and size are unchanged is served from the cache
+    without being read. A file whose stat changed but whose content hash
+    is unchanged (e.g. after a checkout) is served from the cache after a
+    read but without being analyzed.
+
+    Content hashes are stored lazily: new files are only read by the
+    analyzer, and get their hash the first time their stat changes, so
+    cold runs read every file once.
+    """
+
+    def __init__(self, cache_dir: Path, variant: str = ""):
+        """
+        Open or create a cache.
+
+        Args:
+            cache_dir: Directory holding the cache database
+            variant: Analysis settings the cached metrics depend on; entries
+                written with different settings are discarded
+        """
+        self._variant = variant
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(cache_dir / CACHE_FILENAME)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._ensure_schema()
+
+    def __enter__(self) -> "MetricsCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def _ensure_schema(self) -> None:
+        """Create the tables, discarding entries written by another cache version."""
+        version = f"{CACHE_VERSION}:{self._variant}:{','.join(METRIC_COLUMNS)}"
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != version:
+                self._conn.execute("DROP TABLE IF EXISTS files")
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+            metric_columns = ", ".join(f"{name} INTEGER NOT NULL" for name in METRIC_COLUMNS)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+                f"digest BLOB NOT NULL, {metric_columns}) WITHOUT ROWID"
+            )
+
+    def _load(self, prefix: str | None) -> dict[str, tuple]:
+        """Load cache rows, optionally restricted to paths starting with `prefix`."""
+        query = f"SELECT path, mtime_ns, size, digest, {', '.join(METRIC_COLUMNS)} FROM files"
+        if prefix is None:
+            rows = self._conn.execute(query)
+        else:
+            # Range scan on the primary key instead of LIKE, which cannot use the index
+            rows = self._conn.execute(f"{query} WHERE path >= ? AND path < ?", (prefix, prefix + "\U0010ffff"))
+        return {row[0]: row[1:] for row in rows}
+
+    def analyze_files(  # pylint: disable=too-many-locals
+        self,
+        files: Iterable[Path],
+        analyze: Callable[[list[Path]], Iterable[tuple[Path, CodeMetrics]]],
+        root: Path | None = None,
+        abandoned: Container[Path] = (),
+    ) -> Iterator[tuple[Path, CodeMetrics]]:
+        """
+        Yield metrics for files in input order, analyzing only those missing from the cache.
+
+        Misses are collected into chunks of `MISS_CHUNK_SIZE` files, so the
+        analyzer receives enough files at once to parallelize. Hits that come
+        after a miss wait for its chunk, at most `PENDING_LIMIT` files, so
+        memory stays bounded; hits before any miss are yielded immediately.
+
+        Args:
+            files: Python files to analyze
+            analyze: Function that analyzes a list of files, yielding
+                `(filepath, metrics)` pairs in order
+            root: Directory the files were discovered in; cache entries under it
+                for files that no longer exist are evicted
+            abandoned: Files whose analysis was abandoned once `analyze` yields
+                them, such as `FileLimits.abandoned`; their metrics are not stored
+
+        Returns:
+            Iterator of `(filepath, metrics)` pairs, one per file
+        """
+        prefix = None if root is None else os.path.join(os.path.abspath(root), "")
+        entries = self._load(prefix) if prefix is not None else {}
+        # Files in input order since the first miss, with their cached metrics or None for misses
+        pending: list[tuple[Path, CodeMetrics | None]] = []
+        misses: list[tuple[Path, str, int, int, bytes]] = []
+
+        for filepath in files:
+            key = os.path.abspath(filepath)
+            try:
+                stat = os.stat(key)
+            except OSError:
+                continue
+
+            metrics = None
+            entry = entries.pop(key, None) if prefix is not None else self._get(key)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                metrics = CodeMetrics(*entry[3:])
+            else:
+                # Only hash files with an entry to compare against; new files are stored without a hash
+                digest = b"" if entry is None else file_digest(filepath)
+                if digest and entry is not None and entry[2] == digest:
+                    with self._conn:
+                        self._conn.execute(
+                            "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                            (stat.st_mtime_ns, stat.st_size, key),
+                        )
+                    metrics = CodeMetrics(*entry[3:])
+                else:
+                    misses.append((filepath, key, stat.st_mtime_ns, stat.st_size, digest))
+
+            if metrics is not None and not misses:
+                yield filepath, metrics
+                continue
+            pending.append((filepath, metrics))
+            if len(misses) >= MISS_CHUNK_SIZE or len(pending) >= PENDING_LIMIT:
+                yield from self._analyze_misses(pending, misses, analyze, abandoned)
+                pending, misses = [], []
+
+        yield from self._analyze_misses(pending, misses, analyze, abandoned)
+
+        with self._conn:
+            if prefix is not None:
+                # Entries are popped as files are seen, so the remaining ones were deleted
+                deleted = [(key,) for key in entries]
+                self._conn.executemany("DELETE FROM files WHERE path = ?", deleted)
+
+    def _analyze_misses(
+        self,
+        pending: list[tuple[Path, CodeMetrics | None]],
+        misses: list[tuple[Path, str, int, int, bytes]],
+        analyze: Callable[[list[Path]], Iterable[tuple[Path, CodeMetrics]]],
+        abandoned: Container[Path],
+    ) -> Iterator[tuple[Path, CodeMetrics]]:
+        """Analyze files missing from the cache, store their metrics and yield the pending files in order."""
+        if not pending:
+            return
+        results = zip(misses, analyze([miss[0] for miss in misses]), strict=True)
+        rows = []
+        for filepath, metrics in pending:
+            if metrics is None:
+                (_, key, mtime_ns, size, digest), (filepath, metrics) = next(results)
+                if filepath not in abandoned:
+                    rows.append((key, mtime_ns, size, digest, *astuple(metrics)))
+            yield filepath, metrics
+
+        with self._conn:
+            placeholders = ", ".join("?" * (4 + len(METRIC_COLUMNS)))
+            self._conn.executemany(f"INSERT OR REPLACE INTO files VALUES ({placeholders})", rows)
+
+    def _get(self, key: str) -> tuple | None:
+        """Fetch a single cache row by path."""
+        return self._conn.execute(
+            f"SELECT mtime_ns, size, digest, {', '.join(METRIC_COLUMNS)} FROM files WHERE path = ?",
+            (key,),
+        ).fetchone()
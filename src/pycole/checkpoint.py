@@ -0,0 +1,166 @@
+"""Append-only checkpoint of per-file results, to resume an interrupted analysis."""
+
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Container, Iterable, Iterator
+from dataclasses import astuple
+from pathlib import Path
+
+from .analyzer import CodeMetrics
+from .cache import METRIC_COLUMNS
+
+CHECKPOINT_VERSION = 1
+# Seconds between flushes of new records to disk
+FLUSH_INTERVAL = 5.0
+
+
+class Checkpoint:
+    """
+    Append-only log of the metrics of every analyzed file.
+
+    Every record is one line holding the mtime, size and metrics of a file,
+    followed by its absolute path. Records are appended as files are
+    analyzed and flushed to disk every `flush_interval` seconds, so an
+    interrupted run loses at most that much work, and a partially written
+    last line is ignored. Files are discovered in a deterministic order, so
+    a restarted run walks the tree again and skips every file with a
+    record whose mtime and size are unchanged, which makes its totals
+    identical to those of an uninterrupted run.
+    """
+
+    def __init__(self, path: Path, variant: str = "", flush_interval: float = FLUSH_INTERVAL):
+        """
+        Open a checkpoint, loading the records of a previous run.
+
+        Args:
+            path: Checkpoint file; created if missing
+            variant: Analysis settings the recorded metrics depend on; a
+                checkpoint written with different settings is discarded
+            flush_interval: Seconds between flushes of new records to disk
+        """
+        self._flush_interval = flush_interval
+        self._header = f"pycole-checkpoint {CHECKPOINT_VERSION} {variant} {','.join(METRIC_COLUMNS)}\n"
+        self._records = self._load(path)
+        self.resumed = len(self._records)
+        self._file = path.open("a", encoding="utf-8", errors="surrogateescape")
+        if self._file.tell() == 0:
+            self._file.write(self._header)
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> "Checkpoint":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Flush the remaining records and close the file."""
+        if not self._file.closed:
+            self._flush()
+            self._file.close()
+
+    def _load(self, path: Path) -> dict[str, tuple[int, ...]]:
+        """Read the records of a previous run, discarding the file if it is corrupt or has other settings."""
+        try:
+            with path.open(encoding="utf-8", errors="surrogateescape", newline="\n") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return {}
+        if not lines or lines[0] != self._header:
+            path.unlink()
+            return {}
+
+        records = {}
+        fields = 2 + len(METRIC_COLUMNS)
+        for line in lines[1:]:
+            if not line.endswith("\n"):
+                # Cut off by an interruption: drop the fragment so the next record starts on a new line
+                os.truncate(path, path.stat().st_size - len(line.encode("utf-8", "surrogateescape")))
+                break
+            *values, key = line[:-1].split(" ", fields)
+            try:
+                record = tuple(map(int, values))
+            except ValueError:
+                record = ()
+            if len(record) != fields:
+                # A corrupted record: start over rather than trust the records around it
+                path.unlink()
+                return {}
+            records[key] = record
+        if len(lines) - 1 > 2 * len(records):
+            # Files changed between runs were recorded more than once, so keep only the latest records
+            with path.open("w", encoding="utf-8", errors="surrogateescape") as file:
+                file.write(self._header)
+                file.writelines(_format_record(key, record) for key, record in records.items())
+        return records
+
+    def _flush(self) -> None:
+        """Write buffered records to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def analyze_files(
+        self,
+        files: Iterable[Path],
+        analyze: Callable[[Iterable[Path]], Iterable[tuple[Path, CodeMetrics]]],
+        abandoned: Container[Path] = (),
+    ) -> Iterator[tuple[Path, CodeMetrics]]:
+        """
+        Yield metrics for files in input order, analyzing only those without a current record.
+
+        Args:
+            files: Python files to analyze
+            analyze: Function that analyzes files, yielding `(filepath, metrics)` pairs in order
+            abandoned: Files whose analysis was abandoned once `analyze` yields
+                them, such as `FileLimits.abandoned`; they are not recorded
+
+        Returns:
+            Iterator of `(filepath, metrics)` pairs, one per file
+        """
+        # Files in input order with their recorded metrics, or the stat key to record them under once analyzed
+        queue: deque[tuple[Path, CodeMetrics | None, tuple[str, int, int] | None]] = deque()
+
+        def unrecorded() -> Iterator[Path]:
+            for filepath in files:
+                key = os.path.abspath(filepath)
+                try:
+                    stat = os.stat(key)
+                except OSError:
+                    stat = None
+                if stat is None:
+                    # Files that cannot be stat'ed are analyzed but not recorded
+                    queue.append((filepath, None, None))
+                    yield filepath
+                    continue
+                record = self._records.get(key)
+                if record is not None and record[:2] == (stat.st_mtime_ns, stat.st_size):
+                    queue.append((filepath, CodeMetrics(*record[2:]), None))
+                    continue
+                # Paths that would break the line format are not recorded either
+                queue.append((filepath, None, (key, stat.st_mtime_ns, stat.st_size) if "\n" not in key else None))
+                yield filepath
+
+        for filepath, metrics in analyze(unrecorded()):
+            while (recorded := queue[0][1]) is not None:
+                yield queue.popleft()[0], recorded
+            stat_key = queue.popleft()[2]
+            if stat_key is not None and filepath not in abandoned:
+                self._record(*stat_key, metrics)
+            yield filepath, metrics
+        # Every file left has a record
+        yield from ((recorded_path, recorded) for recorded_path, recorded, _ in queue if recorded is not None)
+
+    def _record(self, key: str, mtime_ns: int, size: int, metrics: CodeMetrics) -> None:
+        """Append the record of an analyzed file, flushing periodically."""
+        record = (mtime_ns, size, *astuple(metrics))
+        self._records[key] = record
+        self._file.write(_format_record(key, record))
+        if time.monotonic() - self._last_flush >= self._flush_interval:
+            self._flush()
+
+
+def _format_record(key: str, record: tuple[int, ...]) -> str:
+    """Format a record as a line of space-separated values followed by the path."""
+    return f"{' '.join(map(str, record))} {key}\n"
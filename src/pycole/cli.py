@@ -1,33 +1,459 @@
-"""Command-line interface for pycole."""
+"""
+Command-line interface for pycole.
+
+Only click and the analyzer are imported at startup. Everything else, such
+as the formatter, cache, process pool and benchmark modules, is imported by
+the code paths that use it, so short runs (e.g. from pre-commit hooks on a
+handful of files) do not pay for features they do not use.
+"""
 
 import sys
+from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
+from typing import TYPE_CHECKING, TextIO, TypedDict
 
 import click
 
-from .analyzer import analyze_path
-from .formatter import format_metrics_output
+from .analyzer import (
+    LINE_MODES,
+    MMAP_THRESHOLD,
+    STATEMENT_COUNTERS,
+    CodeMetrics,
+    analyze_path,
+    analyze_paths,
+    iter_file_metrics,
+)
+
+if TYPE_CHECKING:
+    from .cache import MetricsCache
+    from .checkpoint import Checkpoint
+    from .dedup import Deduplicator
+    from .limits import FileLimits
+    from .profiling import Profiler
+    from .watch import WatchUpdate
+
+# Same as `pycole.cache.DEFAULT_CACHE_DIR`, which is not imported at startup
+DEFAULT_CACHE_DIR = ".pycole_cache"
+
+
+class _AnalysisOptions(TypedDict):
+    """Keyword arguments shared by `analyze_path`, `analyze_paths` and `iter_file_metrics`."""
+
+    jobs: int
+    exclude: tuple[str, ...]
+    cache: "MetricsCache | None"
+    checkpoint: "Checkpoint | None"
+    dedup: "Deduplicator | None"
+    limits: "FileLimits | None"
+    profiler: "Profiler | None"
+    statement_mode: str
+    mmap_threshold: int
+    io_threads: int
+    ast_metrics: tuple[str, ...]
+    line_mode: str
+    use_ignore_files: bool
+
+
+class DefaultCommandGroup(click.Group):
+    """Command group that runs a default command when no subcommand is named."""
+
+    def __init__(self, *args, default_command: str = "analyze", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if args and args[0] not in self.commands and args[0] not in ctx.help_option_names:
+            args = [self.default_command, *args]
+        elif not args:
+            args = [self.default_command]
+        return super().parse_args(ctx, args)
 
 
-@click.command()
-@click.argument("path", type=click.Path(exists=True, path_type=Path))
+@click.group(cls=DefaultCommandGroup)
+def main():
+    """
+    Python code length analyzer.
+
+    Runs the analyze command unless another command is named, so
+    `pycole PATH` is the same as `pycole analyze PATH`. A path named like
+    a command must be given as `pycole analyze PATH` or `pycole ./PATH`.
+    """
+
+
+@main.command()
+@click.argument("paths", nargs=-1, type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--paths-from",
+    type=click.File("r", encoding="utf-8"),
+    default=None,
+    metavar="FILE",
+    help="Also analyze the paths listed in FILE, one per line ('-' reads standard input)",
+)
 @click.option(
     "--format",
     "output_format",
-    type=click.Choice(["text", "csv"], case_sensitive=False),
+    type=click.Choice(["text", "csv", "jsonl"], case_sensitive=False),
     default="text",
-    help="Output format (text or csv)",
+    help="Output format (text, csv or jsonl)",
+)
+@click.option(
+    "--per-file",
+    is_flag=True,
+    help="Stream one record per file as it is analyzed, followed by the total",
+)
+@click.option(
+    "--breakdown",
+    metavar="depth=N",
+    default=None,
+    callback=lambda ctx, param, value: _parse_breakdown(value),
+    help="Report the summed metrics of every directory down to N levels below PATH",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of worker processes (default: CPU count)",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    metavar="PATTERN",
+    help="Glob pattern for files or directories to skip (can be repeated)",
+)
+@click.option(
+    "--no-ignore",
+    is_flag=True,
+    help="Do not skip what .gitignore and .ignore files and the [tool.pycole] exclude list of pyproject.toml ignore",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    is_flag=False,
+    flag_value=DEFAULT_CACHE_DIR,
+    default=None,
+    help=f"Cache per-file results between runs in this directory (default: {DEFAULT_CACHE_DIR})",
+)
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    metavar="FILE",
+    help="Record per-file results in this file as they are computed, so that a rerun after an interruption "
+    "skips the files already analyzed",
+)
+@click.option(
+    "--max-file-size",
+    type=click.IntRange(min=0),
+    default=None,
+    metavar="BYTES",
+    help="Only count the lines of files larger than this, without parsing them, and list them on stderr",
+)
+@click.option(
+    "--file-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    metavar="SECONDS",
+    help="Analyze files in worker processes that are killed when a file takes longer than this; such files "
+    "only get their lines counted and are listed on stderr",
+)
+@click.option(
+    "--no-dedup",
+    is_flag=True,
+    help="Analyze every copy of byte-identical files instead of reusing the metrics of the first one",
+)
+@click.option(
+    "--duplicates",
+    is_flag=True,
+    help="Print the groups of byte-identical files and the bytes not analyzed again to stderr "
+    "(files served by --cache-dir or --checkpoint are not hashed)",
+)
+@click.option(
+    "--daemon",
+    is_flag=True,
+    help="Ask a running `pycole serve` daemon for the metrics, analyzing in-process if none is running",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Socket of the daemon for --daemon (default: pycole.sock in $XDG_RUNTIME_DIR or the temporary directory)",
 )
-def main(path: Path, output_format: str):
+@click.option(
+    "--statement-mode",
+    type=click.Choice(list(STATEMENT_COUNTERS), case_sensitive=False),
+    default="ast",
+    help="Count statements by parsing the AST or from the token stream (faster, no AST)",
+)
+@click.option(
+    "--line-mode",
+    type=click.Choice(LINE_MODES, case_sensitive=False),
+    default="fast",
+    help="Classify code lines by their first character, or from the token stream (accurate: docstrings, "
+    "string-only statements and lines inside strings are classified correctly; statements are then also "
+    "counted from the tokens)",
+)
+@click.option(
+    "--metrics",
+    "ast_metrics",
+    metavar="LIST",
+    default=None,
+    callback=lambda ctx, param, value: _parse_metrics(value),
+    help="Also report these AST metrics, computed in the same pass as the statements: all or a comma-separated "
+    "list of functions, classes, complexity, max_complexity, max_nesting, docstring_lines",
+)
+@click.option(
+    "--mmap-threshold",
+    type=click.IntRange(min=0),
+    default=MMAP_THRESHOLD,
+    show_default=True,
+    metavar="BYTES",
+    help="Memory-map files of at least this size instead of reading them into memory (0 disables)",
+)
+@click.option(
+    "--io-threads",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    metavar="N",
+    help="Read files ahead in N threads while parsing, for slow or network filesystems (0 disables)",
+)
+@click.option(
+    "--since",
+    metavar="REV",
+    default=None,
+    help="Only analyze files changed since a git revision and report the delta "
+    "(with --cache-dir, also the totals before and after)",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and print updated metrics whenever files change",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.01),
+    default=0.5,
+    show_default=True,
+    help="Seconds between change checks in watch mode",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print per-phase timings, counters and the slowest files to stderr",
+)
+@click.option(
+    "--profile-json",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write the profiling report as JSON to this file",
+)
+def analyze(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,too-many-branches
+    paths: tuple[Path, ...],
+    paths_from: TextIO | None,
+    output_format: str,
+    per_file: bool,
+    breakdown: int | None,
+    jobs: int | None,
+    exclude: tuple[str, ...],
+    no_ignore: bool,
+    cache_dir: Path | None,
+    checkpoint: Path | None,
+    max_file_size: int | None,
+    file_timeout: float | None,
+    no_dedup: bool,
+    duplicates: bool,
+    daemon: bool,
+    socket_path: Path | None,
+    statement_mode: str,
+    line_mode: str,
+    ast_metrics: tuple[str, ...],
+    mmap_threshold: int,
+    io_threads: int,
+    since: str | None,
+    watch: bool,
+    interval: float,
+    profile: bool,
+    profile_json: Path | None,
+):
     """
-    Analyze Python code metrics for a file or directory.
+    Analyze Python code metrics for files or directories.
 
-    PATH: Path to a Python file or directory to analyze
+    PATHS: Python files or directories to analyze. With several paths (or
+    --paths-from), they are analyzed in one run and reported separately,
+    followed by the grand total; files reachable from more than one path
+    are counted once.
     """
+    if paths_from is not None:
+        paths = (*paths, *_read_paths(paths_from))
+    if not paths:
+        raise click.UsageError("Missing argument 'PATHS...'")
+    multiple = len(paths) > 1 or paths_from is not None
+    if multiple and (since is not None or per_file or watch or breakdown is not None):
+        raise click.UsageError("Multiple paths cannot be combined with --since, --per-file, --watch or --breakdown")
+    path = paths[0]
+    if since is not None and per_file:
+        raise click.UsageError("--per-file cannot be combined with --since")
+    if watch and (since is not None or per_file or cache_dir is not None):
+        raise click.UsageError("--watch cannot be combined with --since, --per-file or --cache-dir")
+    if checkpoint is not None and (watch or since is not None):
+        raise click.UsageError("--checkpoint cannot be combined with --watch or --since")
+    if watch and not path.is_dir():
+        raise click.UsageError("--watch requires a directory")
+    if breakdown is not None and (since is not None or per_file or watch):
+        raise click.UsageError("--breakdown cannot be combined with --since, --per-file or --watch")
+    if breakdown is not None and not path.is_dir():
+        raise click.UsageError("--breakdown requires a directory")
+    if ast_metrics and (watch or since is not None):
+        raise click.UsageError("--metrics cannot be combined with --watch or --since")
+    profiler = None
+    if profile or profile_json is not None:
+        from .profiling import Profiler  # pylint: disable=import-outside-toplevel
+
+        profiler = Profiler()
+    if profiler is not None and (watch or since is not None):
+        raise click.UsageError("--profile and --profile-json cannot be combined with --watch or --since")
+    if duplicates and (no_dedup or watch or since is not None or daemon):
+        raise click.UsageError("--duplicates cannot be combined with --no-dedup, --watch, --since or --daemon")
+    limited = max_file_size is not None or file_timeout is not None
+    if limited and (watch or since is not None or daemon):
+        raise click.UsageError(
+            "--max-file-size and --file-timeout cannot be combined with --watch, --since or --daemon"
+        )
+    if file_timeout is not None and profiler is not None:
+        raise click.UsageError("--file-timeout cannot be combined with --profile or --profile-json")
+    if daemon and (watch or since is not None or per_file or breakdown is not None):
+        raise click.UsageError("--daemon cannot be combined with --watch, --since, --per-file or --breakdown")
+    if daemon and (cache_dir is not None or checkpoint is not None or profiler is not None):
+        raise click.UsageError("--daemon cannot be combined with --cache-dir, --checkpoint or --profile")
+    if daemon:
+        remote = _analyze_with_daemon(
+            socket_path,
+            paths,
+            exclude=exclude,
+            statement_mode=statement_mode,
+            ast_metrics=ast_metrics,
+            line_mode=line_mode,
+            use_ignore_files=not no_ignore,
+        )
+        if remote is not None:
+            from .formatter import format_metrics_output, format_paths_output  # pylint: disable=import-outside-toplevel
+
+            if multiple:
+                click.echo(format_paths_output(remote, output_format, ast_metrics))
+            else:
+                click.echo(format_metrics_output(path, remote[0][1], output_format, ast_metrics))
+            return
+
+    # pylint: disable=import-outside-toplevel
+    from .parallel import default_jobs
+
     try:
-        metrics = analyze_path(path)
-        output = format_metrics_output(path, metrics, output_format)
-        click.echo(output)
+        variant = ",".join((statement_mode, line_mode, *ast_metrics))
+        limits = None
+        if limited:
+            from .limits import FileLimits
+
+            limits = FileLimits(max_file_size, file_timeout, mmap_threshold)
+        cache_context: AbstractContextManager[MetricsCache | None] = nullcontext()
+        if cache_dir is not None:
+            from .cache import MetricsCache
+
+            cache_context = MetricsCache(cache_dir, variant=variant)
+        checkpoint_context: AbstractContextManager[Checkpoint | None] = nullcontext()
+        if checkpoint is not None:
+            from .checkpoint import Checkpoint
+
+            checkpoint_context = Checkpoint(checkpoint, variant=variant)
+        dedup = None
+        if not no_dedup and (multiple or path.is_dir()):
+            from .dedup import Deduplicator
+
+            dedup = Deduplicator(report=duplicates)
+        with cache_context as cache, checkpoint_context as checkpoint_log:
+            if checkpoint_log is not None and checkpoint_log.resumed:
+                click.echo(f"Resuming from {checkpoint}: {checkpoint_log.resumed} files already analyzed", err=True)
+            options = _AnalysisOptions(
+                jobs=jobs or default_jobs(),
+                exclude=exclude,
+                cache=cache,
+                checkpoint=checkpoint_log,
+                dedup=dedup,
+                limits=limits,
+                profiler=profiler,
+                statement_mode=statement_mode,
+                mmap_threshold=mmap_threshold,
+                io_threads=io_threads,
+                ast_metrics=ast_metrics,
+                line_mode=line_mode,
+                use_ignore_files=not no_ignore,
+            )
+            if multiple:
+                results = analyze_paths(paths, **options)
+                with _phase(profiler, "format"):
+                    from .formatter import format_paths_output
+
+                    click.echo(format_paths_output(results, output_format, ast_metrics))
+            elif watch:
+                _watch(path, output_format, interval, options)
+            elif since is not None:
+                # Unchanged files come from the cache, so the totals cost little extra
+                from .formatter import format_diff_output
+                from .gitdiff import analyze_since
+
+                totals = analyze_path(path, **options) if cache is not None else None
+                diff = analyze_since(
+                    path,
+                    since,
+                    exclude=exclude,
+                    statement_mode=statement_mode,
+                    totals=totals,
+                    line_mode=line_mode,
+                    use_ignore_files=not no_ignore,
+                )
+                click.echo(format_diff_output(path, diff, output_format))
+            elif breakdown is not None:
+                from .breakdown import build_breakdown
+                from .formatter import format_breakdown_output
+
+                tree = build_breakdown(path, iter_file_metrics(path, **options), breakdown)
+                with _phase(profiler, "format"):
+                    click.echo(format_breakdown_output(tree, output_format, ast_metrics))
+            elif per_file:
+                from .formatter import iter_per_file_output
+
+                file_metrics = iter_file_metrics(path, **options)
+                for output in iter_per_file_output(path, file_metrics, output_format, ast_metrics):
+                    with _phase(profiler, "format"):
+                        click.echo(output)
+            else:
+                metrics = analyze_path(path, **options)
+                with _phase(profiler, "format"):
+                    from .formatter import format_metrics_output
+
+                    click.echo(format_metrics_output(path, metrics, output_format, ast_metrics))
+
+        if limits is not None and limits.skipped:
+            from .formatter import format_skipped_report
+
+            click.echo(format_skipped_report(limits.skipped), err=True)
+
+        if duplicates and dedup is not None:
+            from .formatter import format_duplicates_report
+
+            click.echo(format_duplicates_report(dedup), err=True)
+
+        if profiler is not None:
+            import json
+
+            from .formatter import format_profile_report
+
+            report = profiler.report()
+            if profile:
+                click.echo(format_profile_report(report), err=True)
+            if profile_json is not None:
+                profile_json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
 
     except ValueError as e:
         click.echo(f"Error: {e}", err=True)
@@ -37,5 +463,318 @@ def main(path: Path, output_format: str):
         sys.exit(1)
 
 
+def _analyze_with_daemon(
+    socket_path: Path | None, paths: tuple[Path, ...], **options
+) -> list[tuple[Path, CodeMetrics]] | None:
+    """Analyze paths with a running daemon, or return None if no daemon answers."""
+    from .server import analyze_paths_remote, default_socket_path  # pylint: disable=import-outside-toplevel
+
+    try:
+        return analyze_paths_remote(socket_path or default_socket_path(), paths, **options)
+    except OSError:
+        return None
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
+def _read_paths(file: TextIO) -> list[Path]:
+    """Read the paths listed in a file, skipping blank lines and `#` comments."""
+    paths = []
+    for line in file:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        path = Path(line)
+        if not path.exists():
+            raise click.BadParameter(f"Path '{line}' does not exist.", param_hint="'--paths-from'")
+        paths.append(path)
+    return paths
+
+
+def _parse_metrics(value: str | None) -> tuple[str, ...]:
+    """Parse the --metrics option into AST metric names."""
+    if value is None:
+        return ()
+    from .astmetrics import parse_metrics  # pylint: disable=import-outside-toplevel
+
+    try:
+        return parse_metrics(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+
+
+def _parse_breakdown(value: str | None) -> int | None:
+    """Parse the --breakdown option into a depth."""
+    if value is None:
+        return None
+    from .breakdown import parse_depth  # pylint: disable=import-outside-toplevel
+
+    try:
+        return parse_depth(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+
+
+def _phase(profiler: "Profiler | None", name: str):
+    """Measure a block with the profiler, if profiling."""
+    return nullcontext() if profiler is None else profiler.phase(name)
+
+
+def _watch(path: Path, output_format: str, interval: float, options: _AnalysisOptions) -> None:
+    """Print the metrics of a directory, then print updates until interrupted."""
+    # pylint: disable=import-outside-toplevel
+    from .formatter import format_metrics_output
+    from .watch import TreeWatcher
+
+    watcher = TreeWatcher(
+        path,
+        exclude=options["exclude"],
+        jobs=options["jobs"],
+        statement_mode=options["statement_mode"],
+        line_mode=options["line_mode"],
+        use_ignore_files=options["use_ignore_files"],
+    )
+    click.echo(format_metrics_output(path, watcher.start(), output_format))
+
+    def on_update(update: "WatchUpdate") -> None:
+        click.echo(format_metrics_output(path, update.totals, output_format))
+        click.echo(
+            f"{len(update.changed)} changed, {len(update.removed)} removed; "
+            f"re-analyzed in {update.elapsed * 1000:.1f} ms, "
+            f"{update.latency * 1000:.1f} ms after the first change was detected",
+            err=True,
+        )
+
+    try:
+        watcher.run(on_update, interval=interval)
+    except KeyboardInterrupt:
+        pass
+
+
+@main.command()
+@click.argument("path", default=".", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--revs",
+    required=True,
+    metavar="RANGE",
+    help="Commits to analyze, in git rev-list syntax (e.g. v1.0..main, or HEAD with --max-count)",
+)
+@click.option(
+    "--max-count",
+    type=click.IntRange(min=1),
+    default=None,
+    metavar="N",
+    help="Only analyze the N newest commits of the range",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "csv", "jsonl"], case_sensitive=False),
+    default="text",
+    help="Output format",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of worker processes analyzing file versions (defaults to the CPU count)",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    metavar="PATTERN",
+    help="Glob pattern for files or directories to skip (can be repeated)",
+)
+@click.option(
+    "--no-ignore",
+    is_flag=True,
+    help="Do not skip what .gitignore and .ignore files and the [tool.pycole] exclude list of pyproject.toml ignore",
+)
+@click.option(
+    "--statement-mode",
+    type=click.Choice(list(STATEMENT_COUNTERS), case_sensitive=False),
+    default="ast",
+    help="Count statements by parsing the AST or from the token stream (faster, no AST)",
+)
+@click.option(
+    "--line-mode",
+    type=click.Choice(LINE_MODES, case_sensitive=False),
+    default="fast",
+    help="Classify code lines by their first character, or from the token stream",
+)
+def history(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    path: Path,
+    revs: str,
+    max_count: int | None,
+    output_format: str,
+    jobs: int | None,
+    exclude: tuple[str, ...],
+    no_ignore: bool,
+    statement_mode: str,
+    line_mode: str,
+):
+    """
+    Report the metrics of PATH at every commit of a revision range.
+
+    Revisions are read from the local git object store without checking
+    them out, and every distinct file version is analyzed only once.
+    PATH defaults to the current directory.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .formatter import format_history_output
+    from .history import analyze_history
+    from .parallel import default_jobs
+
+    try:
+        revisions = analyze_history(
+            path,
+            revs,
+            max_count=max_count,
+            jobs=jobs or default_jobs(),
+            exclude=exclude,
+            statement_mode=statement_mode,
+            line_mode=line_mode,
+            use_ignore_files=not no_ignore,
+        )
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    click.echo(format_history_output(path, revisions, output_format))
+
+
+@main.command()
+@click.option("--files", type=click.IntRange(min=1), default=1000, show_default=True, help="Number of files")
+@click.option("--lines", type=click.IntRange(min=1), default=200, show_default=True, help="Mean lines per file")
+@click.option(
+    "--comment-density",
+    type=click.FloatRange(0, 0.9),
+    default=0.15,
+    show_default=True,
+    help="Share of comment-only lines",
+)
+@click.option(
+    "--test-ratio", type=click.FloatRange(0, 1), default=0.3, show_default=True, help="Share of test files"
+)
+@click.option("--seed", type=int, default=0, show_default=True, help="Seed of the corpus generator")
+@click.option("--repeat", type=click.IntRange(min=1), default=3, show_default=True, help="Runs per phase")
+@click.option(
+    "-j", "--jobs", type=click.IntRange(min=1), default=1, show_default=True, help="Workers for a parallel run"
+)
+@click.option(
+    "--corpus-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Generate the corpus here and keep it (default: a temporary directory)",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write the JSON results to this file instead of stdout",
+)
+@click.option(
+    "--compare",
+    "baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Exit with status 1 if a phase is slower than in these JSON results",
+)
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0),
+    default=0.1,
+    show_default=True,
+    help="Relative slowdown that counts as a regression with --compare",
+)
+def bench(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    files: int,
+    lines: int,
+    comment_density: float,
+    test_ratio: float,
+    seed: int,
+    repeat: int,
+    jobs: int,
+    corpus_dir: Path | None,
+    output: Path | None,
+    baseline: Path | None,
+    threshold: float,
+):
+    """
+    Benchmark pycole on a deterministic synthetic corpus.
+
+    Times walking, reading, line counting, statement counting, aggregation
+    and the end-to-end analysis separately and prints the results as JSON.
+    """
+    # pylint: disable=import-outside-toplevel
+    import json
+    import tempfile
+    from dataclasses import asdict
+
+    from .bench import CorpusSpec, compare_results, generate_corpus, run_benchmark
+
+    spec = CorpusSpec(files=files, lines=lines, comment_density=comment_density, test_ratio=test_ratio, seed=seed)
+    with tempfile.TemporaryDirectory(prefix="pycole-bench-") as tmpdir:
+        root = corpus_dir or Path(tmpdir)
+        generate_corpus(root, spec)
+        results = run_benchmark(root, repeat=repeat, jobs=jobs)
+    results["corpus"]["spec"] = asdict(spec)
+
+    report = json.dumps(results, indent=2)
+    if output is None:
+        click.echo(report)
+    else:
+        output.write_text(report + "\n", encoding="utf-8")
+
+    if baseline is not None:
+        regressions = compare_results(json.loads(baseline.read_text(encoding="utf-8")), results, threshold)
+        for phase, ratio in regressions.items():
+            click.echo(f"Regression: {phase} is {ratio:.2f}x slower than the baseline", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+@main.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Socket to listen on (default: pycole.sock in $XDG_RUNTIME_DIR or the temporary directory)",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of worker processes for requests with many changed files",
+)
+def serve(socket_path: Path | None, jobs: int):
+    """
+    Run a daemon answering analysis requests on a Unix domain socket.
+
+    The daemon keeps per-file metrics in memory, so `pycole --daemon`
+    only analyzes the files that changed since its previous request.
+    It runs until interrupted.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .server import AnalysisServer, default_socket_path
+
+    socket_path = socket_path or default_socket_path()
+    try:
+        server = AnalysisServer(socket_path, jobs)
+    except (ValueError, OSError) as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    with server:
+        click.echo(f"Listening on {socket_path}", err=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
 if __name__ == "__main__":
     main()  # pylint: disable=no-value-for-parameter
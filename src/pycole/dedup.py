@@ -0,0 +1,159 @@
+"""Reuse of the metrics of byte-identical files within a run."""
+
+import hashlib
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .analyzer import CodeMetrics, is_test_file
+
+if TYPE_CHECKING:
+    from .limits import FileLimits
+
+# Bytes of the BLAKE2b digests identifying file contents
+DIGEST_SIZE = 16
+
+
+@dataclass
+class DuplicateGroup:
+    """Files with identical contents."""
+
+    size: int
+    files: list[Path] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class _Entry:
+    """A file of the input, with its metrics once analyzed, or the entry of an earlier file it is a copy of."""
+
+    path: Path
+    metrics: CodeMetrics | None = None
+    original: "_Entry | None" = None
+
+
+def _reused(copy: _Entry, limits: "FileLimits | None") -> tuple[Path, CodeMetrics]:
+    """Pair a copy with the metrics of its original, which comes earlier in input order and is analyzed first."""
+    assert copy.original is not None and copy.original.metrics is not None
+    if limits is not None and (reason := limits.abandoned.get(copy.original.path)) is not None:
+        # The copy shares the line-only metrics of an original whose analysis was abandoned
+        limits.abandon(copy.path, reason)
+    return copy.path, copy.original.metrics
+
+
+def _digest(filepath: Path) -> bytes | None:
+    """Return the BLAKE2b digest of the contents of a file, or None if it cannot be read."""
+    try:
+        with filepath.open("rb") as file:
+            return hashlib.file_digest(file, lambda: hashlib.blake2b(digest_size=DIGEST_SIZE)).digest()
+    except OSError:
+        return None
+
+
+class Deduplicator:
+    """
+    Analyze each distinct file content once per run and reuse its metrics for the copies.
+
+    Only files sharing their size with another file are hashed, so most
+    files of a tree without copies only cost a `stat`: the first file of a
+    size is hashed once a second one shows up. Metrics depend on whether a
+    file is a test file, so a content found at both a test and a non-test
+    path is analyzed once as each.
+    """
+
+    def __init__(self, report: bool = False) -> None:
+        """
+        Create a deduplicator for one run.
+
+        Args:
+            report: Whether to record the paths of every hashed file for `duplicate_groups`
+        """
+        self.report = report
+        # Entry of the only file of every size so far, or None once the files of a size are hashed
+        self._sizes: dict[int, _Entry | None] = {}
+        # Entry of the first file with every (is_test, digest)
+        self._originals: dict[tuple[bool, bytes], _Entry] = {}
+        self._groups: dict[bytes, DuplicateGroup] = {}
+        self.files_hashed = 0
+        self.files_reused = 0
+        self.bytes_reused = 0
+
+    def analyze_files(
+        self,
+        files: Iterable[Path],
+        analyze: Callable[[Iterable[Path]], Iterable[tuple[Path, CodeMetrics]]],
+        limits: "FileLimits | None" = None,
+    ) -> Iterator[tuple[Path, CodeMetrics]]:
+        """
+        Yield metrics for files in input order, analyzing only the first file with each content.
+
+        Args:
+            files: Python files to analyze
+            analyze: Function that analyzes files, yielding `(filepath, metrics)` pairs in order
+            limits: Limits of the run, where copies of files whose analysis was abandoned are recorded too
+
+        Returns:
+            Iterator of `(filepath, metrics)` pairs, one per file
+        """
+        # Analyzed files get their metrics once `analyze` yields them, and copies
+        # point to the entry of the earlier file they share their content with
+        queue: deque[_Entry] = deque()
+
+        def originals() -> Iterator[Path]:
+            for filepath in files:
+                entry = _Entry(filepath)
+                entry.original = self._find_original(entry)
+                queue.append(entry)
+                if entry.original is None:
+                    yield filepath
+
+        for filepath, metrics in analyze(originals()):
+            while queue[0].original is not None:
+                yield _reused(queue.popleft(), limits)
+            queue.popleft().metrics = metrics
+            yield filepath, metrics
+        for copy in queue:
+            yield _reused(copy, limits)
+
+    def duplicate_groups(self) -> list[DuplicateGroup]:
+        """
+        Return the groups of files with identical contents.
+
+        Returns:
+            Groups of at least two files, the ones whose copies weigh the most
+            first; empty unless the deduplicator was created with `report=True`
+        """
+        groups = [group for group in self._groups.values() if len(group.files) > 1]
+        return sorted(groups, key=lambda group: group.size * (len(group.files) - 1), reverse=True)
+
+    def _find_original(self, entry: _Entry) -> _Entry | None:
+        """Return the entry of an earlier file with the same content and test status, registering new contents."""
+        try:
+            size = os.stat(entry.path).st_size
+        except OSError:
+            return None
+        if size not in self._sizes:
+            self._sizes[size] = entry
+            return None
+        first = self._sizes[size]
+        if first is not None:
+            self._sizes[size] = None
+            self._register(first, size)
+        original = self._register(entry, size)
+        if original is None or original is entry:
+            return None
+        self.files_reused += 1
+        self.bytes_reused += size
+        return original
+
+    def _register(self, entry: _Entry, size: int) -> _Entry | None:
+        """Hash the content of a file and return the entry of the first file with it, or None if it is unreadable."""
+        digest = _digest(entry.path)
+        if digest is None:
+            return None
+        self.files_hashed += 1
+        if self.report:
+            self._groups.setdefault(digest, DuplicateGroup(size)).files.append(entry.path)
+        return self._originals.setdefault((is_test_file(entry.path), digest), entry)
@@ -1,22 +1,65 @@
 """Formatting utilities for pycole metrics output."""
 
+import csv
+import io
+import json
+import time
+from collections.abc import Iterable, Iterator, Sequence
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+from .analyzer import CodeMetrics
 
-def format_metrics_output(path: Path, metrics, output_format: str = "text") -> str:
+if TYPE_CHECKING:
+    from .breakdown import BreakdownNode
+    from .dedup import Deduplicator
+    from .gitdiff import MetricsDiff
+    from .history import RevisionMetrics
+    from .limits import SkippedFile
+
+CSV_HEADER = "path,total_lines,code_lines,statements,test_lines,test_code_lines"
+TEXT_ROW_HEADER = f"{'total':>10} {'code':>10} {'stmts':>10} {'test':>10} {'test code':>10}  path"
+BREAKDOWN_CSV_HEADER = "path,depth,package,files,total_lines,code_lines,statements,test_lines,test_code_lines"
+BASE_METRICS = ("total_lines", "code_lines", "statements", "test_lines", "test_code_lines")
+
+# Labels of the optional AST metrics in the text summary and as text columns
+AST_METRIC_LABELS = {
+    "functions": "Number of functions:",
+    "classes": "Number of classes:",
+    "complexity": "Cyclomatic complexity (sum):",
+    "max_complexity": "Highest function complexity:",
+    "max_nesting": "Deepest nesting level:",
+    "docstring_lines": "Docstring lines:",
+}
+AST_METRIC_COLUMNS = {
+    "functions": "funcs",
+    "classes": "classes",
+    "complexity": "cc",
+    "max_complexity": "max cc",
+    "max_nesting": "nesting",
+    "docstring_lines": "doc lines",
+}
+
+
+def format_metrics_output(
+    path: Path, metrics, output_format: str = "text", extra_metrics: Sequence[str] = ()
+) -> str:
     """
     Format metrics into a readable string output.
 
     Args:
         path: Path that was analyzed
         metrics: Metrics object containing analysis results
-        output_format: Output format ('text' or 'csv')
+        output_format: Output format ('text', 'csv' or 'jsonl')
+        extra_metrics: AST metrics to include after the base metrics
 
     Returns:
         Formatted string with metrics
     """
     if output_format == "csv":
-        return format_metrics_csv(path, metrics)
+        return format_metrics_csv(path, metrics, extra_metrics)
+    if output_format == "jsonl":
+        return format_metrics_json(path, metrics, extra_metrics=extra_metrics)
 
     lines = [
         f"\n{'=' * 60}",
@@ -28,25 +71,397 @@ def format_metrics_output(path: Path, metrics, output_format: str = "text") -> s
         f"Number of statements:                   {metrics.statements:>10,} (excl. tests)",
         f"Total lines of test code:               {metrics.test_lines:>10,}",
         f"Test lines without comments/blanks:     {metrics.test_code_lines:>10,}",
+        *(f"{AST_METRIC_LABELS[name]:<40}{getattr(metrics, name):>10,} (excl. tests)" for name in extra_metrics),
         f"\n{'=' * 60}\n",
     ]
     return "\n".join(lines)
 
 
-def format_metrics_csv(path: Path, metrics) -> str:
+def format_metrics_csv(path: Path, metrics, extra_metrics: Sequence[str] = ()) -> str:
     """
     Format metrics as CSV output.
 
     Args:
         path: Path that was analyzed
         metrics: Metrics object containing analysis results
+        extra_metrics: AST metrics to include after the base metrics
 
     Returns:
         CSV formatted string with metrics
     """
-    header = "path,total_lines,code_lines,statements,test_lines,test_code_lines"
-    data = (
-        f"{path},{metrics.total_lines},{metrics.code_lines},"
-        f"{metrics.statements},{metrics.test_lines},{metrics.test_code_lines}"
+    return f"{csv_header(extra_metrics)}\n{format_csv_row(path, metrics, extra_metrics)}"
+
+
+def csv_header(extra_metrics: Sequence[str] = ()) -> str:
+    """Return the CSV header for the base metrics followed by `extra_metrics`."""
+    return ",".join([CSV_HEADER, *extra_metrics])
+
+
+def text_row_header(extra_metrics: Sequence[str] = ()) -> str:
+    """Return the text row header for the base metrics followed by `extra_metrics`."""
+    columns = "".join(f" {AST_METRIC_COLUMNS[name]:>10}" for name in extra_metrics)
+    return f"{TEXT_ROW_HEADER.removesuffix('  path')}{columns}  path"
+
+
+def csv_row(values: Iterable[object]) -> str:
+    """Join values into a CSV row without a line break, quoting values with commas, quotes or line breaks."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(values)
+    return buffer.getvalue()
+
+
+def format_csv_row(path: str | Path, metrics, extra_metrics: Sequence[str] = ()) -> str:
+    """
+    Format metrics as a single CSV data row without a header.
+
+    Args:
+        path: Path or label the metrics belong to
+        metrics: Metrics object containing analysis results
+        extra_metrics: AST metrics to include after the base metrics
+
+    Returns:
+        CSV formatted row
+    """
+    return csv_row([path, *_metrics_dict(metrics, extra_metrics).values()])
+
+
+def format_metrics_json(path: Path, metrics, total: bool = False, extra_metrics: Sequence[str] = ()) -> str:
+    """
+    Format metrics as a single-line JSON object.
+
+    Args:
+        path: Path the metrics belong to
+        metrics: Metrics dataclass containing analysis results
+        total: Mark the record as the total of a per-file listing
+        extra_metrics: AST metrics to include after the base metrics
+
+    Returns:
+        JSON formatted record
+    """
+    record = {"path": str(path), **_metrics_dict(metrics, extra_metrics)}
+    if total:
+        record["total"] = True
+    return json.dumps(record)
+
+
+def _metrics_dict(metrics, extra_metrics: Sequence[str] = ()) -> dict[str, int]:
+    """Return the base metrics followed by `extra_metrics` as a dictionary."""
+    return {name: getattr(metrics, name) for name in (*BASE_METRICS, *extra_metrics)}
+
+
+def format_text_row(path: str | Path, metrics, extra_metrics: Sequence[str] = ()) -> str:
+    """
+    Format metrics as a single fixed-width text row.
+
+    Args:
+        path: Path or label the metrics belong to
+        metrics: Metrics object containing analysis results
+        extra_metrics: AST metrics to include after the base metrics
+
+    Returns:
+        Text row with the metric columns followed by the path
+    """
+    extra = "".join(f" {getattr(metrics, name):>10,}" for name in extra_metrics)
+    return (
+        f"{metrics.total_lines:>10,} {metrics.code_lines:>10,} {metrics.statements:>10,} "
+        f"{metrics.test_lines:>10,} {metrics.test_code_lines:>10,}{extra}  {path}"
     )
-    return f"{header}\n{data}"
+
+
+def iter_per_file_output(
+    path: Path,
+    results: Iterable[tuple[Path, CodeMetrics]],
+    output_format: str = "text",
+    extra_metrics: Sequence[str] = (),
+) -> Iterator[str]:
+    """
+    Format per-file metrics as they are produced, followed by the total.
+
+    Only the running total is kept, so memory does not grow with the number
+    of files.
+
+    Args:
+        path: Path that was analyzed
+        results: `(filepath, metrics)` pairs, one per analyzed file
+        output_format: Output format ('text', 'csv' or 'jsonl')
+        extra_metrics: AST metrics to include after the base metrics
+
+    Returns:
+        Iterator of output lines (or blocks, for the text total)
+    """
+    if output_format == "csv":
+        yield csv_header(extra_metrics)
+    elif output_format != "jsonl":
+        yield text_row_header(extra_metrics)
+
+    totals = CodeMetrics(0, 0, 0, 0, 0)
+    for filepath, metrics in results:
+        totals += metrics
+        yield _format_row(filepath, metrics, output_format, extra_metrics)
+
+    if output_format == "csv":
+        yield format_csv_row(path, totals, extra_metrics)
+    elif output_format == "jsonl":
+        yield format_metrics_json(path, totals, total=True, extra_metrics=extra_metrics)
+    else:
+        yield format_metrics_output(path, totals, output_format, extra_metrics)
+
+
+def _format_row(path: Path, metrics, output_format: str, extra_metrics: Sequence[str]) -> str:
+    """Format metrics as a single CSV, JSON or text row."""
+    if output_format == "csv":
+        return format_csv_row(path, metrics, extra_metrics)
+    if output_format == "jsonl":
+        return format_metrics_json(path, metrics, extra_metrics=extra_metrics)
+    return format_text_row(path, metrics, extra_metrics)
+
+
+def format_breakdown_output(
+    tree: "BreakdownNode", output_format: str = "text", extra_metrics: Sequence[str] = ()
+) -> str:
+    """
+    Format a breakdown tree, one row per directory in depth-first order.
+
+    Args:
+        tree: Root node returned by `build_breakdown`
+        output_format: Output format ('text', 'csv' or 'jsonl')
+        extra_metrics: AST metrics to include after the base metrics
+
+    Returns:
+        Formatted string with the metrics of every directory in the tree
+    """
+    from .breakdown import iter_breakdown  # pylint: disable=import-outside-toplevel
+
+    nodes = iter_breakdown(tree)
+    if output_format == "csv":
+        rows = []
+        for node in nodes:
+            metrics = _metrics_dict(node.metrics, extra_metrics).values()
+            rows.append(csv_row([node.path, node.depth, int(node.package), node.files, *metrics]))
+        return "\n".join([",".join([BREAKDOWN_CSV_HEADER, *extra_metrics]), *rows])
+    if output_format == "jsonl":
+        records = [
+            {"path": str(node.path), "depth": node.depth, "package": node.package, "files": node.files}
+            | _metrics_dict(node.metrics, extra_metrics)
+            for node in nodes
+        ]
+        return "\n".join(json.dumps(record) for record in records)
+
+    lines = [f"{'files':>8} {text_row_header(extra_metrics)}"]
+    for node in nodes:
+        label = str(node.path) if node.depth == 0 else f"{'  ' * node.depth}{node.path.name}/"
+        if node.package:
+            label += " (package)"
+        lines.append(f"{node.files:>8,} {format_text_row(label, node.metrics, extra_metrics)}")
+    return "\n".join(lines)
+
+
+def format_diff_output(path: Path, diff: "MetricsDiff", output_format: str = "text") -> str:
+    """
+    Format the metrics of files changed since a git revision.
+
+    Args:
+        path: Path that was analyzed
+        diff: Metrics of the changed files before and after, and the totals
+        output_format: Output format ('text', 'csv' or 'jsonl')
+
+    Returns:
+        Formatted string with the changed-file metrics, the delta and, if
+        known, the totals before and after
+    """
+    scopes = {"changed_before": diff.before, "changed_after": diff.after, "delta": diff.delta}
+    if diff.totals is not None and diff.baseline_totals is not None:
+        scopes["total_before"] = diff.baseline_totals
+        scopes["total_after"] = diff.totals
+
+    if output_format == "csv":
+        header = "path,scope,total_lines,code_lines,statements,test_lines,test_code_lines"
+        rows = [csv_row([path, scope, *_metrics_dict(metrics).values()]) for scope, metrics in scopes.items()]
+        return "\n".join([header, *rows])
+    if output_format == "jsonl":
+        record = {
+            "path": str(path),
+            "since": diff.rev,
+            "added": len(diff.added),
+            "modified": len(diff.modified),
+            "deleted": len(diff.deleted),
+            **{scope: _metrics_dict(metrics) for scope, metrics in scopes.items()},
+        }
+        return json.dumps(record)
+
+    titles = {
+        "changed_before": "Changed files before",
+        "changed_after": "Changed files after",
+        "delta": "Delta",
+        "total_before": "Total before",
+        "total_after": "Total after",
+    }
+    lines = [
+        f"\n{'=' * 60}",
+        f"Python Code Changes: {path} since {diff.rev}",
+        f"{'=' * 60}\n",
+        f"Files added:                            {len(diff.added):>10,}",
+        f"Files modified:                         {len(diff.modified):>10,}",
+        f"Files deleted:                          {len(diff.deleted):>10,}",
+    ]
+    for scope, metrics in scopes.items():
+        sign = "+" if scope == "delta" else ""
+        lines += [
+            "",
+            f"{titles[scope]}:",
+            f"  Total lines of code:                  {metrics.total_lines:>{sign}10,}",
+            f"  Lines without comments/blanks:        {metrics.code_lines:>{sign}10,} (excl. tests)",
+            f"  Number of statements:                 {metrics.statements:>{sign}10,} (excl. tests)",
+            f"  Total lines of test code:             {metrics.test_lines:>{sign}10,}",
+            f"  Test lines without comments/blanks:   {metrics.test_code_lines:>{sign}10,}",
+        ]
+    lines.append(f"\n{'=' * 60}\n")
+    return "\n".join(lines)
+
+
+def format_history_output(path: Path, history: Sequence["RevisionMetrics"], output_format: str = "text") -> str:
+    """
+    Format the metrics of a path at a series of commits.
+
+    Args:
+        path: Path that was analyzed
+        history: Metrics of every commit, oldest first
+        output_format: Output format ('text', 'csv' or 'jsonl')
+
+    Returns:
+        Formatted string with one row or record per commit
+    """
+    if output_format == "csv":
+        rows = [
+            f"{revision.commit},{revision.timestamp},{revision.files},"
+            f"{','.join(str(value) for value in _metrics_dict(revision.metrics).values())}"
+            for revision in history
+        ]
+        return "\n".join([f"commit,timestamp,files,{','.join(BASE_METRICS)}", *rows])
+    if output_format == "jsonl":
+        return "\n".join(
+            json.dumps(
+                {
+                    "path": str(path),
+                    "commit": revision.commit,
+                    "timestamp": revision.timestamp,
+                    "files": revision.files,
+                    **_metrics_dict(revision.metrics),
+                }
+            )
+            for revision in history
+        )
+
+    lines = [f"{'date':<16} {'commit':<10} {'files':>8} {TEXT_ROW_HEADER.removesuffix('  path')}"]
+    for revision in history:
+        date = time.strftime("%Y-%m-%d %H:%M", time.gmtime(revision.timestamp))
+        values = "".join(f" {value:>10,}" for value in _metrics_dict(revision.metrics).values())
+        lines.append(f"{date:<16} {revision.commit[:10]:<10} {revision.files:>8,}{values}")
+    return "\n".join(lines)
+
+
+def format_profile_report(report: dict) -> str:
+    """
+    Format a profiling report as text.
+
+    Args:
+        report: Report returned by `Profiler.report`
+
+    Returns:
+        Formatted string with the counters, per-phase times and slowest files
+    """
+    elapsed = report["elapsed"]
+    lines = [
+        f"\n{'=' * 60}",
+        "pycole profile",
+        f"{'=' * 60}\n",
+        f"Elapsed wall time:                      {elapsed['wall'] * 1000:>10,.1f} ms",
+        f"Elapsed CPU time (main process):        {elapsed['cpu'] * 1000:>10,.1f} ms",
+        f"Files analyzed:                         {report['files']:>10,}",
+        f"Bytes read:                             {report['bytes_read']:>10,}",
+        f"Files skipped (unreadable):             {report['files_skipped']:>10,}",
+        f"Parse failures:                         {report['parse_failures']:>10,}",
+        "",
+        f"{'phase':<20} {'wall ms':>12} {'cpu ms':>12}",
+    ]
+    for phase, times in report["phases"].items():
+        lines.append(f"{phase:<20} {times['wall'] * 1000:>12,.1f} {times['cpu'] * 1000:>12,.1f}")
+    if report["slowest_files"]:
+        lines += ["", "Slowest files:"]
+        lines += [f"{entry['wall'] * 1000:>10,.1f} ms  {entry['path']}" for entry in report["slowest_files"]]
+    lines.append(f"\n{'=' * 60}\n")
+    return "\n".join(lines)
+
+
+def format_duplicates_report(dedup: "Deduplicator") -> str:
+    """
+    Format the groups of byte-identical files found during a run.
+
+    Args:
+        dedup: Deduplicator used by the run
+
+    Returns:
+        Formatted string with a summary line and the files of every group, largest copies first
+    """
+    groups = dedup.duplicate_groups()
+    copies = sum(len(group.files) - 1 for group in groups)
+    lines = [
+        f"Duplicates: {copies:,} copies of {len(groups):,} files; "
+        f"{dedup.files_reused:,} reused their metrics, {dedup.bytes_reused:,} bytes not analyzed again"
+    ]
+    for group in groups:
+        lines.append(f"\n{len(group.files)} files of {group.size:,} bytes:")
+        lines += [f"  {filepath}" for filepath in group.files]
+    return "\n".join(lines)
+
+
+def format_skipped_report(skipped: Sequence["SkippedFile"]) -> str:
+    """
+    Format the files that exceeded the size or time limit of a run.
+
+    Args:
+        skipped: Files recorded in `FileLimits.skipped`
+
+    Returns:
+        Formatted string with one line per file and the reason it was not parsed
+    """
+    reasons = {
+        "size": "larger than --max-file-size",
+        "timeout": "analysis exceeded --file-timeout",
+        "crash": "worker process died while analyzing it",
+    }
+    lines = [f"Skipped {len(skipped):,} files, counted their lines only:"]
+    for entry in skipped:
+        reason = reasons[entry.reason]
+        if entry.size is not None:
+            reason += f" ({entry.size:,} bytes)"
+        lines.append(f"  {entry.path}: {reason}")
+    return "\n".join(lines)
+
+
+def format_paths_output(
+    results: list[tuple[Path, CodeMetrics]], output_format: str = "text", extra_metrics: Sequence[str] = ()
+) -> str:
+    """
+    Format the metrics of several analyzed paths, followed by their grand total.
+
+    Args:
+        results: `(path, metrics)` pairs returned by `analyze_paths`
+        output_format: Output format ('text', 'csv' or 'jsonl')
+        extra_metrics: AST metrics to include after the base metrics
+
+    Returns:
+        Formatted string with one row per path and the grand total
+    """
+    totals = CodeMetrics(0, 0, 0, 0, 0)
+    for _, metrics in results:
+        totals += metrics
+    label = Path(f"{len(results)} paths")
+
+    rows = [_format_row(path, metrics, output_format, extra_metrics) for path, metrics in results]
+    if output_format == "csv":
+        return "\n".join([csv_header(extra_metrics), *rows, format_csv_row("total", totals, extra_metrics)])
+    if output_format == "jsonl":
+        return "\n".join([*rows, format_metrics_json(label, totals, total=True, extra_metrics=extra_metrics)])
+    summary = format_metrics_output(label, totals, output_format, extra_metrics)
+    return "\n".join([text_row_header(extra_metrics), *rows, summary])
@@ -0,0 +1,158 @@
+"""Incremental analysis of the Python files changed since a git revision."""
+
+import subprocess
+import tempfile
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .analyzer import CodeMetrics, analyze_file
+from .ignore import IgnoreMatcher
+from .walker import compile_excludes, is_excluded
+
+
+@dataclass
+class MetricsDiff:
+    """Metrics of the files changed between a git revision and the working tree."""
+
+    rev: str
+    added: list[Path] = field(default_factory=list)
+    modified: list[Path] = field(default_factory=list)
+    deleted: list[Path] = field(default_factory=list)
+    before: CodeMetrics = field(default_factory=lambda: CodeMetrics(0, 0, 0, 0, 0))  # Changed files at `rev`
+    after: CodeMetrics = field(default_factory=lambda: CodeMetrics(0, 0, 0, 0, 0))  # Changed files now
+    totals: CodeMetrics | None = None  # Whole tree now, if known
+
+    @property
+    def delta(self) -> CodeMetrics:
+        """Change in metrics since `rev`."""
+        return self.after - self.before
+
+    @property
+    def baseline_totals(self) -> CodeMetrics | None:
+        """Whole tree metrics at `rev`, if the current totals are known."""
+        if self.totals is None:
+            return None
+        return self.totals - self.delta
+
+
+def _git(repo: Path, *args: str, stdin: bytes | None = None) -> bytes:
+    """Run a git command in a repository and return its output."""
+    try:
+        result = subprocess.run(["git", "-C", str(repo), *args], input=stdin, capture_output=True, check=True)
+    except FileNotFoundError as e:
+        raise ValueError("git executable not found") from e
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"git {args[0]} failed: {e.stderr.decode(errors='replace').strip()}") from e
+    return result.stdout
+
+
+def changed_python_files(path: Path, rev: str) -> tuple[Path, dict[str, str]]:
+    """
+    List the Python files under a path that changed since a revision.
+
+    Untracked files that are not ignored by git count as added.
+
+    Args:
+        path: File or directory inside a git working tree
+        rev: Revision to compare the working tree against
+
+    Returns:
+        Repository root and a mapping of repository-relative paths to their
+        status: 'A' (added), 'M' (modified) or 'D' (deleted)
+    """
+    directory = path if path.is_dir() else path.parent
+    repo = Path(_git(directory, "rev-parse", "--show-toplevel").decode().strip())
+    pathspec = str(path.resolve().relative_to(repo.resolve())) or "."
+
+    changes: dict[str, str] = {}
+    diff = _git(repo, "diff", "--name-status", "--no-renames", "-z", rev, "--", pathspec)
+    fields = diff.decode().split("\0")
+    for status, relpath in zip(fields[0::2], fields[1::2]):
+        if relpath.endswith(".py"):
+            # Type changes and unmerged entries are treated as modifications
+            changes[relpath] = status if status in ("A", "D") else "M"
+
+    untracked = _git(repo, "ls-files", "--others", "--exclude-standard", "-z", "--", pathspec)
+    for relpath in untracked.decode().split("\0"):
+        if relpath.endswith(".py"):
+            changes[relpath] = "A"
+    return repo, changes
+
+
+def _read_blobs(repo: Path, rev: str, relpaths: list[str]) -> dict[str, bytes]:
+    """Read file contents at a revision with a single `git cat-file` process."""
+    if not relpaths:
+        return {}
+    output = _git(repo, "cat-file", "--batch", stdin="".join(f"{rev}:{relpath}\n" for relpath in relpaths).encode())
+
+    blobs = {}
+    offset = 0
+    for relpath in relpaths:
+        header_end = output.index(b"\n", offset)
+        header = output[offset:header_end].split()
+        if header[-1] == b"missing":
+            offset = header_end + 1
+            continue
+        size = int(header[2])
+        blobs[relpath] = output[header_end + 1 : header_end + 1 + size]
+        offset = header_end + 1 + size + 1
+    return blobs
+
+
+def analyze_since(
+    path: Path,
+    rev: str,
+    exclude: Iterable[str] = (),
+    statement_mode: str = "ast",
+    totals: CodeMetrics | None = None,
+    line_mode: str = "fast",
+    use_ignore_files: bool = True,
+) -> MetricsDiff:
+    """
+    Analyze only the Python files that changed since a git revision.
+
+    Current files are analyzed in place. Their contents at `rev` are read
+    from the local object store and analyzed from a scratch directory that
+    mirrors the repository layout, so test file detection is unchanged.
+
+    Args:
+        path: File or directory inside a git working tree
+        rev: Revision to compare the working tree against
+        exclude: Glob patterns for files and directories to skip
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        totals: Current metrics of the whole path (e.g. from a cached run),
+            used to derive the totals at `rev`
+        line_mode: Code line classification to use ('fast' or 'accurate')
+        use_ignore_files: Skip changed files that `.gitignore` and `.ignore` files and the
+            `[tool.pycole]` exclude list ignore below `path`
+
+    Returns:
+        Metrics of the changed files before and after, and the totals
+    """
+    repo, changes = changed_python_files(path, rev)
+    excluded = compile_excludes(exclude)
+    root = path.resolve() if path.is_dir() else path.resolve().parent
+    ignore = IgnoreMatcher(root) if use_ignore_files else None
+    repo = repo.resolve()
+
+    diff = MetricsDiff(rev=rev, totals=totals)
+    for relpath, status in sorted(changes.items()):
+        filepath = repo / relpath
+        if is_excluded(filepath.relative_to(root).as_posix(), excluded, ignore):
+            continue
+        {"A": diff.added, "M": diff.modified, "D": diff.deleted}[status].append(filepath)
+
+    for filepath in diff.added + diff.modified:
+        if filepath.is_file():
+            diff.after += analyze_file(filepath, statement_mode=statement_mode, line_mode=line_mode)
+
+    old = [filepath.relative_to(repo).as_posix() for filepath in diff.modified + diff.deleted]
+    with tempfile.TemporaryDirectory(prefix="pycole-") as scratch:
+        for relpath, content in _read_blobs(repo, rev, old).items():
+            filepath = Path(scratch, relpath)
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            filepath.write_bytes(content)
+            diff.before += analyze_file(filepath, statement_mode=statement_mode, line_mode=line_mode)
+
+    return diff
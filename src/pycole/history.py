@@ -0,0 +1,281 @@
+"""Metrics of a series of git revisions, read from the object store without checking them out."""
+
+import subprocess
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .analyzer import CodeMetrics, _analyze_content, is_test_file
+from .gitdiff import _git
+from .ignore import IgnoreMatcher
+from .walker import compile_excludes, is_excluded
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+# Modes of regular files in git trees; symlinks and submodules are skipped
+_FILE_MODES = (b"100644", b"100755")
+# Below this many blobs the pool startup cost outweighs the parallel speedup
+SERIAL_THRESHOLD = 64
+BATCH_SIZE = 32
+
+
+@dataclass
+class RevisionMetrics:
+    """Metrics of the Python files of a path at one commit."""
+
+    commit: str
+    timestamp: int  # Committer time in seconds since the epoch
+    files: int
+    metrics: CodeMetrics
+
+
+def list_revisions(repo: Path, revs: str, max_count: int | None = None) -> list[tuple[str, int]]:
+    """
+    List the commits of a revision range, oldest first.
+
+    Args:
+        repo: Directory inside a git working tree
+        revs: Revision range in `git rev-list` syntax, such as `v1.0..main` or `HEAD`
+        max_count: Only keep this many of the newest commits
+
+    Returns:
+        `(commit, timestamp)` pairs in chronological order
+    """
+    args = ["rev-list", "--reverse", "--timestamp"]
+    if max_count is not None:
+        args.append(f"--max-count={max_count}")
+    output = _git(repo, *args, *revs.split(), "--")
+    revisions = []
+    for line in output.decode().splitlines():
+        timestamp, commit = line.split()
+        revisions.append((commit, int(timestamp)))
+    return revisions
+
+
+def _read_tree(repo: Path, commit: str, pathspec: str) -> Iterator[tuple[str, bytes]]:
+    """Yield the paths and blob ids of the regular files of a commit below a pathspec."""
+    for entry in _git(repo, "ls-tree", "-r", "-z", commit, "--", pathspec).split(b"\0"):
+        if not entry:
+            continue
+        info, _, relpath = entry.partition(b"\t")
+        mode, _, blob = info.split(b" ")
+        if mode in _FILE_MODES:
+            yield relpath.decode(errors="surrogateescape"), blob
+
+
+def _read_changes(
+    repo: Path, commits: list[str], pathspec: str
+) -> list[list[tuple[str, bytes | None, bytes | None]]]:
+    """
+    Diff every commit against the previous one in a single `git diff-tree` process.
+
+    Returns:
+        For every commit after the first, `(path, old blob, new blob)` triples,
+        where a missing blob means the regular file does not exist on that side
+    """
+    if len(commits) < 2:
+        return []
+    pairs = "".join(f"{commit} {previous}\n" for previous, commit in zip(commits, commits[1:]))
+    output = _git(
+        repo, "diff-tree", "--stdin", "-r", "-z", "--no-renames", "--always", "--", pathspec, stdin=pairs.encode()
+    )
+
+    changes: list[list[tuple[str, bytes | None, bytes | None]]] = []
+    fields = iter(output.split(b"\0"))
+    for field in fields:
+        if not field:
+            continue
+        if not field.startswith(b":"):
+            # Every commit is listed before its changes, even if it has none
+            changes.append([])
+            continue
+        old_mode, new_mode, old_blob, new_blob, _ = field[1:].split(b" ")
+        relpath = next(fields).decode(errors="surrogateescape")
+        changes[-1].append(
+            (
+                relpath,
+                old_blob if old_mode in _FILE_MODES else None,
+                new_blob if new_mode in _FILE_MODES else None,
+            )
+        )
+    return changes
+
+
+def _iter_blobs(repo: Path, blobs: list[bytes]) -> Iterator[tuple[bytes, bytes]]:
+    """Stream the contents of blobs from a single `git cat-file` process."""
+    with subprocess.Popen(
+        ["git", "-C", str(repo), "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    ) as process:
+        assert process.stdin is not None and process.stdout is not None
+        stdin = process.stdin
+
+        def write_requests() -> None:
+            try:
+                for blob in blobs:
+                    stdin.write(blob + b"\n")
+                stdin.close()
+            except BrokenPipeError:
+                pass
+
+        # Requests are written from a thread, so that neither pipe fills up while the other is waited on
+        writer = threading.Thread(target=write_requests, daemon=True)
+        writer.start()
+        completed = False
+        try:
+            for blob in blobs:
+                header = process.stdout.readline().split()
+                if len(header) < 3 or header[1] != b"blob":
+                    raise ValueError(f"git cat-file could not read blob {blob.decode()}")
+                content = process.stdout.read(int(header[2]))
+                process.stdout.read(1)
+                yield blob, content
+            completed = True
+        finally:
+            if not completed:
+                # Unblocks the writer if the remaining contents are not read
+                process.kill()
+            writer.join()
+
+
+def _analyze_blobs(batch: list[tuple[Path, bytes]], statement_mode: str, line_mode: str) -> list[CodeMetrics]:
+    """Analyze the contents of a batch of files inside a worker process."""
+    return [_analyze_content(filepath, data, statement_mode, line_mode=line_mode) for filepath, data in batch]
+
+
+def _analyze_unique(
+    repo: Path,
+    blobs: dict[tuple[bytes, bool], Path],
+    jobs: int,
+    statement_mode: str,
+    line_mode: str,
+) -> dict[tuple[bytes, bool], CodeMetrics]:
+    """Analyze every distinct blob once per test and non-test path, in a process pool if `jobs` > 1."""
+
+    def contents() -> Iterator[tuple[tuple[bytes, bool], tuple[Path, bytes]]]:
+        # A blob found at both a test and a non-test path is read once and analyzed as both
+        for blob, data in _iter_blobs(repo, list(dict.fromkeys(blob for blob, _ in blobs))):
+            for is_test in (False, True):
+                filepath = blobs.get((blob, is_test))
+                if filepath is not None:
+                    yield (blob, is_test), (filepath, data)
+
+    if jobs <= 1 or len(blobs) < SERIAL_THRESHOLD:
+        return {
+            key: _analyze_content(filepath, data, statement_mode, line_mode=line_mode)
+            for key, (filepath, data) in contents()
+        }
+
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+
+    results: dict[tuple[bytes, bool], CodeMetrics] = {}
+    pending: deque[tuple[list[tuple[bytes, bool]], Future[list[CodeMetrics]]]] = deque()
+    items = contents()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        while batch := list(islice(items, BATCH_SIZE)):
+            keys = [key for key, _ in batch]
+            future = executor.submit(_analyze_blobs, [content for _, content in batch], statement_mode, line_mode)
+            pending.append((keys, future))
+            if len(pending) >= 2 * jobs:
+                keys, future = pending.popleft()
+                results.update(zip(keys, future.result()))
+        for keys, future in pending:
+            results.update(zip(keys, future.result()))
+    return results
+
+
+def analyze_history(  # pylint: disable=too-many-locals
+    path: Path,
+    revs: str,
+    max_count: int | None = None,
+    jobs: int = 1,
+    exclude: Iterable[str] = (),
+    statement_mode: str = "ast",
+    line_mode: str = "fast",
+    use_ignore_files: bool = True,
+) -> list[RevisionMetrics]:
+    """
+    Compute the metrics of a path at every commit of a revision range.
+
+    Nothing is checked out. The files of the first commit are listed with
+    `git ls-tree`, and the changes between consecutive commits with a
+    single `git diff-tree` process. Every distinct blob is then read once
+    with `git cat-file` and analyzed once, in a process pool with `jobs`
+    workers, since most files are unchanged from one commit to the next.
+    The metrics of every commit are finally derived from those of the
+    previous one by subtracting the metrics of changed and deleted files
+    and adding those of added and changed files.
+
+    Args:
+        path: File or directory inside a git working tree
+        revs: Revision range in `git rev-list` syntax, such as `v1.0..main` or `HEAD`
+        max_count: Only analyze this many of the newest commits
+        jobs: Number of worker processes; 1 analyzes blobs in the current process
+        exclude: Glob patterns for files and directories to skip
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        line_mode: Code line classification to use ('fast' or 'accurate')
+        use_ignore_files: Skip files that the current `.gitignore` and `.ignore` files and
+            `[tool.pycole]` exclude list ignore below `path`, like a run on the working tree
+
+    Returns:
+        Metrics of every commit, oldest first
+    """
+    directory = path if path.is_dir() else path.parent
+    repo = Path(_git(directory, "rev-parse", "--show-toplevel").decode().strip()).resolve()
+    pathspec = path.resolve().relative_to(repo).as_posix()
+    root = path.resolve() if path.is_dir() else path.resolve().parent
+    prefix = root.relative_to(repo).as_posix()
+    prefix = "" if prefix == "." else f"{prefix}/"
+    excluded = compile_excludes(exclude)
+    ignore = IgnoreMatcher(root) if use_ignore_files else None
+
+    revisions = list_revisions(repo, revs, max_count)
+    if not revisions:
+        return []
+    commits = [commit for commit, _ in revisions]
+
+    # Whether a repository-relative path is analyzed, and whether it is a test file
+    accepted: dict[str, bool | None] = {}
+
+    def classify(relpath: str) -> bool | None:
+        if relpath not in accepted:
+            if not relpath.endswith(".py") or is_excluded(relpath.removeprefix(prefix), excluded, ignore):
+                accepted[relpath] = None
+            else:
+                accepted[relpath] = is_test_file(repo / relpath)
+        return accepted[relpath]
+
+    blobs: dict[tuple[bytes, bool], Path] = {}
+
+    def keep(relpath: str, blob: bytes | None) -> tuple[bytes, bool] | None:
+        is_test = classify(relpath)
+        if blob is None or is_test is None:
+            return None
+        key = (blob, is_test)
+        blobs.setdefault(key, repo / relpath)
+        return key
+
+    initial = [key for relpath, blob in _read_tree(repo, commits[0], pathspec) if (key := keep(relpath, blob))]
+    changes = [
+        [(keep(relpath, old), keep(relpath, new)) for relpath, old, new in commit_changes]
+        for commit_changes in _read_changes(repo, commits, pathspec)
+    ]
+    metrics = _analyze_unique(repo, blobs, jobs, statement_mode, line_mode)
+
+    totals = sum((metrics[key] for key in initial), CodeMetrics(0, 0, 0, 0, 0))
+    files = len(initial)
+    history = [RevisionMetrics(revisions[0][0], revisions[0][1], files, totals)]
+    for (commit, timestamp), commit_changes in zip(revisions[1:], changes, strict=True):
+        for old, new in commit_changes:
+            if old is not None:
+                totals -= metrics[old]
+                files -= 1
+            if new is not None:
+                totals += metrics[new]
+                files += 1
+        history.append(RevisionMetrics(commit, timestamp, files, totals))
+    return history
@@ -0,0 +1,335 @@
+"""Gitignore-style ignore rules, compiled into regular expressions and loaded per directory."""
+
+import os
+import re
+from collections.abc import Collection, Iterable, Sequence, Set as AbstractSet
+from pathlib import Path
+
+# Ignore files read in every directory; rules of later files take precedence
+IGNORE_FILES = (".gitignore", ".ignore")
+PROJECT_FILE = "pyproject.toml"
+# Matches any number of leading directories
+_ANY_DIRS = "(?:.*/)?"
+# Alternation of the name or path rules of an ignore file, and the index of the rule of each group
+_Compiled = tuple[re.Pattern[str] | None, list[int]]
+
+
+def translate_pattern(pattern: str) -> str:
+    """
+    Translate a gitignore pattern into a regular expression.
+
+    The pattern must already be stripped of its `!` prefix and trailing `/`.
+    The expression matches paths relative to the directory of the ignore
+    file, using forward slashes. Patterns without a slash (other than a
+    trailing one) match at any depth, and `**` matches any number of
+    directories when it is a whole path component.
+
+    Args:
+        pattern: Gitignore pattern such as `build`, `/dist`, `docs/**/*.py` or `*_pb2.py`
+
+    Returns:
+        Regular expression without capturing groups, to be used with `fullmatch`
+    """
+    anchored = "/" in pattern
+    pattern = pattern.removeprefix("/")
+    parts = [] if anchored else [_ANY_DIRS]
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**", index) and (index == 0 or pattern[index - 1] == "/"):
+            if pattern.startswith("**/", index):
+                parts.append(_ANY_DIRS)
+                index += 3
+                continue
+            if index + 2 == len(pattern):
+                parts.append(".*")
+                break
+        if char == "*":
+            parts.append("[^/]*")
+            while index + 1 < len(pattern) and pattern[index + 1] == "*":
+                index += 1
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and (end := _class_end(pattern, index)) > 0:
+            parts.append(f"(?!/)[{_escape_class(pattern[index + 1 : end])}]")
+            index = end
+        elif char == "\\" and index + 1 < len(pattern):
+            index += 1
+            parts.append(re.escape(pattern[index]))
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return "".join(parts)
+
+
+def _escape_class(members: str) -> str:
+    """Convert the members of a bracket expression into the members of a regular expression class."""
+    negated = members[0] in "!^"
+    escaped = re.sub(r"([\\\[\]&~|^])", r"\\\1", members[1:] if negated else members)
+    return f"^{escaped}" if negated else escaped
+
+
+def _class_end(pattern: str, start: int) -> int:
+    """Return the index of the `]` closing the bracket expression at `start`, or -1."""
+    index = start + 1
+    if index < len(pattern) and pattern[index] in "!^":
+        index += 1
+    if index < len(pattern) and pattern[index] == "]":
+        index += 1
+    return pattern.find("]", index)
+
+
+class IgnoreRules:
+    """
+    Ordered ignore rules of one ignore file, compiled into a few regular expressions.
+
+    Rules without a slash only depend on the name of an entry, so they are
+    matched against the name instead of the whole path, which avoids trying
+    every directory boundary. Name and path rules are each combined into one
+    alternation per entry type, in reverse order, so the first alternative
+    that matches is the last matching rule. Of a name and a path match, the
+    later rule decides whether a path is ignored or re-included by `!`.
+    """
+
+    __slots__ = ("_strip", "_prefix", "_negated", "_dirs", "_files")
+
+    def __init__(self, patterns: Iterable[str], strip: int = 0, prefix: str = ""):
+        """
+        Compile ignore rules.
+
+        Args:
+            patterns: Lines of an ignore file; blank lines and `#` comments are skipped
+            strip: Length of the walk-relative path of the directory holding the rules,
+                which is removed from paths before matching
+            prefix: Path of the walk root relative to the directory holding the rules,
+                for rules of a parent directory of the walk root
+        """
+        self._strip = strip
+        self._prefix = prefix
+        rules = [rule for line in patterns if (rule := _parse_line(line)) is not None]
+        self._negated = [rule[2] for rule in rules]
+        # (name expression, rule indices), (path expression, rule indices) for directories and files
+        self._dirs: tuple[_Compiled, _Compiled] = _compile(rules, names=True), _compile(rules, names=False)
+        files = [rule if not rule[3] else None for rule in rules]
+        self._files: tuple[_Compiled, _Compiled] = _compile(files, names=True), _compile(files, names=False)
+
+    def __bool__(self) -> bool:
+        return bool(self._negated)
+
+    def match(self, relpath: str, is_dir: bool) -> bool | None:
+        """
+        Match a path against the rules.
+
+        Args:
+            relpath: Path relative to the walk root, using forward slashes and no trailing slash
+            is_dir: Whether the path is a directory, which rules ending with `/` are limited to
+
+        Returns:
+            True if ignored, False if re-included by a `!` rule, None if no rule matches
+        """
+        (names, name_indices), (paths, path_indices) = self._dirs if is_dir else self._files
+        rule = -1
+        # Every rule is a group of the alternation, so a match always has a `lastindex`
+        match = None if names is None else names.fullmatch(relpath[relpath.rfind("/") + 1 :])
+        if match is not None and match.lastindex is not None:
+            rule = name_indices[match.lastindex - 1]
+        match = None if paths is None else paths.fullmatch(f"{self._prefix}{relpath[self._strip :]}")
+        if match is not None and match.lastindex is not None:
+            rule = max(rule, path_indices[match.lastindex - 1])
+        return None if rule < 0 else not self._negated[rule]
+
+
+def _parse_line(line: str) -> tuple[str, bool, bool, bool] | None:
+    """Parse a line of an ignore file into `(expression, name only, negated, directory only)`, or None."""
+    line = line.rstrip("\n\r")
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    if not stripped or stripped.startswith("#"):
+        return None
+    negated = stripped.startswith("!")
+    if negated or stripped.startswith(("\\!", "\\#")):
+        stripped = stripped[1:]
+    directory = stripped.endswith("/")
+    stripped = stripped.rstrip("/")
+    if not stripped:
+        return None
+    if "/" in stripped:
+        return translate_pattern(stripped), False, negated, directory
+    return translate_pattern(stripped).removeprefix(_ANY_DIRS), True, negated, directory
+
+
+def _compile(rules: Sequence[tuple[str, bool, bool, bool] | None], names: bool) -> _Compiled:
+    """Compile the name or path rules into one alternation with a group per rule, last rule first."""
+    selected = [(index, rule[0]) for index, rule in enumerate(rules) if rule is not None and rule[1] == names][::-1]
+    if not selected:
+        return None, []
+    expression = re.compile("|".join(f"({pattern})" for _, pattern in selected), re.DOTALL)
+    return expression, [index for index, _ in selected]
+
+
+def read_rules(dirpath: str, strip: int = 0, prefix: str = "", names: Collection[str] | None = None) -> IgnoreRules:
+    """
+    Read the ignore files of a directory.
+
+    Args:
+        dirpath: Directory to read the ignore files of
+        strip: See `IgnoreRules`
+        prefix: See `IgnoreRules`
+        names: Names of the entries of the directory if already listed, so that
+            missing ignore files are not opened
+
+    Returns:
+        Rules of all ignore files of the directory, empty if there are none
+    """
+    lines: list[str] = []
+    for filename in IGNORE_FILES:
+        if names is not None and filename not in names:
+            continue
+        try:
+            with open(os.path.join(dirpath, filename), encoding="utf-8", errors="replace") as file:
+                lines.extend(file)
+        except OSError:
+            continue
+    return IgnoreRules(lines, strip, prefix)
+
+
+def read_project_excludes(project_file: Path) -> list[str]:
+    """
+    Read the `exclude` list of the `[tool.pycole]` table of a pyproject.toml file.
+
+    Args:
+        project_file: Path to pyproject.toml
+
+    Returns:
+        Gitignore-style patterns, empty if the table or key is missing
+
+    Raises:
+        ValueError: If the file is not valid TOML or `exclude` is not a list of strings
+    """
+    import tomllib  # pylint: disable=import-outside-toplevel
+
+    try:
+        with project_file.open("rb") as file:
+            config = tomllib.load(file)
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"Invalid {project_file}: {e}") from e
+    exclude = config.get("tool", {}).get("pycole", {}).get("exclude", [])
+    if not isinstance(exclude, list) or not all(isinstance(pattern, str) for pattern in exclude):
+        raise ValueError(f"Invalid {project_file}: [tool.pycole] exclude must be a list of strings")
+    return exclude
+
+
+class IgnoreMatcher:
+    """
+    Ignore rules that apply below a walk root.
+
+    The rules come from the `.gitignore` and `.ignore` files of every
+    directory below the root, and of its parent directories up to the root
+    of the enclosing git repository, and from the `[tool.pycole]` exclude
+    list of the nearest pyproject.toml. Rules of deeper directories take
+    precedence, and the project excludes take precedence over all ignore
+    files. Every ignore file is read and compiled once, when its directory
+    is first listed.
+    """
+
+    def __init__(self, root: Path):
+        """
+        Load the rules of the parent directories of the walk root.
+
+        Args:
+            root: Directory the walk starts from; it is never ignored itself
+
+        Raises:
+            ValueError: If the pyproject.toml configuration is invalid
+        """
+        self._root = str(root)
+        root = root.absolute()
+        self._project: IgnoreRules | None = None
+        parents: list[IgnoreRules] = []
+        for depth, dirpath in enumerate([root, *root.parents]):
+            prefix = "".join(f"{part}/" for part in root.parts[len(root.parts) - depth :])
+            if self._project is None and (dirpath / PROJECT_FILE).is_file():
+                self._project = IgnoreRules(read_project_excludes(dirpath / PROJECT_FILE), prefix=prefix) or None
+            if depth > 0:
+                parents.append(read_rules(str(dirpath), prefix=prefix))
+            if (dirpath / ".git").exists():
+                break
+        else:
+            # Not in a git repository, so the ignore files of parent directories do not apply
+            parents = []
+        self._parents = tuple(rules for rules in parents if rules)
+        # Rule sets applying to the entries of every listed directory, by walk-relative path
+        self._chains: dict[str, tuple[IgnoreRules, ...]] = {}
+
+    def rules(self, dirpath: str, relpath: str, names: AbstractSet[str] | None = None) -> tuple[IgnoreRules, ...]:
+        """
+        Return the rule sets that apply to the entries of a directory, in order of precedence.
+
+        Args:
+            dirpath: Directory being listed
+            relpath: Path of the directory relative to the walk root, empty for
+                the root itself and ending with a slash otherwise
+            names: Names of the entries of the directory, if already listed
+
+        Returns:
+            Rule sets to pass to `is_ignored`
+        """
+        chain = self._chains.get(relpath)
+        if chain is None:
+            if relpath:
+                parent_relpath = relpath[: relpath.rstrip("/").rfind("/") + 1]
+                parent = self.rules(os.path.dirname(dirpath.rstrip(os.sep)), parent_relpath)
+            else:
+                parent = self._parents if self._project is None else (self._project, *self._parents)
+            if names is not None and names.isdisjoint(IGNORE_FILES):
+                own = None
+            else:
+                own = read_rules(dirpath, strip=len(relpath), names=names)
+            if not own:
+                chain = parent
+            elif self._project is not None:
+                chain = (self._project, own, *parent[1:])
+            else:
+                chain = (own, *parent)
+            self._chains[relpath] = chain
+        return chain
+
+    def is_ignored_path(self, relpath: str) -> bool:
+        """
+        Check whether a file below the walk root, or one of its parent directories, is ignored.
+
+        Args:
+            relpath: File path relative to the walk root, using forward slashes
+
+        Returns:
+            True if the file would not be reached by a walk that prunes ignored directories
+        """
+        parts = relpath.split("/")
+        parent = ""
+        for index, part in enumerate(parts):
+            chain = self.rules(os.path.join(self._root, *parts[:index]), parent)
+            if is_ignored(chain, f"{parent}{part}", index < len(parts) - 1):
+                return True
+            parent = f"{parent}{part}/"
+        return False
+
+
+def is_ignored(chain: tuple[IgnoreRules, ...], relpath: str, is_dir: bool) -> bool:
+    """
+    Check whether an entry is ignored by the first rule set of a chain that matches it.
+
+    Args:
+        chain: Rule sets returned by `IgnoreMatcher.rules` for the parent directory
+        relpath: Path of the entry relative to the walk root, without a trailing slash
+        is_dir: Whether the entry is a directory
+
+    Returns:
+        True if the entry is ignored
+    """
+    for rules in chain:
+        matched = rules.match(relpath, is_dir)
+        if matched is not None:
+            return matched
+    return False
@@ -0,0 +1,298 @@
+"""
+Per-file size and time limits, so that pathological files cannot stall a run.
+
+Files over the size limit are not parsed. With a time limit, files are
+analyzed in worker processes that are killed when a file takes too long.
+Either way the file gets line-only metrics and is reported as skipped.
+"""
+
+import multiprocessing
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+
+from .analyzer import MMAP_THRESHOLD, CodeMetrics, _open_content, analyze_file, count_lines_bytes, is_test_file
+
+# Reasons a file was not fully analyzed
+SKIP_REASONS = ("size", "timeout", "crash")
+
+
+@dataclass
+class SkippedFile:
+    """A file that only got line-only metrics."""
+
+    path: Path
+    reason: str  # One of SKIP_REASONS
+    size: int | None = None  # In bytes, for files over the size limit
+
+
+def line_metrics(filepath: Path, mmap_threshold: int = MMAP_THRESHOLD) -> CodeMetrics:
+    """
+    Count the lines of a file without parsing it.
+
+    Lines are classified by their first character, as in the fast line mode,
+    and no statements or AST metrics are counted.
+
+    Args:
+        filepath: Python file to count
+        mmap_threshold: Size in bytes from which files are memory-mapped; 0 always reads them
+
+    Returns:
+        Line metrics of the file; zero if it cannot be read or decoded
+    """
+    try:
+        with _open_content(filepath, mmap_threshold) as data:
+            total_lines, code_lines = count_lines_bytes(data)
+    except (OSError, UnicodeDecodeError):
+        return CodeMetrics(0, 0, 0, 0, 0)
+    if is_test_file(filepath):
+        return CodeMetrics(total_lines, 0, 0, total_lines, code_lines)
+    return CodeMetrics(total_lines, code_lines, 0, 0, 0)
+
+
+class FileLimits:
+    """
+    Size and time limits of a run, and the files that exceeded them.
+
+    Implements the `analyze_files` wrapper interface of `Checkpoint`: files
+    over `max_file_size` are counted line-only in the current process and
+    never reach the cache or the analyzer, so they are reported on every
+    run. The time limit is enforced by `KillableEngine`, which the analyzer
+    functions use instead of the process pool when `file_timeout` is set;
+    the files it abandons are listed in `abandoned`, whose metrics the cache
+    and checkpoint do not store.
+    """
+
+    def __init__(
+        self,
+        max_file_size: int | None = None,
+        file_timeout: float | None = None,
+        mmap_threshold: int = MMAP_THRESHOLD,
+    ):
+        """
+        Create limits.
+
+        Args:
+            max_file_size: Size in bytes above which files are not parsed; None for no limit
+            file_timeout: Seconds after which the analysis of a file is abandoned; None for no limit
+            mmap_threshold: Size in bytes from which skipped files are memory-mapped to count their lines
+        """
+        self.max_file_size = max_file_size
+        self.file_timeout = file_timeout
+        self.mmap_threshold = mmap_threshold
+        self.skipped: list[SkippedFile] = []
+        # Reason of every file whose analysis was abandoned, by path
+        self.abandoned: dict[Path, str] = {}
+
+    def abandon(self, filepath: Path, reason: str) -> None:
+        """Record a file that gets line-only metrics because its analysis timed out or crashed."""
+        self.skipped.append(SkippedFile(filepath, reason))
+        self.abandoned[filepath] = reason
+
+    def analyze_files(
+        self,
+        files: Iterable[Path],
+        analyze: Callable[[Iterable[Path]], Iterable[tuple[Path, CodeMetrics]]],
+    ) -> Iterator[tuple[Path, CodeMetrics]]:
+        """
+        Yield metrics for files in input order, counting the lines of files over the size limit.
+
+        Args:
+            files: Python files to analyze
+            analyze: Function that analyzes files, yielding `(filepath, metrics)` pairs in order
+
+        Returns:
+            Iterator of `(filepath, metrics)` pairs, one per file
+        """
+        max_file_size = self.max_file_size
+        if max_file_size is None:
+            yield from analyze(files)
+            return
+
+        # Files in input order with their line-only metrics, or None if they are analyzed
+        queue: deque[tuple[Path, CodeMetrics | None]] = deque()
+
+        def within_limit() -> Iterator[Path]:
+            for filepath in files:
+                try:
+                    size = filepath.stat().st_size
+                except OSError:
+                    size = 0
+                if size <= max_file_size:
+                    queue.append((filepath, None))
+                    yield filepath
+                    continue
+                self.skipped.append(SkippedFile(filepath, "size", size))
+                queue.append((filepath, line_metrics(filepath, self.mmap_threshold)))
+
+        for filepath, metrics in analyze(within_limit()):
+            while (skipped := queue[0][1]) is not None:
+                yield queue.popleft()[0], skipped
+            queue.popleft()
+            yield filepath, metrics
+        # Every file left is over the limit
+        yield from ((skipped_path, skipped) for skipped_path, skipped in queue if skipped is not None)
+
+
+def _serve_files(
+    connection: Connection, statement_mode: str, mmap_threshold: int, ast_metrics: tuple[str, ...], line_mode: str
+) -> None:
+    """Analyze the files received on a connection inside a worker process, until None is received."""
+    # Deadlines start once the worker can analyze, so its startup is not counted against the first file
+    connection.send(None)
+    while (filepath := connection.recv()) is not None:
+        connection.send(analyze_file(filepath, statement_mode, None, mmap_threshold, ast_metrics, line_mode))
+
+
+class _Worker:
+    """A worker process analyzing one file at a time."""
+
+    def __init__(self, context, options: tuple):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve_files, args=(child, *options), daemon=True)
+        self.process.start()
+        child.close()
+        self.started = False
+        # Input index, path and deadline of the file being analyzed
+        self.task: tuple[int, Path, float] | None = None
+
+    def close(self, kill: bool = False) -> None:
+        """Stop the process, killing it if it is busy or `kill` is set."""
+        if kill or self.task is not None:
+            self.process.kill()
+        else:
+            try:
+                self.connection.send(None)
+            except OSError:
+                self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class KillableEngine:
+    """
+    Analyze files in worker processes that are killed when a file exceeds the time limit.
+
+    Every worker analyzes one file at a time, so a file that takes too long
+    can be abandoned by killing its worker, which is then replaced. Files
+    whose worker dies, e.g. from a stack overflow in the parser, are also
+    abandoned. Abandoned files get line-only metrics and are recorded with
+    `limits.abandon`. Results are yielded in input order.
+    """
+
+    def __init__(
+        self,
+        limits: FileLimits,
+        jobs: int = 1,
+        statement_mode: str = "ast",
+        mmap_threshold: int = MMAP_THRESHOLD,
+        ast_metrics: tuple[str, ...] = (),
+        line_mode: str = "fast",
+    ):
+        """
+        Create an engine; worker processes are started on first use.
+
+        Args:
+            limits: Limits with the `file_timeout`, receiving the abandoned files
+            jobs: Number of worker processes
+            statement_mode: Statement counter to use ('ast' or 'tokenize')
+            mmap_threshold: Size in bytes from which files are memory-mapped; 0 always reads them
+            ast_metrics: AST metrics to compute in the same pass as the statements
+            line_mode: Code line classification to use ('fast' or 'accurate')
+
+        Raises:
+            ValueError: If `limits` has no `file_timeout`
+        """
+        if limits.file_timeout is None:
+            raise ValueError("KillableEngine requires limits with a file_timeout")
+        self.limits = limits
+        self.file_timeout: float = limits.file_timeout
+        self.jobs = jobs
+        self._options = (statement_mode, mmap_threshold, ast_metrics, line_mode)
+        self._context = multiprocessing.get_context()
+        self._workers: list[_Worker] = []
+
+    def __enter__(self) -> "KillableEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
+
+    def analyze(self, files: Iterable[Path]) -> Iterator[tuple[Path, CodeMetrics]]:
+        """
+        Analyze files, yielding `(filepath, metrics)` pairs in input order.
+
+        Args:
+            files: Python files to analyze
+
+        Returns:
+            Iterator of pairs, one per file, in the same order as `files`
+        """
+        while len(self._workers) < self.jobs:
+            self._workers.append(_Worker(self._context, self._options))
+        try:
+            yield from self._analyze(enumerate(files))
+        finally:
+            if any(worker.task is not None for worker in self._workers):
+                # The caller stopped early: busy workers are killed, and replaced on the next call
+                self.close()
+
+    def _analyze(self, pending: Iterator[tuple[int, Path]]) -> Iterator[tuple[Path, CodeMetrics]]:
+        """Dispatch files to idle workers and collect results until every file is done."""
+        results: dict[int, tuple[Path, CodeMetrics]] = {}
+        next_index = 0
+        exhausted = False
+        while True:
+            for worker in self._workers:
+                if worker.started and worker.task is None and not exhausted:
+                    task = next(pending, None)
+                    if task is None:
+                        exhausted = True
+                        break
+                    worker.connection.send(task[1])
+                    worker.task = (*task, time.monotonic() + self.file_timeout)
+            deadlines = [worker.task[2] for worker in self._workers if worker.task is not None]
+            if exhausted and not deadlines:
+                return
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            waiting = [worker for worker in self._workers if worker.task is not None or not worker.started]
+            ready = wait([worker.connection for worker in waiting], timeout)
+            for index, worker in enumerate(self._workers):
+                if not worker.started:
+                    if worker.connection in ready:
+                        try:
+                            worker.connection.recv()
+                        except EOFError as e:
+                            raise ChildProcessError("A worker process exited on startup") from e
+                        worker.started = True
+                    continue
+                if worker.task is None:
+                    continue
+                position, filepath, deadline = worker.task
+                if worker.connection in ready:
+                    try:
+                        results[position] = (filepath, worker.connection.recv())
+                        worker.task = None
+                        continue
+                    except EOFError:
+                        reason = "crash"
+                elif time.monotonic() >= deadline:
+                    reason = "timeout"
+                else:
+                    continue
+                worker.close(kill=True)
+                self._workers[index] = _Worker(self._context, self._options)
+                self.limits.abandon(filepath, reason)
+                results[position] = (filepath, line_metrics(filepath, self._options[1]))
+            while next_index in results:
+                yield results.pop(next_index)
+                next_index += 1
@@ -0,0 +1,274 @@
+"""Process-pool engine for analyzing many Python files in parallel."""
+
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from itertools import chain, islice
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeVar
+
+from .analyzer import (
+    MMAP_THRESHOLD,
+    CodeMetrics,
+    _analyze_content,
+    _analyze_serial,
+    _iter_contents,
+    analyze_file,
+    analyze_source,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    from .profiling import FileProfile, Profiler
+
+# Below this many files the pool startup cost outweighs the parallel speedup
+SERIAL_THRESHOLD = 64
+BATCH_SIZE = 32
+
+T = TypeVar("T")
+
+
+def default_jobs() -> int:
+    """Return the number of CPUs available to this process."""
+    return os.process_cpu_count() or 1
+
+
+def _analyze_batch(
+    batch: list[Path],
+    statement_mode: str,
+    mmap_threshold: int,
+    io_threads: int,
+    ast_metrics: tuple[str, ...],
+    line_mode: str,
+) -> list[tuple[Path, CodeMetrics]]:
+    """Analyze a batch of files inside a worker process."""
+    if io_threads:
+        return list(_analyze_serial(batch, statement_mode, None, mmap_threshold, io_threads, ast_metrics, line_mode))
+    return [
+        (filepath, analyze_file(filepath, statement_mode, None, mmap_threshold, ast_metrics, line_mode))
+        for filepath in batch
+    ]
+
+
+def _profile_batch(
+    batch: list[Path],
+    statement_mode: str,
+    mmap_threshold: int,
+    io_threads: int,
+    ast_metrics: tuple[str, ...],
+    line_mode: str,
+) -> list[tuple[Path, CodeMetrics, "FileProfile"]]:
+    """Analyze a batch of files inside a worker process, profiling each file."""
+    from .profiling import FileProfile  # pylint: disable=import-outside-toplevel
+
+    results = []
+    for filepath, data in _iter_contents(batch, io_threads, mmap_threshold):
+        profile = FileProfile()
+        if data is None:
+            metrics = analyze_file(filepath, statement_mode, profile, mmap_threshold, ast_metrics, line_mode)
+        else:
+            metrics = _analyze_content(filepath, data, statement_mode, profile, ast_metrics, line_mode)
+        results.append((filepath, metrics, profile))
+    return results
+
+
+def _analyze_source_batch(
+    batch: list[tuple[str | Path, str | bytes]],
+    statement_mode: str,
+    ast_metrics: tuple[str, ...],
+    line_mode: str,
+) -> list[tuple[str | Path, CodeMetrics]]:
+    """Analyze a batch of in-memory sources inside a worker process."""
+    return [
+        (filename, analyze_source(source, filename, statement_mode, ast_metrics, line_mode))
+        for filename, source in batch
+    ]
+
+
+def _batched(items: Iterator[T], size: int) -> Iterator[list[T]]:
+    """Split an iterator into lists of at most `size` items."""
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+class ParallelEngine:
+    """
+    Analyze files in a process pool, yielding results in input order.
+
+    Files are sharded into batches so each worker round trip carries enough
+    work to amortize pickling. At most two batches per worker are in flight,
+    so memory stays bounded for arbitrarily long inputs. Inputs shorter than
+    `serial_threshold` are analyzed in the current process, and the pool is
+    only started once a large enough input is seen. The pool is reused
+    across calls to `analyze` until the engine is closed.
+
+    With a profiler, workers also return a profile of every file, which is
+    merged into the profiler in the main process. With `io_threads`, each
+    worker reads the files of its batch ahead in threads while it parses.
+    """
+
+    def __init__(
+        self,
+        jobs: int | None = None,
+        batch_size: int = BATCH_SIZE,
+        serial_threshold: int = SERIAL_THRESHOLD,
+        statement_mode: str = "ast",
+        profiler: "Profiler | None" = None,
+        mmap_threshold: int = MMAP_THRESHOLD,
+        io_threads: int = 0,
+        ast_metrics: tuple[str, ...] = (),
+        line_mode: str = "fast",
+    ):
+        """
+        Create an engine.
+
+        Args:
+            jobs: Number of worker processes (defaults to the CPU count)
+            batch_size: Number of files sent to a worker at a time
+            serial_threshold: Minimum number of files for which the pool is used
+            statement_mode: Statement counter to use ('ast' or 'tokenize')
+            profiler: Optional profiler that receives per-phase timings and counters
+            mmap_threshold: Size in bytes from which files are memory-mapped; 0 always reads them
+            io_threads: Number of threads reading files ahead of their analysis; 0 reads them on demand
+            ast_metrics: AST metrics to compute in the same pass as the statements
+            line_mode: Code line classification to use ('fast' or 'accurate')
+        """
+        self.jobs = jobs or default_jobs()
+        self.batch_size = batch_size
+        self.serial_threshold = serial_threshold
+        self.statement_mode = statement_mode
+        self.profiler = profiler
+        self.mmap_threshold = mmap_threshold
+        self.io_threads = io_threads
+        self.ast_metrics = ast_metrics
+        self.line_mode = line_mode
+        self._executor: "ProcessPoolExecutor | None" = None
+
+    def __enter__(self) -> "ParallelEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pool if it was started."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def analyze(self, files: Iterable[Path]) -> Iterator[tuple[Path, CodeMetrics]]:
+        """
+        Analyze files, yielding `(filepath, metrics)` pairs in input order.
+
+        Args:
+            files: Python files to analyze
+
+        Returns:
+            Iterator of pairs, one per file, in the same order as `files`
+        """
+        files = iter(files)
+        head = list(islice(files, self.serial_threshold))
+
+        if self.jobs <= 1 or len(head) < self.serial_threshold:
+            # Either serial mode, or the input ended before reaching the threshold
+            if self.profiler is not None or self.io_threads or self.ast_metrics:
+                yield from _analyze_serial(
+                    chain(head, files),
+                    self.statement_mode,
+                    self.profiler,
+                    self.mmap_threshold,
+                    self.io_threads,
+                    self.ast_metrics,
+                    self.line_mode,
+                )
+                return
+            for filepath in chain(head, files):
+                yield filepath, analyze_file(
+                    filepath,
+                    statement_mode=self.statement_mode,
+                    mmap_threshold=self.mmap_threshold,
+                    line_mode=self.line_mode,
+                )
+            return
+
+        worker = _analyze_batch if self.profiler is None else _profile_batch
+        options = (self.statement_mode, self.mmap_threshold, self.io_threads, self.ast_metrics, self.line_mode)
+        for future in self._submit(chain(head, files), worker, *options):
+            yield from self._results(future)
+
+    def analyze_sources(
+        self, sources: Iterable[tuple[str | Path, str | bytes]]
+    ) -> Iterator[tuple[str | Path, CodeMetrics]]:
+        """
+        Analyze in-memory sources, yielding `(filename, metrics)` pairs in input order.
+
+        Sources are pickled to the workers in batches, so they are never
+        written to disk. The profiler and reading options do not apply.
+
+        Args:
+            sources: `(filename, source)` pairs; see `pycole.analyzer.analyze_source`
+
+        Returns:
+            Iterator of pairs, one per source, in the same order as `sources`
+        """
+        sources = iter(sources)
+        head = list(islice(sources, self.serial_threshold))
+
+        if self.jobs <= 1 or len(head) < self.serial_threshold:
+            for filename, source in chain(head, sources):
+                yield filename, analyze_source(source, filename, self.statement_mode, self.ast_metrics, self.line_mode)
+            return
+
+        options = (self.statement_mode, self.ast_metrics, self.line_mode)
+        for future in self._submit(chain(head, sources), _analyze_source_batch, *options):
+            yield from future.result()
+
+    def _submit(self, items: Iterator, worker: Callable[..., list[tuple]], *options) -> Iterator["Future[list[tuple]]"]:
+        """Submit batches to the pool, yielding their futures in order, with at most two per worker in flight."""
+        if self._executor is None:
+            # Not imported at startup, since short inputs never start a pool
+            from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+
+            self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+
+        pending: deque[Future[list[tuple]]] = deque()
+        for batch in _batched(items, self.batch_size):
+            pending.append(self._executor.submit(worker, batch, *options))
+            if len(pending) >= 2 * self.jobs:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+    def _results(self, future: "Future[list[tuple]]") -> Iterator[tuple[Path, CodeMetrics]]:
+        """Yield the pairs of a finished batch, merging file profiles into the profiler."""
+        if self.profiler is None:
+            yield from future.result()
+            return
+        for filepath, metrics, profile in future.result():
+            self.profiler.add_file(filepath, profile)
+            yield filepath, metrics
+
+
+def analyze_files_parallel(
+    files: Iterable[Path],
+    jobs: int | None = None,
+    batch_size: int = BATCH_SIZE,
+    serial_threshold: int = SERIAL_THRESHOLD,
+    statement_mode: str = "ast",
+) -> Iterator[tuple[Path, CodeMetrics]]:
+    """
+    Analyze files in a process pool, yielding `(filepath, metrics)` pairs in input order.
+
+    Args:
+        files: Python files to analyze
+        jobs: Number of worker processes (defaults to the CPU count)
+        batch_size: Number of files sent to a worker at a time
+        serial_threshold: Minimum number of files for which a pool is started
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+
+    Returns:
+        Iterator of pairs, one per file, in the same order as `files`
+    """
+    with ParallelEngine(jobs, batch_size, serial_threshold, statement_mode) as engine:
+        yield from engine.analyze(files)
@@ -0,0 +1,89 @@
+"""Thread-based prefetching of file contents ahead of their analysis."""
+
+import os
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+# Maximum bytes of contents that were read ahead but not analyzed yet
+PREFETCH_BUDGET = 64 * 1024 * 1024
+
+
+def read_file(filepath: Path, max_size: int = 0) -> bytes | None:
+    """
+    Read the content of a file.
+
+    Args:
+        filepath: File to read
+        max_size: Size in bytes from which files are not read; 0 reads files of any size
+
+    Returns:
+        Content of the file, or None if it is too large or cannot be read
+    """
+    try:
+        with filepath.open("rb") as file:
+            if max_size and os.fstat(file.fileno()).st_size >= max_size:
+                return None
+            return file.read()
+    except OSError:
+        return None
+
+
+def prefetch_files(
+    files: Iterable[Path], threads: int, budget: int = PREFETCH_BUDGET, max_size: int = 0
+) -> Iterator[tuple[Path, bytes | None]]:
+    """
+    Read files ahead in a thread pool, yielding their contents in input order.
+
+    Reads overlap with whatever the consumer does between items (such as
+    parsing), which hides I/O latency on slow or network filesystems. New
+    reads are only started while less than `budget` bytes of read contents
+    are waiting to be consumed, and at most two reads per thread are in
+    flight, so memory stays bounded.
+
+    Args:
+        files: Files to read
+        threads: Number of reader threads
+        budget: Maximum bytes of read contents waiting to be consumed
+        max_size: Size in bytes from which files are not read; 0 reads files of any size
+
+    Returns:
+        Iterator of `(filepath, content)` pairs, where content is None if the
+        file is too large or could not be read, so the caller can fall back
+        to its own way of opening it
+    """
+    files = iter(files)
+    buffered = 0
+    lock = threading.Lock()
+
+    def count(future: Future[bytes | None]) -> None:
+        nonlocal buffered
+        if data := future.result():
+            with lock:
+                buffered += len(data)
+
+    executor = ThreadPoolExecutor(threads, thread_name_prefix="pycole-io")
+    pending: deque[tuple[Path, Future[bytes | None]]] = deque()
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < 2 * threads and buffered < budget:
+                filepath = next(files, None)
+                if filepath is None:
+                    exhausted = True
+                    break
+                future = executor.submit(read_file, filepath, max_size)
+                future.add_done_callback(count)
+                pending.append((filepath, future))
+            if not pending:
+                return
+
+            filepath, future = pending.popleft()
+            if data := future.result():
+                with lock:
+                    buffered -= len(data)
+            yield filepath, data
+    finally:
+        executor.shutdown(cancel_futures=True)
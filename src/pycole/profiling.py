@@ -0,0 +1,128 @@
+"""Per-phase timings and counters for profiling pycole runs."""
+
+import heapq
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class FileProfile:
+    """
+    Timings and counters collected while analyzing a single file.
+
+    Wall and CPU times are accumulated per phase with `lap`. Profiles are
+    created in worker processes in parallel mode, so they only hold plain,
+    picklable data.
+    """
+
+    wall: dict[str, float] = field(default_factory=dict)
+    cpu: dict[str, float] = field(default_factory=dict)
+    bytes_read: int = 0
+    skipped: bool = False  # The file could not be read or decoded
+    parse_failed: bool = False
+    _wall_start: float = field(default_factory=time.perf_counter, repr=False)
+    _cpu_start: float = field(default_factory=time.process_time, repr=False)
+
+    def lap(self, phase: str) -> None:
+        """Add the time since the previous lap (or creation) to a phase."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.wall[phase] = self.wall.get(phase, 0.0) + wall - self._wall_start
+        self.cpu[phase] = self.cpu.get(phase, 0.0) + cpu - self._cpu_start
+        self._wall_start, self._cpu_start = wall, cpu
+
+
+class Profiler:
+    """
+    Collect per-phase wall and CPU times, counters and the slowest files of a run.
+
+    Per-file phases (read, count_lines, count_statements) are measured in
+    whichever process analyzes the file and summed here, so in parallel mode
+    they add up the time spent in all workers. Phases run by the main
+    process (walk, aggregate, format) are measured directly.
+    """
+
+    def __init__(self, top: int = 10):
+        """
+        Create a profiler.
+
+        Args:
+            top: Number of slowest files to keep
+        """
+        self.top = top
+        self.wall: dict[str, float] = {}
+        self.cpu: dict[str, float] = {}
+        self.files = 0
+        self.bytes_read = 0
+        self.files_skipped = 0
+        self.parse_failures = 0
+        self._slowest: list[tuple[float, str]] = []
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def add(self, phase: str, wall: float, cpu: float) -> None:
+        """Add wall and CPU time to a phase."""
+        self.wall[phase] = self.wall.get(phase, 0.0) + wall
+        self.cpu[phase] = self.cpu.get(phase, 0.0) + cpu
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure the wall and CPU time of a block."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def timed_iter[T](self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from an iterable, adding the time spent producing items to a phase."""
+        iterator = iter(iterable)
+        while True:
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - wall, time.process_time() - cpu)
+                return
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu)
+            yield item
+
+    def add_file(self, filepath: Path, profile: FileProfile) -> None:
+        """Merge the profile of an analyzed file."""
+        self.files += 1
+        self.bytes_read += profile.bytes_read
+        self.files_skipped += profile.skipped
+        self.parse_failures += profile.parse_failed
+        for phase, wall in profile.wall.items():
+            self.add(phase, wall, profile.cpu.get(phase, 0.0))
+
+        entry = (sum(profile.wall.values()), str(filepath))
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def report(self) -> dict:
+        """
+        Summarize the run.
+
+        Returns:
+            JSON-serializable report with the elapsed time, counters, per-phase
+            times and the slowest files
+        """
+        return {
+            "elapsed": {
+                "wall": time.perf_counter() - self._wall_start,
+                "cpu": time.process_time() - self._cpu_start,
+            },
+            "files": self.files,
+            "bytes_read": self.bytes_read,
+            "files_skipped": self.files_skipped,
+            "parse_failures": self.parse_failures,
+            "phases": {phase: {"wall": wall, "cpu": self.cpu[phase]} for phase, wall in self.wall.items()},
+            "slowest_files": [
+                {"path": path, "wall": wall} for wall, path in sorted(self._slowest, reverse=True)
+            ],
+        }
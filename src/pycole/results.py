@@ -0,0 +1,298 @@
+"""Columnar store of per-file metrics with vectorized aggregation, group-by and top-N queries."""
+
+import csv
+import heapq
+import json
+import os
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, TextIO
+
+from .analyzer import CodeMetrics, is_test_file, iter_file_metrics
+from .astmetrics import MAX_METRICS
+from .cache import METRIC_COLUMNS
+from .formatter import BASE_METRICS, csv_header
+
+BACKENDS = ("auto", "array", "numpy")
+GROUP_KEYS = ("directory", "is_test")
+
+
+def _import_numpy() -> Any:
+    """Return the numpy module, or None if it is not installed."""
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return numpy
+
+
+@dataclass
+class MetricsGroup:
+    """Aggregated metrics of the files sharing a group-by key."""
+
+    files: int
+    metrics: CodeMetrics
+
+
+class MetricsColumns:
+    """
+    Per-file metrics stored column by column.
+
+    Every metric is a fixed-width 64-bit integer column in an `array`, and
+    paths are split into an index into a list of distinct directories and
+    an interned file name, so a row costs about a hundred bytes instead of
+    a `Path` and a `CodeMetrics` instance. Queries loop over the columns in
+    C: with the `numpy` backend through zero-copy views of the arrays,
+    otherwise with the builtin `sum`, `max` and `heapq` functions. Both
+    backends give identical results.
+    """
+
+    def __init__(self, backend: str = "auto"):
+        """
+        Create an empty table.
+
+        Args:
+            backend: 'numpy' to run queries with NumPy, 'array' to use the
+                standard library only, or 'auto' to use NumPy if it is installed
+
+        Raises:
+            ValueError: If the backend is unknown, or 'numpy' and NumPy is not installed
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+        self._numpy = _import_numpy() if backend != "array" else None
+        if backend == "numpy" and self._numpy is None:
+            raise ValueError("The numpy backend requires NumPy to be installed")
+        self._dirs: list[str] = []
+        self._dir_ids: dict[str, int] = {}
+        self._dir_index = array("I")
+        self._names: list[str] = []
+        self._is_test = array("B")
+        self._columns = {name: array("q") for name in METRIC_COLUMNS}
+
+    @classmethod
+    def from_results(cls, results: Iterable[tuple[Path, CodeMetrics]], backend: str = "auto") -> "MetricsColumns":
+        """
+        Build a table from `(filepath, metrics)` pairs, consuming them one at a time.
+
+        Args:
+            results: Per-file results, such as those of `iter_file_metrics`
+            backend: See `MetricsColumns`
+
+        Returns:
+            Table with one row per result
+        """
+        table = cls(backend)
+        table.extend(results)
+        return table
+
+    @classmethod
+    def from_path(cls, path: Path, backend: str = "auto", **options: Any) -> "MetricsColumns":
+        """
+        Analyze a file or directory and store the metrics of every file as they are computed.
+
+        Args:
+            path: File or directory to analyze
+            backend: See `MetricsColumns`
+            **options: Options of `iter_file_metrics`, such as `jobs`, `exclude` or `cache`
+
+        Returns:
+            Table with one row per analyzed file
+        """
+        return cls.from_results(iter_file_metrics(path, **options), backend)
+
+    @property
+    def backend(self) -> str:
+        """Backend that runs the queries, 'numpy' or 'array'."""
+        return "array" if self._numpy is None else "numpy"
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def append(self, filepath: Path, metrics: CodeMetrics) -> None:
+        """
+        Add the metrics of a file.
+
+        Args:
+            filepath: Analyzed file
+            metrics: Metrics of the file
+        """
+        dirpath, name = os.path.split(filepath)
+        dir_id = self._dir_ids.get(dirpath)
+        if dir_id is None:
+            dir_id = self._dir_ids[dirpath] = len(self._dirs)
+            self._dirs.append(dirpath)
+        self._dir_index.append(dir_id)
+        self._names.append(sys.intern(name))
+        self._is_test.append(is_test_file(filepath))
+        for metric, column in self._columns.items():
+            column.append(getattr(metrics, metric))
+
+    def extend(self, results: Iterable[tuple[Path, CodeMetrics]]) -> None:
+        """Add the metrics of several files."""
+        for filepath, metrics in results:
+            self.append(filepath, metrics)
+
+    def path(self, index: int) -> str:
+        """Return the path of the file in a row."""
+        return os.path.join(self._dirs[self._dir_index[index]], self._names[index])
+
+    def row(self, index: int) -> CodeMetrics:
+        """Return the metrics of the file in a row."""
+        return CodeMetrics(*(column[index] for column in self._columns.values()))
+
+    def __iter__(self) -> Iterator[tuple[str, CodeMetrics]]:
+        for index in range(len(self)):
+            yield self.path(index), self.row(index)
+
+    def column(self, metric: str) -> Any:
+        """
+        Return the values of a metric for every file.
+
+        Args:
+            metric: Name of a `CodeMetrics` field
+
+        Returns:
+            A NumPy array with the numpy backend, which views the table and
+            must be released before rows are added; an `array` copy otherwise
+
+        Raises:
+            ValueError: If the metric is unknown
+        """
+        values = self._column(metric)
+        if self._numpy is None:
+            return array("q", values)
+        return self._numpy.frombuffer(values, dtype=self._numpy.int64)
+
+    def _column(self, metric: str) -> array:
+        """Return the storage of a metric column."""
+        try:
+            return self._columns[metric]
+        except KeyError:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {', '.join(METRIC_COLUMNS)}") from None
+
+    def totals(self) -> CodeMetrics:
+        """Return the summed metrics of all files, like adding every row's `CodeMetrics`."""
+        values = {}
+        for name, column in self._columns.items():
+            if self._numpy is not None:
+                view = self._numpy.frombuffer(column, dtype=self._numpy.int64)
+                values[name] = int(view.max(initial=0) if name in MAX_METRICS else view.sum())
+            else:
+                values[name] = max(column, default=0) if name in MAX_METRICS else sum(column)
+        return CodeMetrics(**values)
+
+    def group_by(self, key: str) -> dict[str | bool, MetricsGroup]:
+        """
+        Aggregate the metrics of the files sharing a key.
+
+        Args:
+            key: 'directory' to group files by the directory containing them,
+                or 'is_test' to group test and non-test files
+
+        Returns:
+            Groups by directory path, in order of first appearance, or by
+            whether the files are test files; only keys with files are included
+
+        Raises:
+            ValueError: If the key is unknown
+        """
+        if key == "directory":
+            keys: Sequence[str | bool] = self._dirs
+            groups = self._dir_index
+        elif key == "is_test":
+            keys = (False, True)
+            groups = self._is_test
+        else:
+            raise ValueError(f"Unknown group-by key {key!r}, expected one of {', '.join(GROUP_KEYS)}")
+
+        aggregate: Callable[[array, array | None, int, bool], list[int]] = self._group_array
+        if self._numpy is not None:
+            aggregate = partial(self._group_numpy, self._numpy)
+        counts = aggregate(groups, None, len(keys), False)
+        columns = [aggregate(groups, column, len(keys), name in MAX_METRICS) for name, column in self._columns.items()]
+        return {
+            keys[group]: MetricsGroup(counts[group], CodeMetrics(*(values[group] for values in columns)))
+            for group in range(len(keys))
+            if counts[group]
+        }
+
+    @staticmethod
+    def _group_array(groups: array, values: array | None, count: int, maximum: bool) -> list[int]:
+        """Aggregate a column per group, or count the rows of every group if `values` is None."""
+        result = [0] * count
+        if values is None:
+            for group in groups:
+                result[group] += 1
+        elif maximum:
+            for group, value in zip(groups, values):
+                if value > result[group]:
+                    result[group] = value
+        else:
+            for group, value in zip(groups, values):
+                result[group] += value
+        return result
+
+    @staticmethod
+    def _group_numpy(numpy: Any, groups: array, values: array | None, count: int, maximum: bool) -> list[int]:
+        """Aggregate a column per group with NumPy, or count the rows of every group if `values` is None."""
+        indices = numpy.frombuffer(groups, dtype=numpy.uint32 if groups.typecode == "I" else numpy.uint8)
+        if values is None:
+            return numpy.bincount(indices, minlength=count).tolist()
+        result = numpy.zeros(count, dtype=numpy.int64)
+        ufunc = numpy.maximum if maximum else numpy.add
+        ufunc.at(result, indices, numpy.frombuffer(values, dtype=numpy.int64))
+        return result.tolist()
+
+    def top(self, n: int, metric: str = "code_lines") -> list[tuple[str, int]]:
+        """
+        Return the files with the highest values of a metric.
+
+        Args:
+            n: Number of files to return
+            metric: Name of a `CodeMetrics` field
+
+        Returns:
+            `(path, value)` pairs in decreasing order of value; files with
+            equal values are in the order they were added
+
+        Raises:
+            ValueError: If the metric is unknown
+        """
+        values = self._column(metric)
+        if self._numpy is not None:
+            view = self._numpy.frombuffer(values, dtype=self._numpy.int64)
+            indices = self._numpy.argsort(-view, kind="stable")[:n].tolist()
+        else:
+            indices = heapq.nlargest(n, range(len(values)), key=values.__getitem__)
+        return [(self.path(index), values[index]) for index in indices]
+
+    def write_csv(self, file: TextIO, extra_metrics: Sequence[str] = ()) -> None:
+        """
+        Write one CSV row per file, in the format of `--per-file --format csv`.
+
+        Args:
+            file: Text file to write to
+            extra_metrics: AST metrics to include after the base metrics
+        """
+        columns = [self._column(name) for name in (*BASE_METRICS, *extra_metrics)]
+        file.write(f"{csv_header(extra_metrics)}\n")
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerows([self.path(index), *(column[index] for column in columns)] for index in range(len(self)))
+
+    def write_jsonl(self, file: TextIO, extra_metrics: Sequence[str] = ()) -> None:
+        """
+        Write one JSON object per line and file, in the format of `--per-file --format jsonl`.
+
+        Args:
+            file: Text file to write to
+            extra_metrics: AST metrics to include after the base metrics
+        """
+        columns = [(name, self._column(name)) for name in (*BASE_METRICS, *extra_metrics)]
+        for index in range(len(self)):
+            record = {"path": self.path(index), **{name: column[index] for name, column in columns}}
+            file.write(f"{json.dumps(record)}\n")
@@ -0,0 +1,331 @@
+"""
+Long-running analysis daemon answering requests over a Unix domain socket.
+
+The daemon keeps the metrics of every analyzed file in memory, indexed by
+path and validated by mtime and size, so repeated requests from editors
+and pre-commit hooks only analyze files that changed. The protocol is one
+JSON object per line in each direction.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+from collections.abc import Callable, Container, Iterable, Iterator
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from .analyzer import CodeMetrics, analyze_paths, analyze_source
+
+# Files analyzed at once on a cache miss, so that the analyzer can parallelize
+MISS_CHUNK_SIZE = 1024
+# Files held back at most while waiting for the misses before them
+PENDING_LIMIT = 16 * MISS_CHUNK_SIZE
+# Seconds a client waits for the daemon before falling back to in-process analysis
+CONNECT_TIMEOUT = 0.5
+# Options of a request that the analysis depends on, with their defaults
+ANALYSIS_OPTIONS = {"statement_mode": "ast", "line_mode": "fast", "ast_metrics": ()}
+
+
+def default_socket_path() -> Path:
+    """Return the per-user socket path, in `$XDG_RUNTIME_DIR` if set, else in the temporary directory."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir, "pycole.sock")
+    return Path(tempfile.gettempdir(), f"pycole-{os.getuid()}.sock")
+
+
+def _check_owner(socket_path: Path) -> None:
+    """Raise PermissionError if a socket file belongs to another user, who may have planted it in a shared directory."""
+    if os.lstat(socket_path).st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} belongs to another user")
+
+
+class MemoryCache:
+    """
+    In-memory index of per-file metrics keyed by path, mtime and size.
+
+    Implements the `FileCache` interface of `MetricsCache`, so it can be
+    passed as the `cache` of the analyzer functions.
+    """
+
+    def __init__(self):
+        # Absolute path -> (mtime_ns, size, metrics)
+        self._entries: dict[str, tuple[int, int, CodeMetrics]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def analyze_files(
+        self,
+        files: Iterable[Path],
+        analyze: Callable[[list[Path]], Iterable[tuple[Path, CodeMetrics]]],
+        root: Path | None = None,
+        abandoned: Container[Path] = (),
+    ) -> Iterator[tuple[Path, CodeMetrics]]:
+        """
+        Yield metrics for files in input order, analyzing only those that changed since they were last seen.
+
+        Args:
+            files: Python files to analyze
+            analyze: Function that analyzes a list of files, yielding
+                `(filepath, metrics)` pairs in order
+            root: Directory the files were discovered in; entries under it for
+                files that no longer exist are evicted
+            abandoned: Files whose analysis was abandoned once `analyze` yields
+                them; their metrics are not stored
+
+        Returns:
+            Iterator of `(filepath, metrics)` pairs, one per file
+        """
+        seen: set[str] = set()
+        # Files in input order since the first miss, with their cached metrics or None for misses
+        pending: list[tuple[Path, CodeMetrics | None]] = []
+        misses: list[tuple[Path, str, int, int]] = []
+        for filepath in files:
+            key = os.path.abspath(filepath)
+            try:
+                stat = os.stat(key)
+            except OSError:
+                continue
+            seen.add(key)
+            entry = self._entries.get(key)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self.hits += 1
+                if not misses:
+                    yield filepath, entry[2]
+                    continue
+                pending.append((filepath, entry[2]))
+            else:
+                misses.append((filepath, key, stat.st_mtime_ns, stat.st_size))
+                pending.append((filepath, None))
+            if len(misses) >= MISS_CHUNK_SIZE or len(pending) >= PENDING_LIMIT:
+                yield from self._analyze_misses(pending, misses, analyze, abandoned)
+                pending, misses = [], []
+        yield from self._analyze_misses(pending, misses, analyze, abandoned)
+
+        if root is not None:
+            prefix = os.path.join(os.path.abspath(root), "")
+            for key in [key for key in self._entries if key.startswith(prefix) and key not in seen]:
+                del self._entries[key]
+
+    def _analyze_misses(
+        self,
+        pending: list[tuple[Path, CodeMetrics | None]],
+        misses: list[tuple[Path, str, int, int]],
+        analyze: Callable[[list[Path]], Iterable[tuple[Path, CodeMetrics]]],
+        abandoned: Container[Path],
+    ) -> Iterator[tuple[Path, CodeMetrics]]:
+        """Analyze missed files, store their metrics and yield the pending files in order."""
+        if not pending:
+            return
+        self.misses += len(misses)
+        results = zip(misses, analyze([filepath for filepath, _, _, _ in misses]), strict=True)
+        for filepath, metrics in pending:
+            if metrics is None:
+                (_, key, mtime_ns, size), (filepath, metrics) = next(results)
+                if filepath not in abandoned:
+                    self._entries[key] = (mtime_ns, size, metrics)
+            yield filepath, metrics
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answer the requests of a connection, one JSON object per line."""
+
+    server: "AnalysisServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except (ValueError, TypeError, KeyError, OSError) as e:
+                response = {"error": str(e) or type(e).__name__}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class AnalysisServer(socketserver.UnixStreamServer):
+    """
+    Daemon analyzing paths and in-memory sources with warm per-file caches.
+
+    Requests are answered one at a time, so the caches need no locking.
+    Requests for unchanged files only walk directories and stat files.
+    Each combination of analysis options has its own cache.
+    """
+
+    def __init__(self, socket_path: Path, jobs: int = 1):
+        """
+        Bind the socket, replacing a stale socket file left by a daemon that died.
+
+        Args:
+            socket_path: Path of the Unix domain socket
+            jobs: Number of worker processes for requests with many changed files
+
+        Raises:
+            ValueError: If another daemon is already listening on the socket
+            PermissionError: If the socket file belongs to another user
+        """
+        if socket_path.exists():
+            _check_owner(socket_path)
+            try:
+                request(socket_path, {"op": "ping"})
+            except OSError:
+                socket_path.unlink()
+            else:
+                raise ValueError(f"A pycole daemon is already listening on {socket_path}")
+        self.jobs = jobs
+        self.requests = 0
+        self._caches: dict[tuple, MemoryCache] = {}
+        # Only the current user may connect
+        umask = os.umask(0o077)
+        try:
+            super().__init__(str(socket_path), _RequestHandler)
+        finally:
+            os.umask(umask)
+        self.socket_path = socket_path
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+    def dispatch(self, message: dict[str, Any]) -> dict[str, Any]:
+        """
+        Answer a request.
+
+        Args:
+            message: Request with an `op` of 'ping', 'analyze', 'analyze_sources',
+                'stats' or 'shutdown', and the arguments of the operation
+
+        Returns:
+            Response; failed requests have an `error` message instead of results
+        """
+        self.requests += 1
+        op = message["op"]
+        if op == "ping":
+            return {"pid": os.getpid()}
+        if op == "analyze":
+            cache = self._caches.setdefault(_variant(message), MemoryCache())
+            results = analyze_paths(
+                [Path(path) for path in message["paths"]],
+                jobs=self.jobs,
+                exclude=message.get("exclude", ()),
+                cache=cache,
+                use_ignore_files=message.get("use_ignore_files", True),
+                **_analysis_options(message),
+            )
+            return {"results": [[str(path), asdict(metrics)] for path, metrics in results]}
+        if op == "analyze_sources":
+            options = _analysis_options(message)
+            return {
+                "results": [
+                    [filename, asdict(analyze_source(source, filename, **options))]
+                    for filename, source in message["sources"]
+                ]
+            }
+        if op == "stats":
+            return {
+                "pid": os.getpid(),
+                "requests": self.requests,
+                "files": sum(len(cache) for cache in self._caches.values()),
+                "hits": sum(cache.hits for cache in self._caches.values()),
+                "misses": sum(cache.misses for cache in self._caches.values()),
+            }
+        if op == "shutdown":
+            # shutdown() blocks until serve_forever() returns, which it cannot do while this request is handled
+            threading.Thread(target=self.shutdown).start()
+            return {}
+        raise ValueError(f"Unknown operation {op!r}")
+
+
+def _analysis_options(message: dict[str, Any]) -> dict[str, Any]:
+    """Return the analysis options of a request, with defaults for missing ones."""
+    options = {name: message.get(name, default) for name, default in ANALYSIS_OPTIONS.items()}
+    options["ast_metrics"] = tuple(options["ast_metrics"])
+    return options
+
+
+def _variant(message: dict[str, Any]) -> tuple:
+    """Return the key of the cache holding metrics computed with the options of a request."""
+    return tuple(_analysis_options(message).values())
+
+
+def request(socket_path: Path, message: dict[str, Any], timeout: float | None = None) -> dict[str, Any]:
+    """
+    Send a request to a daemon and return its response.
+
+    Args:
+        socket_path: Path of the daemon's Unix domain socket
+        message: Request; see `AnalysisServer.dispatch`
+        timeout: Seconds to wait for the connection; the response is waited for indefinitely
+
+    Returns:
+        Response of the daemon
+
+    Raises:
+        OSError: If no daemon is listening on the socket, or the socket belongs to another user
+        ValueError: If the daemon could not answer the request
+    """
+    _check_owner(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout if timeout is not None else CONNECT_TIMEOUT)
+        sock.connect(str(socket_path))
+        sock.settimeout(None)
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile("rb") as file:
+            line = file.readline()
+    if not line:
+        raise ConnectionResetError(f"The pycole daemon on {socket_path} closed the connection")
+    response = json.loads(line)
+    if "error" in response:
+        raise ValueError(response["error"])
+    return response
+
+
+def analyze_paths_remote(
+    socket_path: Path,
+    paths: Iterable[Path],
+    exclude: Iterable[str] = (),
+    statement_mode: str = "ast",
+    ast_metrics: tuple[str, ...] = (),
+    line_mode: str = "fast",
+    use_ignore_files: bool = True,
+) -> list[tuple[Path, CodeMetrics]]:
+    """
+    Analyze files or directories with a daemon, like `analyze_paths`.
+
+    Args:
+        socket_path: Path of the daemon's Unix domain socket
+        paths: Files or directories to analyze
+        exclude: Glob patterns for files and directories to skip
+        statement_mode: Statement counter to use ('ast' or 'tokenize')
+        ast_metrics: AST metrics to compute in the same pass as the statements
+        line_mode: Code line classification to use ('fast' or 'accurate')
+        use_ignore_files: Skip what ignore files and the `[tool.pycole]` exclude list ignore
+
+    Returns:
+        `(path, metrics)` pairs, one per distinct path, in input order
+
+    Raises:
+        OSError: If no daemon is listening on the socket, or the socket belongs to another user
+        ValueError: If a path cannot be analyzed
+    """
+    paths = list(paths)
+    # The daemon runs in another working directory
+    by_absolute = {os.path.abspath(path): path for path in paths}
+    response = request(
+        socket_path,
+        {
+            "op": "analyze",
+            "paths": list(by_absolute),
+            "exclude": list(exclude),
+            "statement_mode": statement_mode,
+            "ast_metrics": list(ast_metrics),
+            "line_mode": line_mode,
+            "use_ignore_files": use_ignore_files,
+        },
+    )
+    return [(by_absolute[path], CodeMetrics(**metrics)) for path, metrics in response["results"]]
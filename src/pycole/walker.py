@@ -0,0 +1,131 @@
+"""Directory walker that yields Python files and prunes ignored trees."""
+
+import os
+import re
+from collections.abc import Iterable, Iterator
+from fnmatch import translate
+from pathlib import Path
+
+from .ignore import IgnoreMatcher, is_ignored
+
+# Directories that are never descended into
+SKIP_DIRS = frozenset({".venv", "venv", "__pycache__", ".git", "node_modules"})
+
+
+def compile_excludes(patterns: Iterable[str]) -> re.Pattern[str] | None:
+    """
+    Compile glob patterns into a single regular expression.
+
+    A pattern matches an entry if it matches either the entry name or its
+    path relative to the walk root (using forward slashes).
+
+    Args:
+        patterns: Glob patterns such as `build`, `*_pb2.py` or `docs/*`
+
+    Returns:
+        Compiled pattern, or None if no patterns were given
+    """
+    translated = [translate(pattern.rstrip("/")) for pattern in patterns if pattern]
+    if not translated:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in translated))
+
+
+def is_excluded(relpath: str, excluded: re.Pattern[str] | None, ignore: IgnoreMatcher | None = None) -> bool:
+    """
+    Check whether a file would be skipped by `iter_python_files`.
+
+    Args:
+        relpath: File path relative to the walk root, using forward slashes
+        excluded: Exclude patterns compiled with `compile_excludes`
+        ignore: Ignore rules of the walk root, or None to not apply ignore files
+
+    Returns:
+        True if the file or one of its parent directories is ignored or excluded
+    """
+    parts = relpath.split("/")
+    if any(part in SKIP_DIRS for part in parts[:-1]):
+        return True
+    if excluded is not None and any(
+        excluded.match(part) or excluded.match("/".join(parts[: index + 1])) for index, part in enumerate(parts)
+    ):
+        return True
+    return ignore is not None and ignore.is_ignored_path(relpath)
+
+
+def list_directory(
+    dirpath: str, relpath: str, excluded: re.Pattern[str] | None, ignore: IgnoreMatcher | None = None
+) -> tuple[list[str], list[tuple[str, str]]]:
+    """
+    List the Python files and walkable subdirectories of a single directory.
+
+    Args:
+        dirpath: Directory to list
+        relpath: Path of the directory relative to the walk root, empty for
+            the root itself and ending with a slash otherwise
+        excluded: Exclude patterns compiled with `compile_excludes`
+        ignore: Ignore rules of the walk root, or None to not apply ignore files
+
+    Returns:
+        Sorted Python file paths, and sorted `(path, relpath)` pairs of the
+        subdirectories that are not ignored or excluded
+    """
+    try:
+        with os.scandir(dirpath) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        return [], []
+
+    rules = () if ignore is None else ignore.rules(dirpath, relpath, {entry.name for entry in entries})
+    files = []
+    subdirs = []
+    for entry in entries:
+        name = entry.name
+        entry_relpath = f"{relpath}{name}"
+        if excluded is not None and (excluded.match(name) or excluded.match(entry_relpath)):
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if name not in SKIP_DIRS and not (rules and is_ignored(rules, entry_relpath, True)):
+                    subdirs.append((entry.path, f"{entry_relpath}/"))
+            elif name.endswith(".py") and entry.is_file() and not (rules and is_ignored(rules, entry_relpath, False)):
+                files.append(entry.path)
+        except OSError:
+            continue
+    return files, subdirs
+
+
+def iter_python_files(root: Path, exclude: Iterable[str] = (), use_ignore_files: bool = True) -> Iterator[Path]:
+    """
+    Lazily yield Python files under a directory in a deterministic order.
+
+    Ignored directories are pruned before they are opened, so nothing below
+    them is ever listed or stat'ed. Entries are visited in sorted order.
+    Symlinked directories are not followed.
+
+    Args:
+        root: Directory to walk
+        exclude: Glob patterns for files and directories to skip
+        use_ignore_files: Also skip what `.gitignore` and `.ignore` files and the
+            `[tool.pycole]` exclude list ignore (see `pycole.ignore.IgnoreMatcher`)
+
+    Returns:
+        Iterator of paths to `.py` files
+
+    Raises:
+        ValueError: If the pyproject.toml configuration is invalid
+    """
+    excluded = compile_excludes(exclude)
+    ignore = IgnoreMatcher(root) if use_ignore_files else None
+    return _walk(root, excluded, ignore)
+
+
+def _walk(root: Path, excluded: re.Pattern[str] | None, ignore: IgnoreMatcher | None) -> Iterator[Path]:
+    """Yield the Python files under a directory, depth first in sorted order."""
+    stack = [(str(root), "")]
+    while stack:
+        dirpath, relpath = stack.pop()
+        files, subdirs = list_directory(dirpath, relpath, excluded, ignore)
+        yield from map(Path, files)
+        # Reversed so that subdirectories are popped in sorted order
+        stack.extend(reversed(subdirs))
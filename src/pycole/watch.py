@@ -0,0 +1,289 @@
+"""Watch mode that keeps metrics up to date as files change."""
+
+import os
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from .analyzer import CodeMetrics
+from .astmetrics import MAX_METRICS
+from .ignore import IgnoreMatcher
+from .parallel import ParallelEngine
+from .walker import compile_excludes, list_directory
+
+
+@dataclass
+class WatchUpdate:
+    """Result of re-analyzing the files touched since the previous update."""
+
+    changed: list[Path]
+    removed: list[Path]
+    totals: CodeMetrics
+    elapsed: float  # Seconds spent re-analyzing and re-aggregating
+    latency: float  # Seconds between the first detected change and the updated totals
+
+
+class MetricsTable:
+    """Per-file metrics whose totals are updated incrementally."""
+
+    def __init__(self):
+        self._metrics: dict[str, CodeMetrics] = {}
+        self.totals = CodeMetrics(0, 0, 0, 0, 0)
+
+    def __len__(self) -> int:
+        return len(self._metrics)
+
+    def __contains__(self, filepath: str) -> bool:
+        return filepath in self._metrics
+
+    def set(self, filepath: str, metrics: CodeMetrics) -> None:
+        """Replace the contribution of a file to the totals."""
+        old = self._metrics.get(filepath)
+        self._metrics[filepath] = metrics
+        if old is not None:
+            self._subtract(old)
+        self.totals += metrics
+
+    def remove(self, filepath: str) -> None:
+        """Remove the contribution of a file from the totals."""
+        old = self._metrics.pop(filepath, None)
+        if old is not None:
+            self._subtract(old)
+
+    def _subtract(self, old: CodeMetrics) -> None:
+        """Subtract metrics that are no longer in the table from the totals."""
+        # Maxima cannot be subtracted, so they are recomputed if `old` may have held one
+        held = [name for name in MAX_METRICS if 0 < getattr(old, name) >= getattr(self.totals, name)]
+        maxima = {name: getattr(self.totals, name) for name in MAX_METRICS}
+        self.totals -= old
+        for name in MAX_METRICS:
+            if name in held:
+                maxima[name] = max((getattr(metrics, name) for metrics in self._metrics.values()), default=0)
+            setattr(self.totals, name, maxima[name])
+
+
+def _stat_key(path: str) -> tuple[int, int] | None:
+    """Return the modification time and size of a path, or None if it is gone."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class TreeWatcher:
+    """
+    Track the Python files under a directory and re-analyze only touched files.
+
+    Changes are detected by polling: every known file and directory is
+    stat'ed, and only directories whose mtime changed are listed again to
+    find added and removed entries. The tree is never walked again after
+    the initial scan.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        exclude: Iterable[str] = (),
+        jobs: int = 1,
+        statement_mode: str = "ast",
+        line_mode: str = "fast",
+        use_ignore_files: bool = True,
+    ):
+        """
+        Create a watcher.
+
+        Args:
+            root: Directory to watch
+            exclude: Glob patterns for files and directories to skip
+            jobs: Number of worker processes for the initial analysis
+            statement_mode: Statement counter to use ('ast' or 'tokenize')
+            line_mode: Code line classification to use ('fast' or 'accurate')
+            use_ignore_files: Skip what `.gitignore` and `.ignore` files and the `[tool.pycole]`
+                exclude list ignore; ignore files are read once, so later changes to them
+                only take effect after a restart
+        """
+        self.root = root
+        self.table = MetricsTable()
+        self._excluded = compile_excludes(exclude)
+        self._ignore = IgnoreMatcher(root) if use_ignore_files else None
+        self._jobs = jobs
+        self._statement_mode = statement_mode
+        self._line_mode = line_mode
+        self._files: dict[str, tuple[int, int] | None] = {}
+        self._dirs: dict[str, tuple[str, tuple[int, int] | None]] = {}
+
+    def _add_files(self, files: Iterable[str]) -> set[str]:
+        """Record the stat keys of files not seen before, returning them."""
+        added = set()
+        for filepath in files:
+            if filepath not in self._files:
+                self._files[filepath] = _stat_key(filepath)
+                added.add(filepath)
+        return added
+
+    def _scan(self, dirpath: str, relpath: str) -> set[str]:
+        """Record a directory and everything below it, returning the new files."""
+        added = set()
+        stack = [(dirpath, relpath)]
+        while stack:
+            dirpath, relpath = stack.pop()
+            self._dirs[dirpath] = (relpath, _stat_key(dirpath))
+            files, subdirs = list_directory(dirpath, relpath, self._excluded, self._ignore)
+            added |= self._add_files(files)
+            stack.extend(subdir for subdir in subdirs if subdir[0] not in self._dirs)
+        return added
+
+    def _analyze(self, files: Iterable[str], jobs: int = 1) -> set[str]:
+        """
+        Analyze files and replace their contributions to the totals.
+
+        A file that is deleted or cannot be read between the poll that found
+        it and its analysis is treated as removed: it is dropped from the
+        table and forgotten until its directory changes again.
+
+        Returns:
+            Paths of the files that could not be analyzed
+        """
+        pending = list(files)
+        failed: set[str] = set()
+        with ParallelEngine(jobs, statement_mode=self._statement_mode, line_mode=self._line_mode) as engine:
+            while pending:
+                done = 0
+                try:
+                    for filepath, metrics in engine.analyze(map(Path, pending)):
+                        self.table.set(str(filepath), metrics)
+                        done += 1
+                    break
+                except OSError as e:
+                    # Results are yielded in order, so the failing file is among those not yielded yet
+                    pending = pending[done:]
+                    gone = {path for path in pending if path == e.filename or _stat_key(path) is None} or {pending[0]}
+                    for path in gone:
+                        self.table.remove(path)
+                        self._files.pop(path, None)
+                    failed |= gone
+                    pending = [path for path in pending if path not in gone]
+        return failed
+
+    def start(self) -> CodeMetrics:
+        """Scan and analyze the whole tree once, returning the totals."""
+        self._analyze(sorted(self._scan(str(self.root), "")), jobs=self._jobs)
+        return self.table.totals
+
+    def poll(self) -> tuple[set[str], set[str]]:
+        """
+        Detect files that changed since the previous poll.
+
+        Stat keys are recorded before the files are analyzed, so a file that
+        changes again while it is being analyzed is reported by the next poll.
+
+        Returns:
+            Paths of added or modified files, and paths of removed files
+        """
+        changed: set[str] = set()
+        removed: set[str] = set()
+
+        for dirpath, (relpath, key) in list(self._dirs.items()):
+            if dirpath not in self._dirs:
+                continue  # Dropped together with a removed parent
+            new_key = _stat_key(dirpath)
+            if new_key is None:
+                removed |= self._drop_directory(dirpath)
+            elif new_key != key:
+                self._dirs[dirpath] = (relpath, new_key)
+                files, subdirs = list_directory(dirpath, relpath, self._excluded, self._ignore)
+                changed |= self._add_files(files)
+                for subdir, subdir_relpath in subdirs:
+                    if subdir not in self._dirs:
+                        changed |= self._scan(subdir, subdir_relpath)
+
+        for filepath, key in self._files.items():
+            if filepath in removed or filepath in changed:
+                continue
+            new_key = _stat_key(filepath)
+            if new_key is None:
+                removed.add(filepath)
+            elif new_key != key:
+                self._files[filepath] = new_key
+                changed.add(filepath)
+
+        for filepath in removed:
+            del self._files[filepath]
+        return changed - removed, removed
+
+    def _drop_directory(self, dirpath: str) -> set[str]:
+        """Forget a removed directory and everything below it, returning its files."""
+        prefix = os.path.join(dirpath, "")
+        for subdir in [subdir for subdir in self._dirs if subdir == dirpath or subdir.startswith(prefix)]:
+            del self._dirs[subdir]
+        return {filepath for filepath in self._files if filepath.startswith(prefix)}
+
+    def apply(self, changed: Iterable[str], removed: Iterable[str], detected_at: float | None = None) -> WatchUpdate:
+        """
+        Re-analyze changed files and update the totals incrementally.
+
+        Args:
+            changed: Paths of added or modified files
+            removed: Paths of removed files
+            detected_at: `time.monotonic()` timestamp of the first detected change
+
+        Returns:
+            The files that were updated, the new totals and timings
+        """
+        start = time.monotonic()
+        removed = sorted(removed)
+        for filepath in removed:
+            self.table.remove(filepath)
+        changed = sorted(changed)
+        # Files that vanished since the poll are reported as removed
+        failed = self._analyze(changed)
+        if failed:
+            changed = [filepath for filepath in changed if filepath not in failed]
+            removed = sorted({*removed, *failed})
+        end = time.monotonic()
+        return WatchUpdate(
+            changed=[Path(filepath) for filepath in changed],
+            removed=[Path(filepath) for filepath in removed],
+            totals=self.table.totals,
+            elapsed=end - start,
+            latency=end - (start if detected_at is None else detected_at),
+        )
+
+    def run(
+        self,
+        on_update: Callable[[WatchUpdate], None],
+        interval: float = 0.5,
+        debounce: float = 0.2,
+        should_stop: Callable[[], bool] = lambda: False,
+    ) -> None:
+        """
+        Poll for changes until `should_stop` returns True.
+
+        Bursts of changes (e.g. a git checkout) are collected until no new
+        change has been seen for `debounce` seconds, then applied at once.
+
+        Args:
+            on_update: Called with every applied update
+            interval: Seconds between polls while nothing is changing
+            debounce: Quiet period required before changes are applied
+            should_stop: Called before every poll to end the loop
+        """
+        changed: set[str] = set()
+        removed: set[str] = set()
+        first_change = last_change = None
+
+        while not should_stop():
+            new_changed, new_removed = self.poll()
+            now = time.monotonic()
+            if new_changed or new_removed:
+                changed = (changed - new_removed) | new_changed
+                removed = (removed - new_changed) | new_removed
+                first_change = first_change or now
+                last_change = now
+            elif last_change is not None and now - last_change >= debounce:
+                on_update(self.apply(changed, removed, detected_at=first_change))
+                changed, removed = set(), set()
+                first_change = last_change = None
+            time.sleep(interval if last_change is None else min(interval, debounce))
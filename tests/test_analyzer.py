@@ -1,18 +1,30 @@
 """Tests for the pycole analyzer module."""
 
 import tempfile
+import tokenize
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
 from pycole.analyzer import (
+    CodeMetrics,
     analyze_file,
     analyze_directory,
     analyze_path,
+    analyze_paths,
+    analyze_source,
+    analyze_sources,
+    count_lines,
+    count_lines_bytes,
     is_test_file,
     count_statements,
+    count_statements_and_code_lines,
+    count_statements_tokenize,
+    iter_file_metrics,
+    iter_source_metrics,
 )
+from pycole.astmetrics import AST_METRICS
 
 
 def test_is_test_file():
@@ -40,6 +52,143 @@ if __name__ == '__main__':
     assert statements > 0  # Should count function def, assignments, return, if, print
 
 
+def test_count_statements_tokenize_matches_ast():
+    """Test that the token-based counter agrees with the AST counter."""
+    code = """
+import os
+
+@decorator
+def hello(x: int) -> int:
+    \"\"\"Docstring.\"\"\"
+    if x: x += 1; x *= 2
+    elif x > 2:
+        pass
+    else:
+        f = lambda y: y
+    try:
+        return {"a": x}[x:]
+    except KeyError:
+        return 0
+    finally:
+        print(x)
+
+class Empty: pass
+
+match command:
+    case [action, obj]: print(action)
+    case _:
+        case = 1
+        match: int = case
+        case.attr = match
+"""
+    assert count_statements_tokenize(code) == count_statements(code) == 20
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "",
+        "\n",
+        "x = 1",
+        "x = 1\n\n  \t\n    # comment\n\tcode  # trailing\n  ",
+        "x = 1\r\n\r\n# c\r\ny = 2",
+        "x = 1\ry = 2\r\r# c",
+        "x = 1\x0c\n\x0b# c\x1c\x1d\x1e\x1f\n",
+        "s = 'é'\n\u00a0\n\u3000# c\n\ufeff# bom\n",
+        "a\u2028b\u2029\x85  # c\n",
+    ],
+)
+def test_count_lines_bytes_matches_count_lines(content):
+    """Test that the byte-level line counter agrees with the text-based one."""
+    assert count_lines_bytes(content.encode("utf-8")) == count_lines(content)
+
+
+def test_count_statements_tokenize_with_syntax_error():
+    """Test that the token-based counter returns 0 for code that cannot be tokenized."""
+    assert count_statements_tokenize("x = (1,\n") == 0
+    assert count_statements_tokenize("if x:\n        a\n    b\n") == 0
+
+
+def test_count_statements_and_code_lines():
+    """Test that docstrings, string-only statements and comments are not code lines, but strings in code are."""
+    code = '''"""Module
+docstring."""
+import os  # comment
+
+# comment
+x = """
+# not a comment
+
+"""
+
+
+def f(a):
+    """Doc."""
+    "string comment"; y = 1
+    return (a +
+            1)
+
+
+class C:
+    \'\'\'
+    doc
+    \'\'\' "implicitly concatenated"
+    z = "a" "b"
+    "x".join([])
+'''
+    # import, the 4 lines of x, def, y, return (2 lines), class, z and join
+    assert count_statements_and_code_lines(code) == (count_statements(code), 12)
+    assert count_lines(code) == (24, 16)
+
+    with pytest.raises(tokenize.TokenError):
+        count_statements_and_code_lines("x = (1,\n")
+
+
+def test_analyze_file_accurate_line_mode():
+    """Test that accurate line mode reclassifies the lines of code and test files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "module.py").write_text('"""Doc\n\nstring."""\nx = """\n# data\n"""\n')
+        (dirpath / "test_module.py").write_text('def test():\n    """Doc."""\n')
+        (dirpath / "broken.py").write_text('x = (1,\n"""\n')
+
+        fast = analyze_directory(dirpath)
+        accurate = analyze_directory(dirpath, line_mode="accurate")
+        assert (fast.code_lines, fast.test_code_lines) == (6, 2)
+        # Docstrings are dropped; the string in x is code, and broken.py keeps its byte-level count
+        assert (accurate.code_lines, accurate.test_code_lines) == (3 + 2, 1)
+        assert accurate.statements == fast.statements == 2
+        assert analyze_directory(dirpath, jobs=2, line_mode="accurate") == accurate
+
+
+def test_analyze_file_statement_modes():
+    """Test that both statement modes give the same metrics for valid code."""
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
+        f.write("def hello():\n    return 'world'\n\nx = hello(); y = x\n")
+        filepath = Path(f.name)
+
+    try:
+        assert analyze_file(filepath, statement_mode="tokenize") == analyze_file(filepath, statement_mode="ast")
+        assert analyze_file(filepath).statements == 4
+    finally:
+        filepath.unlink()
+
+
+def test_analyze_file_test_skips_statement_counting():
+    """Test that test files are never parsed."""
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False, prefix="test_") as f:
+        f.write("def test_example():\n    assert True\n")
+        filepath = Path(f.name)
+
+    try:
+        with patch("pycole.analyzer.ast.parse", side_effect=AssertionError("parsed")):
+            metrics = analyze_file(filepath)
+        assert metrics.test_lines == 2
+        assert metrics.statements == 0
+    finally:
+        filepath.unlink()
+
+
 def test_analyze_file_simple():
     """Test analyzing a simple Python file."""
     with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
@@ -167,6 +316,27 @@ def test_analyze_file_unicode_decode_error():
         filepath.unlink()
 
 
+def test_analyze_file_mmap_matches_read():
+    """Test that memory-mapped files give the same metrics as files read into memory."""
+    contents = {
+        "module.py": "x = 1\r\n\r\n# comment\r\ny = 'é'\n",
+        "test_module.py": "def test():\n    # é\n    assert True\n",
+        "empty.py": "",
+        "test_invalid.py": None,
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, content in contents.items():
+            filepath = Path(tmpdir) / name
+            filepath.write_bytes(b"x = 1\n\xff\n" if content is None else content.encode("utf-8"))
+
+            # A tiny chunk size makes multi-byte sequences span chunks
+            with patch("pycole.analyzer.LINE_CHUNK_SIZE", 3):
+                mapped = analyze_file(filepath, mmap_threshold=1)
+            assert mapped == analyze_file(filepath, mmap_threshold=0)
+            if content is None:
+                assert mapped.test_lines == 0
+
+
 def test_analyze_file_permission_error():
     """Test handling of files without read permissions."""
     with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
@@ -174,8 +344,8 @@ def test_analyze_file_permission_error():
         filepath = Path(f.name)
 
     try:
-        # Mock read_text to raise PermissionError
-        with patch.object(Path, "read_text", side_effect=PermissionError("Permission denied")):
+        # Mock open to raise PermissionError
+        with patch.object(Path, "open", side_effect=PermissionError("Permission denied")):
             metrics = analyze_file(filepath)
             assert metrics.total_lines == 0
             assert metrics.code_lines == 0
@@ -247,3 +417,124 @@ def test_analyze_path_with_invalid_path():
 
     with pytest.raises(ValueError, match="neither a file nor a directory"):
         analyze_path(invalid_path)
+
+
+def test_iter_file_metrics_directory():
+    """Test that per-file metrics are yielded for every Python file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "a.py").write_text("x = 1\n")
+        (dirpath / "test_b.py").write_text("def test_b():\n    assert True\n")
+
+        results = list(iter_file_metrics(dirpath))
+
+        assert [filepath.name for filepath, _ in results] == ["a.py", "test_b.py"]
+        assert results[0][1] == analyze_file(dirpath / "a.py")
+        assert results[1][1].test_lines == 2
+
+
+def test_iter_file_metrics_invalid_path():
+    """Test that an invalid path is reported before iteration starts."""
+    with pytest.raises(ValueError, match="neither a file nor a directory"):
+        iter_file_metrics(Path("/nonexistent/path"))
+
+
+def test_analyze_paths_counts_overlapping_files_once():
+    """Test that files reachable from several paths are counted towards the first one only."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "a" / "sub").mkdir(parents=True)
+        (dirpath / "b").mkdir()
+        (dirpath / "a" / "m.py").write_text("x = 1\n")
+        (dirpath / "a" / "sub" / "n.py").write_text("y = 2\nz = 3\n")
+        (dirpath / "b" / "test_b.py").write_text("def test_b():\n    assert True\n")
+        paths = [dirpath / "a" / "sub", dirpath / "a", dirpath / "b", dirpath / "a" / "sub" / "n.py", dirpath / "b"]
+
+        results = analyze_paths(paths, jobs=2)
+
+        assert [path for path, _ in results] == paths[:4]
+        assert [metrics.total_lines for _, metrics in results] == [2, 1, 2, 0]
+        assert sum(metrics.total_lines for _, metrics in results) == analyze_directory(dirpath).total_lines
+
+
+def test_analyze_paths_invalid_path():
+    """Test that an invalid path is reported before anything is analyzed."""
+    with pytest.raises(ValueError, match="neither a file nor a directory"):
+        analyze_paths([Path("/nonexistent/path")])
+
+
+def test_analyze_directory_ast_metrics():
+    """Test that AST metrics are computed for code files only and merged across files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "a.py").write_text("def f(x):\n    if x:\n        return 1\n    return 0\n")
+        (dirpath / "b.py").write_text("class C:\n    def g(self):\n        return 2\n")
+        (dirpath / "test_a.py").write_text("def test_f():\n    if True:\n        assert True\n")
+
+        metrics = analyze_directory(dirpath, ast_metrics=AST_METRICS)
+        assert (metrics.functions, metrics.classes, metrics.complexity) == (2, 1, 3)
+        assert (metrics.max_complexity, metrics.max_nesting) == (2, 2)
+        assert metrics.statements == analyze_directory(dirpath).statements
+        assert analyze_directory(dirpath, jobs=2, ast_metrics=AST_METRICS) == metrics
+        assert analyze_directory(dirpath).functions == 0
+
+
+def test_code_metrics_add_takes_max_of_max_metrics():
+    """Test that adding metrics sums counts but keeps the highest maxima."""
+    total = CodeMetrics(1, 1, 1, 0, 0, functions=1, max_complexity=5, max_nesting=1) + CodeMetrics(
+        2, 2, 2, 0, 0, functions=2, max_complexity=3, max_nesting=4
+    )
+    assert total == CodeMetrics(3, 3, 3, 0, 0, functions=3, max_complexity=5, max_nesting=4)
+
+
+def test_analyze_source_matches_analyze_file():
+    """Test that in-memory sources give the same metrics as files with the same content."""
+    contents = {
+        "module.py": b'"""Doc."""\r\nimport os\r\n\r\n# comment\r\ndef f():\r\n    return os.sep\r\n',
+        "test_module.py": b"def test_x():\n    assert True\n",
+        "broken.py": b"def f(:\n",
+        "latin1.py": b"x = '\xe9'\n",
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, data in contents.items():
+            filepath = Path(tmpdir) / name
+            filepath.write_bytes(data)
+            for options in [{}, {"line_mode": "accurate"}, {"ast_metrics": AST_METRICS}]:
+                expected = analyze_file(filepath, **options)
+                assert analyze_source(data, name, **options) == expected, (name, options)
+                if name != "latin1.py":
+                    assert analyze_source(data.decode(), filepath, **options) == expected, (name, options)
+
+    assert analyze_source("x = 1\n").statements == 1
+
+
+def test_iter_source_metrics_is_lazy():
+    """Test that sources are consumed one at a time, in input order."""
+    consumed = []
+
+    def sources():
+        for index in range(3):
+            consumed.append(index)
+            yield f"mod{index}.py", "x = 1\n" * (index + 1)
+
+    results = iter_source_metrics(sources())
+    assert next(results) == ("mod0.py", CodeMetrics(1, 1, 1, 0, 0))
+    assert consumed == [0]
+    assert [metrics.total_lines for _, metrics in results] == [2, 3]
+
+
+def test_analyze_sources_batch():
+    """Test that a batch of sources analyzed in a process pool matches analyzing them one by one."""
+    sources = [(f"pkg/{'test_' if index % 3 == 0 else ''}mod{index}.py", "x = 1\n" * index) for index in range(80)]
+
+    results = analyze_sources(sources, jobs=2)
+
+    assert results == [(name, analyze_source(source, name)) for name, source in sources]
+
+
+def test_package_exports_library_api():
+    """Test that the library API is importable from the package."""
+    import pycole  # pylint: disable=import-outside-toplevel
+
+    assert pycole.analyze_source is analyze_source
+    assert all(hasattr(pycole, name) for name in pycole.__all__)
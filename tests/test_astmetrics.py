@@ -0,0 +1,84 @@
+"""Tests for the pycole astmetrics module."""
+
+import ast
+
+import pytest
+
+from pycole.analyzer import count_statements
+from pycole.astmetrics import AST_METRICS, measure_tree, parse_metrics
+
+CODE = '''"""Module docstring."""
+
+
+class Greeter:
+    """
+    Class docstring
+    spanning lines.
+    """
+
+    def greet(self, name, loud=False):
+        """Greet someone."""
+        if not name or name == "?":
+            return None
+        elif loud:
+            name = name.upper() if name else name
+        else:
+            for part in [p for p in name.split() if p]:
+                while part:
+                    part = part[1:]
+
+        def nested():
+            try:
+                pass
+            except ValueError:
+                pass
+        return name
+
+
+async def fetch(items):
+    match items:
+        case [first]:
+            return first
+        case _:
+            assert items
+            return None
+'''
+
+
+def test_measure_tree_all_metrics():
+    """Test every metric on a module with classes, nested functions and branches."""
+    values = measure_tree(ast.parse(CODE))
+
+    assert values == {
+        "statements": count_statements(CODE),
+        "functions": 3,
+        "classes": 1,
+        # greet: 1 + if + or + elif + ifexp + for + comprehension (1 + 1 if) + while = 9
+        # nested: 1 + except = 2; fetch: 1 + 2 cases + assert = 4
+        "complexity": 15,
+        "max_complexity": 9,
+        # while body: class > def > if/elif/else > for > while > assignment
+        "max_nesting": 5,
+        "docstring_lines": 1 + 4 + 1,
+    }
+
+
+def test_measure_tree_only_requested_metrics():
+    """Test that only the requested metrics are returned, always with the statement count."""
+    values = measure_tree(ast.parse(CODE), ("classes",))
+
+    assert values == {"statements": count_statements(CODE), "classes": 1}
+
+
+def test_measure_tree_empty_module():
+    """Test that an empty module has no metrics."""
+    assert measure_tree(ast.parse("")) == {"statements": 0, **dict.fromkeys(AST_METRICS, 0)}
+
+
+def test_parse_metrics():
+    """Test parsing of metric lists."""
+    assert parse_metrics("all") == AST_METRICS
+    assert parse_metrics("max_nesting, functions") == ("functions", "max_nesting")
+    for value in ["", "lines", "all,functions"]:
+        with pytest.raises(ValueError, match="Invalid metrics"):
+            parse_metrics(value)
@@ -0,0 +1,71 @@
+"""Tests for the pycole benchmark helpers."""
+
+import tempfile
+from pathlib import Path
+
+from pycole.analyzer import analyze_directory, count_statements, is_test_file
+from pycole.bench import (
+    STARTUP_BUDGET_US,
+    CorpusSpec,
+    compare_results,
+    generate_corpus,
+    measure_import_time,
+    run_benchmark,
+)
+
+
+def test_generate_corpus_is_deterministic():
+    """Test that the same spec generates byte-identical, valid trees."""
+    spec = CorpusSpec(files=20, lines=50, comment_density=0.3, test_ratio=0.5, seed=7)
+    with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+        first_files = generate_corpus(Path(first), spec)
+        second_files = generate_corpus(Path(second), spec)
+
+        assert len(first_files) == 20
+        assert [path.relative_to(first) for path in first_files] == [path.relative_to(second) for path in second_files]
+        assert [path.read_bytes() for path in first_files] == [path.read_bytes() for path in second_files]
+        assert any(is_test_file(path) for path in first_files)
+        assert all(count_statements(path.read_text()) > 0 for path in first_files)
+
+
+def test_run_benchmark_reports_all_phases():
+    """Test that every phase is timed and the corpus totals are reported."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        generate_corpus(root, CorpusSpec(files=5, lines=30))
+
+        results = run_benchmark(root, repeat=1)
+
+        assert results["corpus"]["files"] == 5
+        assert results["corpus"]["metrics"]["total_lines"] == analyze_directory(root).total_lines
+        assert set(results["phases"]) == {
+            "walk",
+            "read",
+            "count_lines",
+            "count_lines_bytes",
+            "count_statements_ast",
+            "count_statements_tokenize",
+            "ast_metrics",
+            "count_statements_and_code_lines",
+            "aggregate",
+            "analyze_directory",
+        }
+        assert all(timing["min"] <= timing["median"] <= timing["max"] for timing in results["phases"].values())
+
+
+def test_compare_results():
+    """Test that only phases slower than the threshold are reported."""
+    baseline = {"phases": {"walk": {"min": 1.0}, "read": {"min": 1.0}}}
+    current = {"phases": {"walk": {"min": 1.05}, "read": {"min": 1.5}, "new_phase": {"min": 9.0}}}
+
+    assert compare_results(baseline, current, threshold=0.1) == {"read": 1.5}
+
+
+def test_cli_startup_import_time_within_budget():
+    """Test that importing the CLI only loads what a plain analysis needs, within the startup budget."""
+    times = measure_import_time("pycole.cli", repeat=3)
+
+    lazy = {"pycole.bench", "pycole.cache", "pycole.formatter", "pycole.gitdiff", "pycole.watch", "sqlite3"}
+    assert not lazy & times.keys()
+    assert "concurrent.futures.process" not in times
+    assert times["pycole.cli"] <= STARTUP_BUDGET_US
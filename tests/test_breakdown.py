@@ -0,0 +1,54 @@
+"""Tests for the pycole breakdown module."""
+
+from pathlib import Path
+
+import pytest
+
+from pycole.analyzer import CodeMetrics
+from pycole.breakdown import build_breakdown, iter_breakdown, parse_depth
+
+
+def _metrics(lines: int) -> CodeMetrics:
+    """Return non-test metrics with every field set to `lines`."""
+    return CodeMetrics(lines, lines, lines, 0, 0)
+
+
+def test_build_breakdown_sums_subtrees():
+    """Test that files are added to their directory and totals are summed bottom up."""
+    root = Path("/repo")
+    results = [
+        (root / "setup.py", _metrics(1)),
+        (root / "pkg" / "__init__.py", _metrics(2)),
+        (root / "pkg" / "sub" / "module.py", _metrics(4)),
+        (root / "pkg" / "sub" / "deep" / "module.py", _metrics(8)),
+        (root / "other" / "module.py", _metrics(16)),
+    ]
+
+    tree = build_breakdown(root, results, depth=2)
+    nodes = {str(node.path): node for node in iter_breakdown(tree)}
+
+    assert list(nodes) == ["/repo", "/repo/other", "/repo/pkg", "/repo/pkg/sub"]
+    assert nodes["/repo"].metrics == _metrics(31)
+    assert nodes["/repo"].files == 5
+    assert nodes["/repo/pkg"].metrics == _metrics(14)
+    assert nodes["/repo/pkg"].package
+    # Files below the maximum depth are added to their ancestor at that depth
+    assert nodes["/repo/pkg/sub"].metrics == _metrics(12)
+    assert not nodes["/repo/pkg/sub"].package
+    assert nodes["/repo/pkg/sub"].depth == 2
+
+
+def test_build_breakdown_depth_zero():
+    """Test that depth 0 only keeps the root."""
+    root = Path("/repo")
+    tree = build_breakdown(root, [(root / "a" / "b.py", _metrics(3))], depth=0)
+    assert tree.children == {}
+    assert tree.metrics == _metrics(3)
+
+
+def test_parse_depth():
+    """Test parsing of breakdown specs."""
+    assert parse_depth("depth=3") == 3
+    for value in ("3", "depth=", "depth=-1", "level=2"):
+        with pytest.raises(ValueError):
+            parse_depth(value)
@@ -0,0 +1,104 @@
+"""Tests for the pycole metrics cache."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from pycole.analyzer import analyze_directory, analyze_file, analyze_path, iter_file_metrics
+from pycole.cache import MetricsCache
+
+
+def test_cache_warm_run_skips_analysis():
+    """Test that unchanged files are not analyzed again."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cachedir:
+        dirpath = Path(tmpdir)
+        (dirpath / "module.py").write_text("def func():\n    return 42\n")
+        (dirpath / "test_module.py").write_text("def test_func():\n    assert True\n")
+
+        with MetricsCache(Path(cachedir)) as cache:
+            cold = analyze_directory(dirpath, cache=cache)
+
+        with MetricsCache(Path(cachedir)) as cache:
+            with patch("pycole.analyzer.analyze_file", side_effect=AssertionError("analyzed")):
+                warm = analyze_directory(dirpath, cache=cache)
+
+        assert warm == cold == analyze_directory(dirpath)
+
+
+def test_cache_detects_modified_files():
+    """Test that a modified file is analyzed again."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cachedir:
+        dirpath = Path(tmpdir)
+        filepath = dirpath / "module.py"
+        filepath.write_text("x = 1\n")
+
+        with MetricsCache(Path(cachedir)) as cache:
+            analyze_directory(dirpath, cache=cache)
+
+        filepath.write_text("x = 1\ny = 2\nz = 3\n")
+        with MetricsCache(Path(cachedir)) as cache:
+            metrics = analyze_directory(dirpath, cache=cache)
+
+        assert metrics.total_lines == 3
+
+
+def test_cache_touched_file_matches_by_hash():
+    """Test that a file with a new mtime but the same content is not analyzed once its hash is stored."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cachedir:
+        filepath = Path(tmpdir) / "module.py"
+        filepath.write_text("x = 1\n")
+
+        # New files are not hashed, the analyzer is the only reader on a cold run
+        with MetricsCache(Path(cachedir)) as cache:
+            with patch("pycole.cache.file_digest", side_effect=AssertionError("hashed")):
+                expected = analyze_path(filepath, cache=cache)
+
+        # The first stat change stores the hash
+        stat = filepath.stat()
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with MetricsCache(Path(cachedir)) as cache:
+            assert analyze_path(filepath, cache=cache) == expected
+
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        with MetricsCache(Path(cachedir)) as cache:
+            with patch("pycole.analyzer.analyze_file", side_effect=AssertionError("analyzed")):
+                assert analyze_path(filepath, cache=cache) == expected
+
+
+def test_cache_evicts_deleted_files():
+    """Test that entries for deleted files are removed."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cachedir:
+        dirpath = Path(tmpdir)
+        (dirpath / "keep.py").write_text("x = 1\n")
+        (dirpath / "gone.py").write_text("y = 2\n")
+
+        with MetricsCache(Path(cachedir)) as cache:
+            analyze_directory(dirpath, cache=cache)
+
+        (dirpath / "gone.py").unlink()
+        with MetricsCache(Path(cachedir)) as cache:
+            metrics = analyze_directory(dirpath, cache=cache)
+            remaining = cache._load(None)  # pylint: disable=protected-access
+
+        assert metrics == analyze_file(dirpath / "keep.py")
+        assert list(remaining) == [os.path.abspath(dirpath / "keep.py")]
+
+
+def test_cache_preserves_input_order():
+    """Test that hits and misses come out in discovery order, like an uncached run."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cachedir:
+        dirpath = Path(tmpdir)
+        for index in range(1, 5):
+            (dirpath / f"m{index}.py").write_text(f"x = {index}\n")
+
+        with MetricsCache(Path(cachedir)) as cache:
+            list(iter_file_metrics(dirpath, cache=cache))
+
+        (dirpath / "m0.py").write_text("new = 0\n")
+        (dirpath / "m2.py").write_text("x = 2\ny = 2\n")
+        with MetricsCache(Path(cachedir)) as cache:
+            assert list(iter_file_metrics(dirpath, cache=cache)) == list(iter_file_metrics(dirpath))
+        with MetricsCache(Path(cachedir)) as cache, patch("pycole.cache.PENDING_LIMIT", 2):
+            (dirpath / "m3.py").write_text("x = 3\ny = 3\n")
+            assert list(iter_file_metrics(dirpath, cache=cache)) == list(iter_file_metrics(dirpath))
@@ -0,0 +1,159 @@
+"""Tests for the pycole checkpoint module."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from pycole.analyzer import analyze_directory, analyze_file, iter_file_metrics
+from pycole.checkpoint import Checkpoint
+
+
+def _write_tree(dirpath: Path, count: int) -> None:
+    """Write `count` modules of different sizes."""
+    for index in range(count):
+        (dirpath / f"mod_{index}.py").write_text("# comment\n" + "x = 1\n" * (index + 1))
+
+
+def test_checkpoint_resume_matches_uninterrupted_run():
+    """Test that a run resumed after an interruption analyzes only the remaining files, with the same totals."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as checkpointdir:
+        dirpath = Path(tmpdir)
+        _write_tree(dirpath, 10)
+        checkpoint_file = Path(checkpointdir) / "run.ckpt"
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            results = iter_file_metrics(dirpath, checkpoint=checkpoint)
+            for _ in range(4):
+                next(results)
+            results.close()
+
+        analyzed = []
+
+        def tracking_analyze_file(filepath, *args):
+            analyzed.append(filepath)
+            return analyze_file(filepath, *args)
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            assert checkpoint.resumed == 4
+            with patch("pycole.analyzer.analyze_file", side_effect=tracking_analyze_file):
+                resumed = analyze_directory(dirpath, checkpoint=checkpoint)
+
+        assert len(analyzed) == 6
+        assert resumed == analyze_directory(dirpath)
+
+
+def test_checkpoint_preserves_input_order():
+    """Test that recorded and newly analyzed files are yielded in walk order."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as checkpointdir:
+        dirpath = Path(tmpdir)
+        _write_tree(dirpath, 6)
+        checkpoint_file = Path(checkpointdir) / "run.ckpt"
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            list(checkpoint.analyze_files(sorted(dirpath.glob("mod_[024].py")), _analyze))
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            files = sorted(dirpath.glob("*.py"))
+            assert list(checkpoint.analyze_files(files, _analyze)) == list(_analyze(files))
+
+
+def test_checkpoint_reanalyzes_changed_files():
+    """Test that a file modified since it was recorded is analyzed again."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as checkpointdir:
+        dirpath = Path(tmpdir)
+        filepath = dirpath / "module.py"
+        filepath.write_text("x = 1\n")
+        checkpoint_file = Path(checkpointdir) / "run.ckpt"
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            analyze_directory(dirpath, checkpoint=checkpoint)
+
+        filepath.write_text("x = 1\ny = 2\n")
+        with Checkpoint(checkpoint_file) as checkpoint:
+            assert analyze_directory(dirpath, checkpoint=checkpoint).total_lines == 2
+
+
+def test_checkpoint_ignores_truncated_record():
+    """Test that a record cut off by an interruption is ignored and the file analyzed again."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as checkpointdir:
+        dirpath = Path(tmpdir)
+        _write_tree(dirpath, 3)
+        checkpoint_file = Path(checkpointdir) / "run.ckpt"
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            expected = analyze_directory(dirpath, checkpoint=checkpoint)
+        with checkpoint_file.open("rb+") as file:
+            file.truncate(os.path.getsize(checkpoint_file) - 5)
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            assert checkpoint.resumed == 2
+            assert analyze_directory(dirpath, checkpoint=checkpoint) == expected
+        with Checkpoint(checkpoint_file) as checkpoint:
+            assert checkpoint.resumed == 3
+
+
+def test_checkpoint_drops_torn_record_before_appending():
+    """Test that records written after a torn last line start on a line of their own."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as checkpointdir:
+        dirpath = Path(tmpdir)
+        _write_tree(dirpath, 3)
+        checkpoint_file = Path(checkpointdir) / "run.ckpt"
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            expected = analyze_directory(dirpath, checkpoint=checkpoint)
+        lines = checkpoint_file.read_text(encoding="utf-8").splitlines(keepends=True)
+        with checkpoint_file.open("rb+") as file:
+            file.truncate(os.path.getsize(checkpoint_file) - len(lines[-1]) // 2)
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            assert checkpoint.resumed == 2
+            assert analyze_directory(dirpath, checkpoint=checkpoint) == expected
+        assert sorted(checkpoint_file.read_text(encoding="utf-8").splitlines(keepends=True)) == sorted(lines)
+
+        with Checkpoint(checkpoint_file) as checkpoint, patch("pycole.analyzer.analyze_file") as analyze:
+            assert checkpoint.resumed == 3
+            assert analyze_directory(dirpath, checkpoint=checkpoint) == expected
+            analyze.assert_not_called()
+
+
+def test_checkpoint_discarded_when_corrupt():
+    """Test that a checkpoint with an unparsable record is discarded and the analysis started over."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as checkpointdir:
+        dirpath = Path(tmpdir)
+        _write_tree(dirpath, 3)
+        checkpoint_file = Path(checkpointdir) / "run.ckpt"
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            expected = analyze_directory(dirpath, checkpoint=checkpoint)
+        lines = checkpoint_file.read_text().splitlines(keepends=True)
+        lines[2] = "garbage" + lines[2]
+        checkpoint_file.write_text("".join(lines))
+
+        with Checkpoint(checkpoint_file) as checkpoint:
+            assert checkpoint.resumed == 0
+            assert analyze_directory(dirpath, checkpoint=checkpoint) == expected
+        with Checkpoint(checkpoint_file) as checkpoint:
+            assert checkpoint.resumed == 3
+
+
+def test_checkpoint_discarded_for_other_settings():
+    """Test that a checkpoint written with other analysis settings is not used."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as checkpointdir:
+        dirpath = Path(tmpdir)
+        _write_tree(dirpath, 3)
+        checkpoint_file = Path(checkpointdir) / "run.ckpt"
+
+        with Checkpoint(checkpoint_file, variant="ast,fast") as checkpoint:
+            analyze_directory(dirpath, checkpoint=checkpoint)
+
+        with Checkpoint(checkpoint_file, variant="tokenize,fast") as checkpoint:
+            assert checkpoint.resumed == 0
+        with Checkpoint(checkpoint_file, variant="tokenize,fast") as checkpoint:
+            assert checkpoint.resumed == 0
+
+
+def _analyze(files):
+    """Analyze files serially."""
+    for filepath in files:
+        yield filepath, analyze_file(filepath)
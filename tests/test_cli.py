@@ -2,12 +2,14 @@
 
 # pylint: disable=duplicate-code
 
+import json
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
 from click.testing import CliRunner
 
+from pycole import cache, cli
 from pycole.cli import main
 
 
@@ -149,3 +151,302 @@ def test_cli_format_option_case_insensitive():
         assert "path,total_lines,code_lines,statements,test_lines,test_code_lines" in result.output
     finally:
         filepath.unlink()
+
+
+def test_cli_jobs_option():
+    """Test that the jobs option does not change the reported metrics."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "module.py").write_text("def func():\n    return 42\n")
+
+        serial = runner.invoke(main, [str(dirpath), "--format", "csv", "--jobs", "1"])
+        parallel = runner.invoke(main, [str(dirpath), "--format", "csv", "--jobs", "4"])
+        assert serial.exit_code == 0
+        assert parallel.exit_code == 0
+        assert serial.output == parallel.output
+
+
+def test_cli_exclude_option():
+    """Test that excluded files are not counted."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "module.py").write_text("x = 1\n")
+        (dirpath / "generated_pb2.py").write_text("y = 2\nz = 3\n")
+
+        result = runner.invoke(main, [str(dirpath), "--format", "csv", "--exclude", "*_pb2.py"])
+        assert result.exit_code == 0
+        assert result.output.strip().endswith(",1,1,1,0,0")
+
+
+def test_cli_cache_dir_option():
+    """Test that cached runs report the same metrics as uncached runs."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cachedir:
+        dirpath = Path(tmpdir)
+        (dirpath / "module.py").write_text("def func():\n    return 42\n")
+
+        uncached = runner.invoke(main, [str(dirpath), "--format", "csv"])
+        cold = runner.invoke(main, [str(dirpath), "--format", "csv", "--cache-dir", cachedir])
+        warm = runner.invoke(main, [str(dirpath), "--format", "csv", "--cache-dir", cachedir])
+        assert cold.exit_code == 0
+        assert uncached.output == cold.output == warm.output
+        assert (Path(cachedir) / "metrics.sqlite").exists()
+
+
+def test_cli_per_file_jsonl():
+    """Test that per-file mode prints one record per file and a total."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "a.py").write_text("x = 1\n")
+        (dirpath / "b.py").write_text("y = 2\nz = 3\n")
+
+        result = runner.invoke(main, [str(dirpath), "--per-file", "--format", "jsonl"])
+        assert result.exit_code == 0
+        lines = result.output.strip().splitlines()
+        assert len(lines) == 3
+        assert '"total": true' in lines[-1]
+        assert '"total_lines": 3' in lines[-1]
+
+
+def test_cli_per_file_csv():
+    """Test that per-file CSV output has a header, file rows and a total row."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "a.py").write_text("x = 1\n")
+
+        result = runner.invoke(main, [str(dirpath), "--per-file", "--format", "csv"])
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            "path,total_lines,code_lines,statements,test_lines,test_code_lines",
+            f"{dirpath / 'a.py'},1,1,1,0,0",
+            f"{dirpath},1,1,1,0,0",
+        ]
+
+
+def test_cli_since_requires_git_repository():
+    """Test that --since outside a git repository reports an error."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "a.py").write_text("x = 1\n")
+
+        result = runner.invoke(main, [tmpdir, "--since", "HEAD"])
+        assert result.exit_code == 1
+        assert "Error:" in result.output
+
+
+def test_cli_explicit_analyze_command():
+    """Test that `analyze` can be named explicitly."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "a.py").write_text("x = 1\n")
+
+        implicit = runner.invoke(main, [tmpdir, "--format", "csv"])
+        explicit = runner.invoke(main, ["analyze", tmpdir, "--format", "csv"])
+        assert explicit.exit_code == 0
+        assert explicit.output == implicit.output
+
+
+def test_cli_analyze_path_named_like_command():
+    """Test that a directory named like a command is analyzed through `analyze` or a relative path."""
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        Path("bench").mkdir()
+        Path("bench", "a.py").write_text("x = 1\n")
+
+        explicit = runner.invoke(main, ["analyze", "bench", "--format", "csv"])
+        relative = runner.invoke(main, ["./bench", "--format", "csv"])
+        assert explicit.exit_code == 0
+        assert relative.exit_code == 0
+        assert "total_lines" in explicit.output
+        assert explicit.output.splitlines()[1:] == relative.output.splitlines()[1:]
+
+
+def test_cli_bench_writes_json_and_compares():
+    """Test the bench command output and regression check."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output = Path(tmpdir) / "bench.json"
+        args = ["bench", "--files", "3", "--lines", "20", "--repeat", "1"]
+        result = runner.invoke(main, [*args, "--output", str(output)])
+        assert result.exit_code == 0
+        results = json.loads(output.read_text())
+        assert results["corpus"]["spec"]["files"] == 3
+
+        # A baseline that is infinitely fast makes every phase a regression
+        for timing in results["phases"].values():
+            timing["min"] = 1e-12
+        baseline = Path(tmpdir) / "baseline.json"
+        baseline.write_text(json.dumps(results))
+        result = runner.invoke(main, [*args, "--compare", str(baseline)])
+        assert result.exit_code == 1
+        assert "Regression:" in result.output
+
+
+def test_cli_profile_report():
+    """Test that --profile prints a report to stderr and --profile-json writes JSON."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "a.py").write_text("x = 1\n")
+        report_path = dirpath / "profile.json"
+
+        result = runner.invoke(main, [str(dirpath), "--format", "csv", "--profile", "--profile-json", str(report_path)])
+        assert result.exit_code == 0
+        assert result.stdout.splitlines()[-1] == f"{dirpath},1,1,1,0,0"
+        assert "pycole profile" in result.stderr
+        report = json.loads(report_path.read_text())
+        assert report["files"] == 1
+        assert "format" in report["phases"]
+
+
+def test_cli_breakdown():
+    """Test the per-directory breakdown and its option validation."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "pkg").mkdir()
+        (dirpath / "pkg" / "a.py").write_text("x = 1\n")
+
+        result = runner.invoke(main, [str(dirpath), "--breakdown", "depth=1", "--format", "csv"])
+        assert result.exit_code == 0
+        assert result.output.splitlines()[1:] == [f"{dirpath},0,0,1,1,1,1,0,0", f"{dirpath / 'pkg'},1,0,1,1,1,1,0,0"]
+
+        result = runner.invoke(main, [str(dirpath), "--breakdown", "1"])
+        assert result.exit_code == 2
+        result = runner.invoke(main, [str(dirpath), "--breakdown", "depth=1", "--per-file"])
+        assert result.exit_code == 2
+
+
+def test_cli_multiple_paths():
+    """Test that several paths are reported separately, followed by the grand total."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        for name in ["a", "b", "c"]:
+            (dirpath / name).mkdir()
+            (dirpath / name / "m.py").write_text("x = 1\n")
+        paths_file = dirpath / "paths.txt"
+        paths_file.write_text(f"# repositories\n{dirpath / 'c'}\n\n{dirpath / 'a'}\n")
+
+        args = [str(dirpath / "a"), str(dirpath / "b"), "--paths-from", str(paths_file), "--format", "csv"]
+        result = runner.invoke(main, args)
+        assert result.exit_code == 0
+        assert result.output.splitlines()[1:] == [
+            f"{dirpath / 'a'},1,1,1,0,0",
+            f"{dirpath / 'b'},1,1,1,0,0",
+            f"{dirpath / 'c'},1,1,1,0,0",
+            "total,3,3,3,0,0",
+        ]
+
+        result = runner.invoke(main, [str(dirpath / "a"), str(dirpath / "b"), "--per-file"])
+        assert result.exit_code == 2
+        paths_file.write_text(f"{dirpath / 'missing'}\n")
+        result = runner.invoke(main, ["--paths-from", str(paths_file)])
+        assert result.exit_code == 2
+
+
+def test_cli_ast_metrics():
+    """Test that requested AST metrics are reported and validated."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "m.py").write_text("class C:\n    def f(self, x):\n        return x or 1\n")
+
+        result = runner.invoke(main, [str(dirpath), "--metrics", "classes,complexity", "--format", "csv"])
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            "path,total_lines,code_lines,statements,test_lines,test_code_lines,classes,complexity",
+            f"{dirpath},3,3,3,0,0,1,2",
+        ]
+
+        result = runner.invoke(main, [str(dirpath), "--metrics", "all"])
+        assert result.exit_code == 0
+        assert "Highest function complexity:" in result.output
+
+        result = runner.invoke(main, [str(dirpath), "--metrics", "lines"])
+        assert result.exit_code == 2
+        result = runner.invoke(main, [str(dirpath), "--metrics", "all", "--watch"])
+        assert result.exit_code == 2
+
+
+def test_cli_line_mode():
+    """Test that accurate line mode does not count docstrings as code lines."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "m.py").write_text('"""Module\ndocstring."""\nx = 1\n')
+
+        result = runner.invoke(main, [str(dirpath), "--format", "csv"])
+        assert result.output.splitlines()[1] == f"{dirpath},3,3,2,0,0"
+        result = runner.invoke(main, [str(dirpath), "--format", "csv", "--line-mode", "accurate"])
+        assert result.exit_code == 0
+        assert result.output.splitlines()[1] == f"{dirpath},3,1,2,0,0"
+
+
+def test_cli_no_ignore():
+    """Test that ignored files are skipped unless --no-ignore is given."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "build").mkdir()
+        (dirpath / "build" / "copy.py").write_text("x = 1\n")
+        (dirpath / "m.py").write_text("x = 1\n")
+        (dirpath / ".gitignore").write_text("build/\n")
+
+        result = runner.invoke(main, [str(dirpath), "--format", "csv"])
+        assert result.output.splitlines()[1] == f"{dirpath},1,1,1,0,0"
+        result = runner.invoke(main, [str(dirpath), "--format", "csv", "--no-ignore"])
+        assert result.output.splitlines()[1] == f"{dirpath},2,2,2,0,0"
+
+        (dirpath / "pyproject.toml").write_text("[tool.pycole]\nexclude = 1\n")
+        result = runner.invoke(main, [str(dirpath)])
+        assert result.exit_code == 1
+        assert "exclude must be a list of strings" in result.output
+
+
+def test_cli_default_cache_dir_matches_cache_module():
+    """Test that the CLI's copy of the default cache directory matches the cache module."""
+    assert cli.DEFAULT_CACHE_DIR == cache.DEFAULT_CACHE_DIR
+
+
+def test_cli_checkpoint():
+    """Test that a rerun with --checkpoint resumes from the recorded files with the same output."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as checkpointdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "a.py").write_text("x = 1\n")
+        (dirpath / "b.py").write_text("# comment\ny = 2\n")
+        checkpoint_file = Path(checkpointdir) / "run.ckpt"
+
+        args = [str(dirpath), "--format", "csv", "--checkpoint", str(checkpoint_file)]
+        first = runner.invoke(main, args)
+        assert first.exit_code == 0
+        assert "Resuming" not in first.output
+        second = runner.invoke(main, args)
+        assert second.exit_code == 0
+        assert "2 files already analyzed" in second.stderr
+        assert second.stdout == first.stdout == runner.invoke(main, args[:3]).stdout
+
+        result = runner.invoke(main, [str(dirpath), "--checkpoint", str(checkpoint_file), "--watch"])
+        assert result.exit_code == 2
+        assert "--checkpoint cannot be combined" in result.output
@@ -0,0 +1,90 @@
+"""Tests for the reuse of metrics of byte-identical files."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from pycole.analyzer import analyze_directory, analyze_file, analyze_paths, iter_file_metrics
+from pycole.cli import main
+from pycole.dedup import Deduplicator
+
+MODULE = "def f():\n    return 1\n"
+
+
+def _make_tree(root: Path) -> None:
+    (root / "pkg").mkdir()
+    (root / "vendored").mkdir()
+    (root / "tests").mkdir()
+    (root / "pkg" / "a.py").write_text(MODULE)
+    (root / "pkg" / "same_size.py").write_text(MODULE.replace("1", "2"))
+    (root / "pkg" / "__init__.py").write_text("")
+    (root / "vendored" / "__init__.py").write_text("")
+    (root / "vendored" / "a.py").write_text(MODULE)
+    (root / "vendored" / "b.py").write_text(MODULE)
+    (root / "tests" / "test_a.py").write_text(MODULE)
+
+
+def test_copies_are_analyzed_once():
+    """Test that copies reuse the metrics of the first file with their content, in input order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _make_tree(root)
+        expected = list(iter_file_metrics(root))
+        dedup = Deduplicator(report=True)
+        analyzed = []
+
+        def counting_analyze_file(filepath, *args, **kwargs):
+            analyzed.append(filepath)
+            return analyze_file(filepath, *args, **kwargs)
+
+        with patch("pycole.analyzer.analyze_file", side_effect=counting_analyze_file):
+            results = list(iter_file_metrics(root, dedup=dedup))
+
+        assert results == expected
+        # Both copies of a.py and the second __init__.py are reused, the test copy is analyzed as a test
+        assert len(analyzed) == len(expected) - 3
+        assert (dedup.files_reused, dedup.bytes_reused) == (3, 2 * len(MODULE))
+        groups = dedup.duplicate_groups()
+        assert [(group.size, len(group.files)) for group in groups] == [(len(MODULE), 4), (0, 2)]
+        assert sorted(path.relative_to(root).as_posix() for path in groups[0].files) == [
+            "pkg/a.py",
+            "tests/test_a.py",
+            "vendored/a.py",
+            "vendored/b.py",
+        ]
+
+
+def test_dedup_across_paths_and_jobs():
+    """Test that copies are reused across the paths of a run and with a process pool."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _make_tree(root)
+        paths = [root / "pkg", root / "vendored"]
+        dedup = Deduplicator()
+
+        assert analyze_paths(paths, dedup=dedup) == analyze_paths(paths)
+        assert dedup.files_reused == 3
+        assert not dedup.duplicate_groups()
+
+        with patch("pycole.parallel.SERIAL_THRESHOLD", 1), patch("pycole.parallel.BATCH_SIZE", 2):
+            assert analyze_directory(root, jobs=2, dedup=Deduplicator()) == analyze_directory(root)
+
+
+def test_cli_duplicates_report():
+    """Test that --duplicates prints the groups of copies without changing the metrics."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _make_tree(root)
+        runner = CliRunner()
+
+        expected = runner.invoke(main, [str(root), "--format", "csv", "--no-dedup"])
+        result = runner.invoke(main, [str(root), "--format", "csv", "--duplicates"])
+        assert result.exit_code == 0
+        assert result.stdout == expected.stdout
+        assert "4 copies of 2 files; 3 reused their metrics" in result.stderr
+        assert str(root / "vendored" / "b.py") in result.stderr
+
+        result = runner.invoke(main, [str(root), "--duplicates", "--no-dedup"])
+        assert result.exit_code == 2
@@ -1,9 +1,20 @@
 """Tests for the formatter module."""
 
+import csv
+import json
 from pathlib import Path
 from dataclasses import dataclass
 
-from pycole.formatter import format_metrics_output, format_metrics_csv
+from pycole.analyzer import CodeMetrics
+from pycole.breakdown import build_breakdown
+from pycole.formatter import (
+    format_breakdown_output,
+    format_csv_row,
+    format_metrics_output,
+    format_metrics_csv,
+    format_paths_output,
+    iter_per_file_output,
+)
 
 
 @dataclass
@@ -127,3 +138,153 @@ class TestFormatMetricsCsv:
         lines = result.strip().split("\n")
         assert len(lines) == 2
         assert "main.py,50,40,15,0,0" in result
+
+
+class TestIterPerFileOutput:
+    """Tests for iter_per_file_output function."""
+
+    RESULTS = [
+        (Path("pkg/a.py"), CodeMetrics(10, 8, 5, 0, 0)),
+        (Path("pkg/test_a.py"), CodeMetrics(6, 0, 0, 6, 4)),
+    ]
+
+    def test_csv_rows_and_total(self):
+        """Test that CSV output has a header, one row per file and a total row."""
+        lines = list(iter_per_file_output(Path("pkg"), iter(self.RESULTS), "csv"))
+
+        assert lines == [
+            "path,total_lines,code_lines,statements,test_lines,test_code_lines",
+            "pkg/a.py,10,8,5,0,0",
+            "pkg/test_a.py,6,0,0,6,4",
+            "pkg,16,8,5,6,4",
+        ]
+
+    def test_jsonl_records_and_total(self):
+        """Test that JSONL output has one record per file and a marked total record."""
+        records = [json.loads(line) for line in iter_per_file_output(Path("pkg"), iter(self.RESULTS), "jsonl")]
+
+        assert len(records) == 3
+        assert records[0] == {
+            "path": "pkg/a.py",
+            "total_lines": 10,
+            "code_lines": 8,
+            "statements": 5,
+            "test_lines": 0,
+            "test_code_lines": 0,
+        }
+        assert "total" not in records[1]
+        assert records[2]["total"] is True
+        assert records[2]["total_lines"] == 16
+
+    def test_text_rows_and_summary(self):
+        """Test that text output has one row per file and the summary block."""
+        lines = list(iter_per_file_output(Path("pkg"), iter(self.RESULTS), "text"))
+
+        assert len(lines) == 4
+        assert lines[1].endswith("  pkg/a.py")
+        assert "Total lines of code:                            16" in lines[-1]
+
+    def test_extra_metrics_columns(self):
+        """Test that requested AST metrics are appended as columns in every format."""
+        results = [(Path("pkg/a.py"), CodeMetrics(10, 8, 5, 0, 0, functions=2, max_nesting=3))]
+
+        csv_lines = list(iter_per_file_output(Path("pkg"), iter(results), "csv", ("functions", "max_nesting")))
+        assert csv_lines[0].endswith(",test_code_lines,functions,max_nesting")
+        assert csv_lines[1] == "pkg/a.py,10,8,5,0,0,2,3"
+
+        record = json.loads(next(iter_per_file_output(Path("pkg"), iter(results), "jsonl", ("functions",))))
+        assert list(record)[-1] == "functions"
+        assert record["functions"] == 2
+        assert "max_nesting" not in record
+
+        text_lines = list(iter_per_file_output(Path("pkg"), iter(results), "text", ("functions",)))
+        assert text_lines[0].endswith("     funcs  path")
+        assert text_lines[1].endswith("          2  pkg/a.py")
+        assert "Number of functions:                             2 (excl. tests)" in text_lines[-1]
+
+    def test_output_is_streamed(self):
+        """Test that records are produced before the input is exhausted."""
+
+        def results():
+            yield self.RESULTS[0]
+            raise AssertionError("consumed too far")
+
+        lines = iter_per_file_output(Path("pkg"), results(), "jsonl")
+
+        assert json.loads(next(lines))["path"] == "pkg/a.py"
+
+
+class TestFormatBreakdownOutput:
+    """Tests for format_breakdown_output function."""
+
+    root = Path("/repo")
+    results = [
+        (root / "pkg" / "__init__.py", CodeMetrics(2, 1, 1, 0, 0)),
+        (root / "pkg" / "tests" / "test_a.py", CodeMetrics(5, 0, 0, 5, 4)),
+    ]
+
+    def test_csv_rows(self):
+        """Test that every directory is a CSV row in depth-first order."""
+        tree = build_breakdown(self.root, self.results, depth=2)
+        assert format_breakdown_output(tree, "csv").splitlines() == [
+            "path,depth,package,files,total_lines,code_lines,statements,test_lines,test_code_lines",
+            "/repo,0,0,2,7,1,1,5,4",
+            "/repo/pkg,1,1,2,7,1,1,5,4",
+            "/repo/pkg/tests,2,0,1,5,0,0,5,4",
+        ]
+
+    def test_jsonl_records(self):
+        """Test that every directory is a JSON record."""
+        tree = build_breakdown(self.root, self.results, depth=1)
+        records = [json.loads(line) for line in format_breakdown_output(tree, "jsonl").splitlines()]
+        assert [record["path"] for record in records] == ["/repo", "/repo/pkg"]
+        assert records[1]["package"] is True
+        assert records[1]["test_lines"] == 5
+
+    def test_text_tree(self):
+        """Test that the text output indents directories by depth."""
+        tree = build_breakdown(self.root, self.results, depth=2)
+        lines = format_breakdown_output(tree, "text").splitlines()
+        assert lines[0].split()[:2] == ["files", "total"]
+        assert lines[1].endswith("  /repo")
+        assert lines[2].endswith("    pkg/ (package)")
+        assert lines[3].endswith("      tests/")
+
+
+class TestFormatPathsOutput:
+    """Tests for format_paths_output function."""
+
+    results = [
+        (Path("/repo_a"), CodeMetrics(3, 2, 2, 0, 0)),
+        (Path("/repo_b"), CodeMetrics(5, 1, 1, 4, 3)),
+    ]
+
+    def test_csv_rows_and_total(self):
+        """Test that every path is a CSV row, followed by the grand total."""
+        assert format_paths_output(self.results, "csv").splitlines() == [
+            "path,total_lines,code_lines,statements,test_lines,test_code_lines",
+            "/repo_a,3,2,2,0,0",
+            "/repo_b,5,1,1,4,3",
+            "total,8,3,3,4,3",
+        ]
+
+    def test_jsonl_records_and_total(self):
+        """Test that the grand total is marked as a total record."""
+        records = [json.loads(line) for line in format_paths_output(self.results, "jsonl").splitlines()]
+        assert [record["path"] for record in records] == ["/repo_a", "/repo_b", "2 paths"]
+        assert records[-1]["total"] is True
+        assert records[-1]["total_lines"] == 8
+
+    def test_text_rows_and_summary(self):
+        """Test that the text output lists every path before the summary."""
+        output = format_paths_output(self.results, "text")
+        assert output.splitlines()[2].endswith("  /repo_b")
+        assert "Python Code Analysis: 2 paths" in output
+
+
+def test_csv_row_quotes_paths():
+    """Test that paths with commas, quotes and line breaks are quoted so that rows parse back."""
+    path = Path('dir, "quoted"\nname.py')
+    row = format_csv_row(path, CodeMetrics(10, 8, 6, 0, 0))
+    assert next(csv.reader(row.splitlines(keepends=True))) == [str(path), "10", "8", "6", "0", "0"]
+    assert format_csv_row(Path("plain.py"), CodeMetrics(1, 1, 1, 0, 0)) == "plain.py,1,1,1,0,0"
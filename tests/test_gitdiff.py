@@ -0,0 +1,91 @@
+"""Tests for the pycole git diff based incremental analysis."""
+
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pycole.analyzer import CodeMetrics, analyze_directory
+from pycole.gitdiff import analyze_since, changed_python_files
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture(name="repo")
+def fixture_repo():
+    """Create a repository with one commit and some working tree changes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo = Path(tmpdir)
+        _git(repo, "init", "-q")
+        (repo / "pkg").mkdir()
+        (repo / "pkg" / "same.py").write_text("a = 1\n")
+        (repo / "pkg" / "changed.py").write_text("b = 1\n")
+        (repo / "pkg" / "removed.py").write_text("c = 1\nd = 2\n")
+        (repo / "tests").mkdir()
+        (repo / "tests" / "test_pkg.py").write_text("def test_x():\n    assert True\n")
+        (repo / "README.md").write_text("readme\n")
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "-m", "initial")
+
+        (repo / "pkg" / "changed.py").write_text("b = 1\n\n# comment\ne = 2\n")
+        (repo / "pkg" / "removed.py").unlink()
+        (repo / "pkg" / "new.py").write_text("f = 1\n")
+        (repo / "tests" / "test_pkg.py").write_text("def test_x():\n    assert True\n    assert 1\n")
+        (repo / "README.md").write_text("changed\n")
+        yield repo
+
+
+def test_changed_python_files(repo):
+    """Test that added, modified, deleted and untracked Python files are found."""
+    root, changes = changed_python_files(repo, "HEAD")
+
+    assert root.resolve() == repo.resolve()
+    assert changes == {
+        "pkg/changed.py": "M",
+        "pkg/removed.py": "D",
+        "pkg/new.py": "A",
+        "tests/test_pkg.py": "M",
+    }
+
+
+def test_analyze_since(repo):
+    """Test the before and after metrics of the changed files."""
+    diff = analyze_since(repo, "HEAD")
+
+    assert [path.name for path in diff.added] == ["new.py"]
+    assert [path.name for path in diff.modified] == ["changed.py", "test_pkg.py"]
+    assert [path.name for path in diff.deleted] == ["removed.py"]
+    assert diff.before == CodeMetrics(5, 3, 3, 2, 2)
+    assert diff.after == CodeMetrics(8, 3, 3, 3, 3)
+    assert diff.delta == CodeMetrics(3, 0, 0, 1, 1)
+    assert diff.baseline_totals is None
+
+
+def test_analyze_since_totals_match_full_runs(repo):
+    """Test that the derived baseline totals match a full run at the revision."""
+    current = analyze_directory(repo)
+    diff = analyze_since(repo, "HEAD", totals=current)
+
+    _git(repo, "stash", "-u", "-q")
+    assert diff.baseline_totals == analyze_directory(repo)
+
+
+def test_analyze_since_subdirectory_and_exclude(repo):
+    """Test that changes are restricted to the analyzed path and exclude patterns."""
+    diff = analyze_since(repo / "pkg", "HEAD", exclude=["new.py"])
+
+    assert diff.added == []
+    assert [path.name for path in diff.modified] == ["changed.py"]
+
+
+def test_analyze_since_invalid_revision(repo):
+    """Test that git errors are reported as ValueError."""
+    with pytest.raises(ValueError, match="git diff failed"):
+        analyze_since(repo, "no-such-rev")
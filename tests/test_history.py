@@ -0,0 +1,136 @@
+"""Tests for the pycole git history analysis."""
+
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from pycole.analyzer import _analyze_content, analyze_directory
+from pycole.cli import main
+from pycole.history import analyze_history, list_revisions
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def _commit(repo: Path, message: str) -> None:
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "--allow-empty", "-m", message)
+
+
+@pytest.fixture(name="repo")
+def fixture_repo():
+    """Create a repository with a few commits, and the metrics of its working tree after each commit."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo = Path(tmpdir)
+        _git(repo, "init", "-q")
+        (repo / "pkg").mkdir()
+        (repo / "tests").mkdir()
+        expected = []
+
+        (repo / "pkg" / "a.py").write_text("a = 1\n")
+        (repo / "pkg" / "b.py").write_text("def b():\n    return 2\n")
+        (repo / "README.md").write_text("readme\n")
+        _commit(repo, "initial")
+        expected.append(analyze_directory(repo))
+
+        (repo / "pkg" / "a.py").write_text("a = 1\n# comment\nb = 2\n")
+        (repo / "pkg" / "copy.py").write_text("def b():\n    return 2\n")
+        (repo / "tests" / "test_b.py").write_text("def b():\n    return 2\n")
+        _commit(repo, "modify and copy")
+        expected.append(analyze_directory(repo))
+
+        (repo / "README.md").write_text("changed\n")
+        _commit(repo, "no python changes")
+        expected.append(analyze_directory(repo))
+
+        (repo / "pkg" / "b.py").unlink()
+        (repo / "pkg" / "c.py").write_text("c = 3\n")
+        _commit(repo, "delete and add")
+        expected.append(analyze_directory(repo))
+        yield repo, expected
+
+
+def test_history_matches_checked_out_revisions(repo):
+    """Test that the metrics of every commit match an analysis of the checked out tree."""
+    repo, expected = repo
+
+    history = analyze_history(repo, "HEAD")
+
+    assert [revision.metrics for revision in history] == expected
+    assert [revision.files for revision in history] == [2, 4, 4, 4]
+    assert [revision.commit for revision in history] == [commit for commit, _ in list_revisions(repo, "HEAD")]
+
+
+def test_history_analyzes_each_blob_once(repo):
+    """Test that unchanged and duplicated file versions are analyzed only once per test and non-test path."""
+    repo, _ = repo
+    calls = []
+
+    def counting_analyze_content(filepath, *args, **kwargs):
+        calls.append(filepath)
+        return _analyze_content(filepath, *args, **kwargs)
+
+    with patch("pycole.history._analyze_content", side_effect=counting_analyze_content):
+        analyze_history(repo, "HEAD")
+
+    # a.py twice, b.py once as a module and once as a test, c.py once
+    assert len(calls) == 5
+
+
+def test_history_range_and_max_count(repo):
+    """Test revision ranges, --max-count style limits and subdirectories."""
+    repo, expected = repo
+
+    assert [revision.metrics for revision in analyze_history(repo, "HEAD~2..HEAD")] == expected[2:]
+    assert [revision.metrics for revision in analyze_history(repo, "HEAD", max_count=1)] == expected[3:]
+    tests = analyze_history(repo / "tests", "HEAD")
+    assert [revision.metrics.test_lines for revision in tests] == [0, 2, 2, 2]
+    excluded = analyze_history(repo, "HEAD", exclude=["tests"])
+    assert excluded[1].metrics.test_lines == 0
+    assert analyze_history(repo, "HEAD..HEAD") == []
+    with pytest.raises(ValueError, match="rev-list failed"):
+        analyze_history(repo, "no-such-rev")
+
+
+def test_history_parallel_matches_serial(repo):
+    """Test that analyzing file versions in a process pool gives the same series."""
+    repo, expected = repo
+
+    with patch("pycole.history.SERIAL_THRESHOLD", 1):
+        history = analyze_history(repo, "HEAD", jobs=2)
+
+    assert [revision.metrics for revision in history] == expected
+
+
+def test_cli_history(repo):
+    """Test the history command in every output format."""
+    repo, expected = repo
+    runner = CliRunner()
+
+    result = runner.invoke(main, ["history", str(repo), "--revs", "HEAD", "--format", "csv", "-j", "1"])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0] == "commit,timestamp,files,total_lines,code_lines,statements,test_lines,test_code_lines"
+    last = expected[-1]
+    assert lines[-1].endswith(f",4,{last.total_lines},{last.code_lines},{last.statements},2,2")
+
+    result = runner.invoke(main, ["history", str(repo), "--revs", "HEAD", "--max-count", "2"])
+    assert result.exit_code == 0
+    assert len(result.output.splitlines()) == 3
+
+    result = runner.invoke(main, ["history", str(repo), "--revs", "HEAD", "--format", "jsonl"])
+    assert result.output.count('"commit"') == 4
+
+    result = runner.invoke(main, ["history", str(repo), "--revs", "no-such-rev"])
+    assert result.exit_code == 1
+    assert "Error:" in result.output
@@ -0,0 +1,108 @@
+"""Tests for the pycole ignore module."""
+
+import re
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pycole.ignore import IgnoreMatcher, IgnoreRules, is_ignored, read_project_excludes, translate_pattern
+
+
+@pytest.mark.parametrize(
+    "pattern, matches, non_matches",
+    [
+        ("build", ["build", "src/build", "a/b/build"], ["builds", "src/build.py"]),
+        ("/build", ["build"], ["src/build"]),
+        ("docs/*.py", ["docs/conf.py"], ["docs/api/conf.py", "src/docs/conf.py"]),
+        ("*_pb2.py", ["schema_pb2.py", "gen/schema_pb2.py"], ["schema_pb2.pyi"]),
+        ("**/gen", ["gen", "a/gen", "a/b/gen"], ["gen2"]),
+        ("a/**/b", ["a/b", "a/x/b", "a/x/y/b"], ["b", "x/a/b"]),
+        ("out/**", ["out/x", "out/x/y"], ["out"]),
+        ("mod?.py", ["mod1.py"], ["mod.py", "mod12.py"]),
+        ("[!a-c]*.py", ["d.py", "x/e.py"], ["a.py", "c.py"]),
+        ("[a&~]", ["a", "&", "~"], ["b"]),
+        ("\\#notes", ["#notes"], ["notes"]),
+    ],
+)
+def test_translate_pattern(pattern, matches, non_matches):
+    """Test that gitignore patterns match the same paths as git."""
+    expression = re.compile(translate_pattern(pattern))
+    for path in matches:
+        assert expression.fullmatch(path), path
+    for path in non_matches:
+        assert not expression.fullmatch(path), path
+
+
+def test_ignore_rules_last_rule_wins():
+    """Test negation, directory-only rules, comments and escaped trailing spaces."""
+    rules = IgnoreRules(["# comment", "", "*.py", "!keep.py", "logs/", "space\\ ", "!\\#hash"])
+
+    assert rules.match("mod.py", is_dir=False) is True
+    assert rules.match("keep.py", is_dir=False) is False
+    assert rules.match("readme.md", is_dir=False) is None
+    assert rules.match("logs", is_dir=True) is True
+    assert rules.match("logs", is_dir=False) is None
+    assert rules.match("space ", is_dir=False) is True
+    assert rules.match("#hash", is_dir=False) is False
+    assert not IgnoreRules(["# only a comment", "  "])
+
+
+def test_ignore_rules_strip_and_prefix():
+    """Test that paths are matched relative to the directory holding the rules."""
+    nested = IgnoreRules(["/gen"], strip=len("pkg/"))
+    assert nested.match("pkg/gen", is_dir=True) is True
+    assert nested.match("pkg/sub/gen", is_dir=True) is None
+
+    parent = IgnoreRules(["/src/gen"], prefix="src/")
+    assert parent.match("gen", is_dir=True) is True
+
+
+def test_ignore_matcher_precedence():
+    """Test that deeper ignore files, .ignore and project excludes take precedence in that order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "pkg").mkdir()
+        (root / ".gitignore").write_text("*.gen.py\nlocal.py\n")
+        (root / ".ignore").write_text("!local.py\n")
+        (root / "pkg" / ".gitignore").write_text("!*.gen.py\n")
+        (root / "pyproject.toml").write_text('[tool.pycole]\nexclude = ["pkg/keep.gen.py"]\n')
+
+        matcher = IgnoreMatcher(root)
+        top = matcher.rules(str(root), "")
+        nested = matcher.rules(str(root / "pkg"), "pkg/")
+
+        assert is_ignored(top, "a.gen.py", is_dir=False)
+        assert not is_ignored(top, "local.py", is_dir=False)
+        assert not is_ignored(nested, "pkg/a.gen.py", is_dir=False)
+        assert is_ignored(nested, "pkg/keep.gen.py", is_dir=False)
+        assert matcher.is_ignored_path("pkg/keep.gen.py")
+        assert not matcher.is_ignored_path("pkg/a.gen.py")
+
+
+def test_ignore_matcher_parent_directories_in_git_repository():
+    """Test that ignore files above the walk root apply only inside a git repository."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo = Path(tmpdir)
+        (repo / "src" / "gen").mkdir(parents=True)
+        (repo / ".gitignore").write_text("/src/gen/\n")
+
+        assert not IgnoreMatcher(repo / "src").is_ignored_path("gen/x.py")
+        (repo / ".git").mkdir()
+        assert IgnoreMatcher(repo / "src").is_ignored_path("gen/x.py")
+
+
+def test_read_project_excludes_errors():
+    """Test that invalid pyproject.toml configurations are reported."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project_file = Path(tmpdir) / "pyproject.toml"
+        project_file.write_text("[project]\nname = 'x'\n")
+        assert read_project_excludes(project_file) == []
+
+        project_file.write_text("[tool.pycole]\nexclude = 'build'\n")
+        with pytest.raises(ValueError, match="must be a list of strings"):
+            read_project_excludes(project_file)
+
+        project_file.write_text("[tool.pycole\n")
+        with pytest.raises(ValueError, match="Invalid"):
+            read_project_excludes(project_file)
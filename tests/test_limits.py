@@ -0,0 +1,132 @@
+"""Tests for the per-file size and time limits."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from pycole.analyzer import CodeMetrics, analyze_file, iter_file_metrics
+from pycole.cache import MetricsCache
+from pycole.checkpoint import Checkpoint
+from pycole.cli import main
+from pycole.dedup import Deduplicator
+from pycole.limits import FileLimits, KillableEngine, line_metrics
+
+MODULE = "import os\n\n# comment\ndef f():\n    return os.sep\n"
+# Takes seconds to parse, but little time to count lines
+SLOW_MODULE = "x = (1 + 2) * 3\n" * 200_000
+
+
+@pytest.fixture(name="tree")
+def fixture_tree():
+    """Create a tree with small modules, a test file and one large module."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.py").write_text(MODULE)
+        (root / "large.py").write_text(MODULE * 100)
+        (root / "test_a.py").write_text(MODULE * 100)
+        (root / "z.py").write_text(MODULE)
+        yield root
+
+
+def test_line_metrics():
+    """Test that line-only metrics match the lines of a full analysis, without statements."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        module = Path(tmpdir, "module.py")
+        module.write_text(MODULE)
+        test = Path(tmpdir, "test_module.py")
+        test.write_text(MODULE)
+
+        full = analyze_file(module)
+        assert line_metrics(module) == CodeMetrics(full.total_lines, full.code_lines, 0, 0, 0)
+        assert line_metrics(test) == analyze_file(test)
+        assert line_metrics(Path(tmpdir, "missing.py")) == CodeMetrics(0, 0, 0, 0, 0)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_max_file_size(tree, jobs):
+    """Test that files over the size limit get line-only metrics and are reported, in input order."""
+    limits = FileLimits(max_file_size=len(MODULE))
+
+    results = list(iter_file_metrics(tree, jobs=jobs, limits=limits))
+
+    expected = list(iter_file_metrics(tree))
+    assert [filepath for filepath, _ in results] == [filepath for filepath, _ in expected]
+    assert dict(results)[tree / "a.py"] == analyze_file(tree / "a.py")
+    assert dict(results)[tree / "large.py"] == line_metrics(tree / "large.py")
+    assert [(entry.path.name, entry.reason, entry.size) for entry in limits.skipped] == [
+        ("large.py", "size", len(MODULE) * 100),
+        ("test_a.py", "size", len(MODULE) * 100),
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_file_timeout(tree, jobs):
+    """Test that a file taking longer than the timeout is abandoned and the others are analyzed."""
+    (tree / "slow.py").write_text(SLOW_MODULE)
+    limits = FileLimits(file_timeout=0.5)
+
+    results = dict(iter_file_metrics(tree, jobs=jobs, limits=limits))
+
+    assert results[tree / "slow.py"] == line_metrics(tree / "slow.py")
+    assert results[tree / "z.py"] == analyze_file(tree / "z.py")
+    assert len(results) == 5
+    assert [(entry.path.name, entry.reason) for entry in limits.skipped] == [("slow.py", "timeout")]
+
+
+@pytest.mark.parametrize(
+    "options, skipped",
+    [
+        ({"max_file_size": len(MODULE)}, [("large.py", "size"), ("slow.py", "size"), ("test_a.py", "size")]),
+        ({"file_timeout": 0.5}, [("slow.py", "timeout")]),
+    ],
+)
+def test_skipped_files_are_not_cached(tree, options, skipped):
+    """Test that files over the limits are reported again on a run served from the cache and the checkpoint."""
+    (tree / "slow.py").write_text(SLOW_MODULE)
+    with tempfile.TemporaryDirectory() as statedir:
+        for _ in range(2):
+            limits = FileLimits(**options)
+            with MetricsCache(Path(statedir)) as cache, Checkpoint(Path(statedir, "run.ckpt")) as checkpoint:
+                results = dict(iter_file_metrics(tree, cache=cache, checkpoint=checkpoint, limits=limits))
+
+            assert [(entry.path.name, entry.reason) for entry in limits.skipped] == skipped
+            for name, _ in skipped:
+                assert results[tree / name] == line_metrics(tree / name)
+
+
+def test_copies_of_abandoned_files_are_skipped(tree):
+    """Test that a copy reusing the line-only metrics of a file that timed out is reported too."""
+    (tree / "slow.py").write_text(SLOW_MODULE)
+    (tree / "slow_copy.py").write_text(SLOW_MODULE)
+    limits = FileLimits(file_timeout=0.5)
+
+    results = dict(iter_file_metrics(tree, limits=limits, dedup=Deduplicator()))
+
+    assert results[tree / "slow_copy.py"] == line_metrics(tree / "slow.py")
+    assert [(entry.path.name, entry.reason) for entry in limits.skipped] == [
+        ("slow.py", "timeout"),
+        ("slow_copy.py", "timeout"),
+    ]
+
+
+def test_killable_engine_requires_timeout():
+    """Test that the engine rejects limits without a time limit instead of failing on the first file."""
+    with pytest.raises(ValueError, match="file_timeout"):
+        KillableEngine(FileLimits(max_file_size=10))
+
+
+def test_cli_limits(tree):
+    """Test that files over the limits are listed on stderr and that incompatible options are rejected."""
+    runner = CliRunner()
+
+    result = runner.invoke(main, [str(tree), "--max-file-size", str(len(MODULE)), "--file-timeout", "30"])
+    assert result.exit_code == 0
+    assert "Skipped 2 files, counted their lines only:" in result.stderr
+    assert f"{tree / 'large.py'}: larger than --max-file-size" in result.stderr
+
+    result = runner.invoke(main, [str(tree), "--file-timeout", "1", "--profile"])
+    assert result.exit_code == 2
+    result = runner.invoke(main, [str(tree), "--max-file-size", "10", "--watch"])
+    assert result.exit_code == 2
@@ -0,0 +1,73 @@
+"""Tests for the pycole parallel analysis engine."""
+
+import tempfile
+from pathlib import Path
+
+from pycole.analyzer import analyze_directory, analyze_file, analyze_source
+from pycole.parallel import ParallelEngine, analyze_files_parallel
+
+
+def _write_tree(dirpath: Path, count: int) -> list[Path]:
+    """Create `count` small Python files (every third one a test file)."""
+    files = []
+    for i in range(count):
+        name = f"test_mod{i}.py" if i % 3 == 0 else f"mod{i}.py"
+        filepath = dirpath / name
+        filepath.write_text(f"# module {i}\n" + "x = 1\n" * (i % 7) + "\ndef f():\n    return 42\n")
+        files.append(filepath)
+    return files
+
+
+def test_parallel_matches_serial_order():
+    """Test that parallel results match serial results file by file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = _write_tree(Path(tmpdir), 20)
+
+        serial = [(filepath, analyze_file(filepath)) for filepath in files]
+        parallel = list(analyze_files_parallel(files, jobs=2, batch_size=3, serial_threshold=0))
+
+        assert parallel == serial
+
+
+def test_parallel_serial_fallback_for_small_inputs():
+    """Test that inputs below the threshold are analyzed without a pool."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = _write_tree(Path(tmpdir), 5)
+
+        results = list(analyze_files_parallel(iter(files), jobs=4, serial_threshold=10))
+
+        assert results == [(filepath, analyze_file(filepath)) for filepath in files]
+
+
+def test_parallel_engine_reuses_pool():
+    """Test that an engine can analyze several inputs with the same pool."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = _write_tree(Path(tmpdir), 12)
+        expected = [(filepath, analyze_file(filepath)) for filepath in files]
+
+        with ParallelEngine(jobs=2, batch_size=2, serial_threshold=4) as engine:
+            first = list(engine.analyze(files[:6]))
+            executor = engine._executor  # pylint: disable=protected-access
+            second = list(engine.analyze(files[6:]))
+            assert engine._executor is executor  # pylint: disable=protected-access
+
+        assert first + second == expected
+
+
+def test_analyze_directory_jobs_matches_serial():
+    """Test that analyze_directory totals do not depend on the number of jobs."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        _write_tree(dirpath, 100)
+
+        assert analyze_directory(dirpath, jobs=2) == analyze_directory(dirpath, jobs=1)
+
+
+def test_parallel_engine_analyze_sources():
+    """Test that in-memory sources are analyzed in the pool in input order."""
+    sources = [(f"mod{i}.py", f"# module {i}\n" + "x = 1\n" * i) for i in range(10)]
+    expected = [(name, analyze_source(source, name)) for name, source in sources]
+
+    with ParallelEngine(jobs=2, batch_size=3, serial_threshold=0) as engine:
+        assert list(engine.analyze_sources(iter(sources))) == expected
+        assert engine._executor is not None  # pylint: disable=protected-access
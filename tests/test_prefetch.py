@@ -0,0 +1,77 @@
+"""Tests for the pycole prefetch module."""
+
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+from pycole.analyzer import analyze_directory, iter_file_metrics
+from pycole.prefetch import prefetch_files, read_file
+
+
+def test_read_file():
+    """Test that files are read unless they are too large or unreadable."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "module.py"
+        filepath.write_bytes(b"x = 1\n")
+
+        assert read_file(filepath) == b"x = 1\n"
+        assert read_file(filepath, max_size=100) == b"x = 1\n"
+        assert read_file(filepath, max_size=6) is None
+        assert read_file(Path(tmpdir) / "missing.py") is None
+
+
+def test_prefetch_files_keeps_input_order():
+    """Test that contents are yielded in input order even when reads finish out of order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = []
+        for index in range(20):
+            filepath = Path(tmpdir) / f"module_{index}.py"
+            filepath.write_text(f"x = {index}\n")
+            files.append(filepath)
+
+        results = list(prefetch_files(files, threads=4))
+
+        assert [filepath for filepath, _ in results] == files
+        assert [data for _, data in results] == [f"x = {index}\n".encode() for index in range(20)]
+
+
+def test_prefetch_files_respects_budget():
+    """Test that no new reads start while the buffered contents exceed the budget."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = []
+        for index in range(10):
+            filepath = Path(tmpdir) / f"module_{index}.py"
+            filepath.write_bytes(b"x" * 100)
+            files.append(filepath)
+
+        reads = []
+        lock = threading.Lock()
+
+        def counting_read(filepath, max_size):
+            with lock:
+                reads.append(filepath)
+            return filepath.read_bytes()
+
+        with patch("pycole.prefetch.read_file", side_effect=counting_read):
+            contents = prefetch_files(files, threads=4, budget=1)
+            next(contents)
+            # The first read fills the budget, so only the reads already in flight were started
+            assert len(reads) <= 2 * 4
+            assert len(list(contents)) == len(files) - 1
+
+
+def test_analyze_directory_with_io_threads():
+    """Test that reading ahead in threads gives the same metrics as reading on demand."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "module.py").write_text("# comment\ndef func():\n    return 42\n")
+        (dirpath / "big.py").write_text("x = 1\n" * 100)
+        (dirpath / "tests").mkdir()
+        (dirpath / "tests" / "test_module.py").write_text("def test_func():\n    assert True\n")
+        (dirpath / "invalid.py").write_bytes(b"\xff\xfe\n")
+
+        expected = list(iter_file_metrics(dirpath))
+        # big.py is above the mmap threshold, so it is opened by analyze_file instead
+        assert list(iter_file_metrics(dirpath, io_threads=2, mmap_threshold=100)) == expected
+        assert analyze_directory(dirpath, jobs=2, io_threads=2) == analyze_directory(dirpath)
@@ -0,0 +1,65 @@
+"""Tests for the pycole profiling module."""
+
+import tempfile
+from pathlib import Path
+
+from pycole.analyzer import analyze_directory, analyze_file
+from pycole.profiling import FileProfile, Profiler
+
+
+def test_analyze_file_profile_records_phases():
+    """Test that a file profile records each phase and the bytes read."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "module.py"
+        filepath.write_text("x = 1\ny = 2\n")
+
+        profile = FileProfile()
+        metrics = analyze_file(filepath, profile=profile)
+
+        assert metrics == analyze_file(filepath)
+        assert set(profile.wall) == {"read", "count_lines", "count_statements"}
+        assert profile.bytes_read == 12
+        assert not profile.skipped and not profile.parse_failed
+
+
+def test_analyze_file_profile_reports_failures():
+    """Test that unreadable files and syntax errors are counted."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        invalid = Path(tmpdir) / "invalid.py"
+        invalid.write_text("def broken(:\n")
+        binary = Path(tmpdir) / "binary.py"
+        binary.write_bytes(b"\xff\xfe\x00")
+
+        for mode in ("ast", "tokenize"):
+            profile = FileProfile()
+            assert analyze_file(invalid, statement_mode=mode, profile=profile).statements == 0
+            assert profile.parse_failed
+
+        profile = FileProfile()
+        analyze_file(binary, profile=profile)
+        assert profile.skipped
+        assert "count_lines" not in profile.wall
+
+
+def test_profiler_report_counters_and_slowest_files():
+    """Test that analyze_directory feeds the profiler in serial and parallel mode."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        for i in range(80):
+            (dirpath / f"module_{i}.py").write_text(f"x = {i}\n")
+        (dirpath / "invalid.py").write_text("def broken(:\n")
+
+        for jobs in (1, 2):
+            profiler = Profiler(top=3)
+            metrics = analyze_directory(dirpath, jobs=jobs, profiler=profiler)
+            report = profiler.report()
+
+            assert metrics == analyze_directory(dirpath)
+            assert report["files"] == 81
+            assert report["bytes_read"] == sum(path.stat().st_size for path in dirpath.iterdir())
+            assert report["parse_failures"] == 1
+            assert report["files_skipped"] == 0
+            assert {"walk", "read", "count_lines", "count_statements", "aggregate"} <= set(report["phases"])
+            slowest = [entry["wall"] for entry in report["slowest_files"]]
+            assert len(slowest) == 3
+            assert slowest == sorted(slowest, reverse=True)
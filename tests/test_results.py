@@ -0,0 +1,126 @@
+"""Tests for the pycole columnar results store."""
+
+import importlib.util
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from pycole.analyzer import CodeMetrics, analyze_directory, iter_file_metrics
+from pycole.results import MetricsGroup, MetricsColumns
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+BACKENDS = ["array", pytest.param("numpy", marks=pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed"))]
+
+RESULTS = [
+    (Path("proj/pkg/a.py"), CodeMetrics(10, 8, 6, 0, 0, max_complexity=3)),
+    (Path("proj/pkg/b.py"), CodeMetrics(20, 15, 12, 0, 0, max_complexity=7)),
+    (Path("proj/tests/test_a.py"), CodeMetrics(30, 25, 0, 30, 25)),
+    (Path("proj/pkg/__init__.py"), CodeMetrics(15, 15, 1, 0, 0)),
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_totals_match_summed_metrics(backend):
+    """Test that totals sum every column and take the maximum of the max_* columns."""
+    table = MetricsColumns.from_results(RESULTS, backend)
+
+    assert len(table) == 4
+    assert table.totals() == sum((metrics for _, metrics in RESULTS), CodeMetrics(0, 0, 0, 0, 0))
+    assert MetricsColumns(backend).totals() == CodeMetrics(0, 0, 0, 0, 0)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_rows_round_trip(backend):
+    """Test that rows give back the added paths and metrics."""
+    table = MetricsColumns.from_results(RESULTS, backend)
+
+    assert list(table) == [(str(path), metrics) for path, metrics in RESULTS]
+    assert list(table.column("statements")) == [6, 12, 0, 1]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_group_by(backend):
+    """Test grouping by directory and by test files."""
+    table = MetricsColumns.from_results(RESULTS, backend)
+
+    by_directory = table.group_by("directory")
+    assert list(by_directory) == [str(Path("proj/pkg")), str(Path("proj/tests"))]
+    assert by_directory[str(Path("proj/pkg"))] == MetricsGroup(3, CodeMetrics(45, 38, 19, 0, 0, max_complexity=7))
+
+    by_test = table.group_by("is_test")
+    assert by_test[True] == MetricsGroup(1, CodeMetrics(30, 25, 0, 30, 25))
+    assert by_test[False].files == 3
+
+    with pytest.raises(ValueError, match="Unknown group-by key"):
+        table.group_by("extension")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_top(backend):
+    """Test that top-N queries return the highest values, ties in insertion order."""
+    table = MetricsColumns.from_results(RESULTS, backend)
+
+    assert table.top(2) == [(str(Path("proj/tests/test_a.py")), 25), (str(Path("proj/pkg/b.py")), 15)]
+    assert [path for path, _ in table.top(10, "total_lines")][-2:] == [
+        str(Path("proj/pkg/__init__.py")),
+        str(Path("proj/pkg/a.py")),
+    ]
+    assert table.top(1, "max_complexity") == [(str(Path("proj/pkg/b.py")), 7)]
+    with pytest.raises(ValueError, match="Unknown metric"):
+        table.top(1, "lines")
+
+
+def test_export_matches_per_file_output():
+    """Test that CSV and JSONL exports use the per-file output formats."""
+    table = MetricsColumns.from_results(RESULTS[:1], "array")
+
+    csv = io.StringIO()
+    table.write_csv(csv, extra_metrics=("max_complexity",))
+    path = RESULTS[0][0]
+    assert csv.getvalue() == (
+        f"path,total_lines,code_lines,statements,test_lines,test_code_lines,max_complexity\n{path},10,8,6,0,0,3\n"
+    )
+
+    csv = io.StringIO()
+    MetricsColumns.from_results([(Path("a,b.py"), RESULTS[0][1])], "array").write_csv(csv)
+    assert csv.getvalue().splitlines()[1] == '"a,b.py",10,8,6,0,0'
+
+    jsonl = io.StringIO()
+    table.write_jsonl(jsonl)
+    assert json.loads(jsonl.getvalue()) == {
+        "path": str(path),
+        "total_lines": 10,
+        "code_lines": 8,
+        "statements": 6,
+        "test_lines": 0,
+        "test_code_lines": 0,
+    }
+
+
+def test_from_path_matches_analyzer():
+    """Test that a table built while analyzing a directory has the analyzer's totals."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        (dirpath / "tests").mkdir()
+        (dirpath / "module.py").write_text("def func():\n    return 42\n")
+        (dirpath / "tests" / "test_module.py").write_text("def test_func():\n    assert True\n")
+
+        table = MetricsColumns.from_path(dirpath, exclude=["*.pyc"])
+
+        assert table.totals() == analyze_directory(dirpath)
+        assert sorted(table.group_by("directory")) == [str(dirpath), str(dirpath / "tests")]
+        assert len(table) == len(list(iter_file_metrics(dirpath)))
+
+
+def test_numpy_backend_requires_numpy():
+    """Test that the numpy backend is refused without NumPy, and 'auto' falls back to arrays."""
+    with patch("pycole.results._import_numpy", return_value=None):
+        with pytest.raises(ValueError, match="requires NumPy"):
+            MetricsColumns("numpy")
+        assert MetricsColumns().backend == "array"
+    with pytest.raises(ValueError, match="Unknown backend"):
+        MetricsColumns("pandas")
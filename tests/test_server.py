@@ -0,0 +1,144 @@
+"""Tests for the pycole analysis daemon."""
+
+import os
+import tempfile
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from pycole.analyzer import analyze_directory, analyze_path, analyze_source, iter_file_metrics
+from pycole.cli import main
+from pycole.server import AnalysisServer, MemoryCache, analyze_paths_remote, request
+
+
+@pytest.fixture(name="daemon")
+def fixture_daemon():
+    """Run a daemon in a thread on a temporary socket, next to a small source tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir, "src")
+        root.mkdir()
+        (root / "a.py").write_text("a = 1\n# comment\n")
+        (root / "test_b.py").write_text("def test_b():\n    assert True\n")
+        socket_path = Path(tmpdir, "pycole.sock")
+        server = AnalysisServer(socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            yield socket_path, root
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+
+def test_daemon_analyzes_paths_and_reuses_metrics(daemon):
+    """Test that results match in-process analysis and that only changed files are analyzed again."""
+    socket_path, root = daemon
+
+    assert analyze_paths_remote(socket_path, [root]) == [(root, analyze_directory(root))]
+    assert analyze_paths_remote(socket_path, [root / "a.py"]) == [(root / "a.py", analyze_path(root / "a.py"))]
+    stats = request(socket_path, {"op": "stats"})
+    assert (stats["files"], stats["hits"], stats["misses"]) == (2, 1, 2)
+
+    (root / "a.py").write_text("a = 1\nb = 2\nc = 3\n")
+    os.utime(root / "a.py", ns=(0, 0))
+    (root / "test_b.py").unlink()
+    (root / "c.py").write_text("c = 3\n")
+    assert analyze_paths_remote(socket_path, [root]) == [(root, analyze_directory(root))]
+    stats = request(socket_path, {"op": "stats"})
+    assert (stats["files"], stats["hits"], stats["misses"]) == (2, 1, 4)
+
+
+def test_daemon_options_and_sources(daemon):
+    """Test that analysis options get their own cache and that in-memory sources are analyzed."""
+    socket_path, root = daemon
+
+    results = analyze_paths_remote(socket_path, [root], statement_mode="tokenize", ast_metrics=("functions",))
+    assert results == [(root, analyze_directory(root, statement_mode="tokenize", ast_metrics=("functions",)))]
+    assert request(socket_path, {"op": "stats"})["hits"] == 0
+
+    response = request(socket_path, {"op": "analyze_sources", "sources": [["test_x.py", "x = 1\n"]]})
+    assert response["results"] == [["test_x.py", asdict(analyze_source("x = 1\n", "test_x.py"))]]
+
+
+def test_daemon_errors(daemon):
+    """Test that failed requests raise ValueError and that a second daemon cannot take over the socket."""
+    socket_path, root = daemon
+
+    with pytest.raises(ValueError, match="neither a file nor a directory"):
+        analyze_paths_remote(socket_path, [root / "missing.py"])
+    with pytest.raises(ValueError, match="Unknown operation"):
+        request(socket_path, {"op": "nothing"})
+    with pytest.raises(ValueError, match="already listening"):
+        AnalysisServer(socket_path)
+
+
+def test_stale_socket_is_replaced():
+    """Test that a socket file left by a daemon that died does not prevent a new one from starting."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = Path(tmpdir, "pycole.sock")
+        AnalysisServer(socket_path).socket.close()
+        assert socket_path.exists()
+
+        with AnalysisServer(socket_path):
+            assert socket_path.stat().st_mode & 0o077 == 0
+        assert not socket_path.exists()
+
+
+def test_socket_of_another_user_is_not_trusted(daemon):
+    """Test that neither clients nor a new daemon use a socket file that belongs to another user."""
+    socket_path, root = daemon
+    runner = CliRunner()
+    in_process = runner.invoke(main, [str(root), "--format", "csv"])
+
+    with patch("pycole.server.os.getuid", return_value=os.getuid() + 1):
+        with pytest.raises(PermissionError, match="another user"):
+            request(socket_path, {"op": "ping"})
+        with pytest.raises(PermissionError, match="another user"):
+            AnalysisServer(socket_path)
+        result = runner.invoke(main, [str(root), "--daemon", "--socket", str(socket_path), "--format", "csv"])
+
+    assert result.output == in_process.output
+    assert request(socket_path, {"op": "stats"})["requests"] == 1
+
+
+def test_cli_daemon(daemon):
+    """Test that --daemon reports the same output with a daemon and without one."""
+    socket_path, root = daemon
+    runner = CliRunner()
+
+    in_process = runner.invoke(main, [str(root), "--format", "csv"])
+    result = runner.invoke(main, [str(root), "--daemon", "--socket", str(socket_path), "--format", "csv"])
+    assert result.exit_code == 0
+    assert result.output == in_process.output
+    assert request(socket_path, {"op": "stats"})["files"] == 2
+
+    result = runner.invoke(main, [str(root), str(root / "a.py"), "--daemon", "--socket", str(socket_path)])
+    assert result.exit_code == 0
+    assert "Total" in result.output
+
+    fallback = runner.invoke(main, [str(root), "--daemon", "--socket", str(root / "none.sock"), "--format", "csv"])
+    assert fallback.exit_code == 0
+    assert fallback.output == in_process.output
+
+    result = runner.invoke(main, [str(root), "--daemon", "--per-file"])
+    assert result.exit_code == 2
+
+
+def test_memory_cache_preserves_input_order():
+    """Test that hits and misses come out in discovery order, like an uncached run."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        for index in range(1, 5):
+            (root / f"m{index}.py").write_text(f"x = {index}\n")
+        cache = MemoryCache()
+        list(iter_file_metrics(root, cache=cache))
+
+        (root / "m0.py").write_text("new = 0\n")
+        (root / "m2.py").write_text("x = 2\ny = 2\n")
+        assert list(iter_file_metrics(root, cache=cache)) == list(iter_file_metrics(root))
+        assert (cache.hits, cache.misses) == (3, 6)
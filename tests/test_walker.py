@@ -0,0 +1,120 @@
+"""Tests for the pycole directory walker."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from pycole.ignore import IgnoreMatcher
+from pycole.walker import compile_excludes, is_excluded, iter_python_files
+
+
+def _make_tree(dirpath: Path) -> None:
+    """Create a small tree with regular, ignored and non-Python files."""
+    for relpath in [
+        "main.py",
+        "README.md",
+        "pkg/__init__.py",
+        "pkg/core.py",
+        "pkg/gen/schema_pb2.py",
+        "build/lib/copy.py",
+        ".venv/lib/site.py",
+        "__pycache__/cached.py",
+    ]:
+        filepath = dirpath / relpath
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_text("x = 1\n")
+
+
+def _relative(dirpath: Path, paths) -> list[str]:
+    return [path.relative_to(dirpath).as_posix() for path in paths]
+
+
+def test_iter_python_files_sorted_and_pruned():
+    """Test that files are yielded in sorted order and ignored trees are skipped."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        _make_tree(dirpath)
+
+        assert _relative(dirpath, iter_python_files(dirpath)) == [
+            "main.py",
+            "build/lib/copy.py",
+            "pkg/__init__.py",
+            "pkg/core.py",
+            "pkg/gen/schema_pb2.py",
+        ]
+
+
+def test_iter_python_files_exclude_patterns():
+    """Test that exclude patterns match entry names and relative paths."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        _make_tree(dirpath)
+
+        files = iter_python_files(dirpath, exclude=["build/", "*_pb2.py", "pkg/core.py"])
+
+        assert _relative(dirpath, files) == ["main.py", "pkg/__init__.py"]
+
+
+def test_iter_python_files_never_opens_ignored_dirs():
+    """Test that ignored directories are pruned before being listed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        _make_tree(dirpath)
+
+        scanned = []
+        real_scandir = os.scandir
+
+        def tracking_scandir(path):
+            scanned.append(Path(path).name)
+            return real_scandir(path)
+
+        with patch("pycole.walker.os.scandir", side_effect=tracking_scandir):
+            list(iter_python_files(dirpath, exclude=["build"]))
+
+        assert ".venv" not in scanned
+        assert "__pycache__" not in scanned
+        assert "build" not in scanned
+
+
+def test_compile_excludes_empty():
+    """Test that no patterns compile to None."""
+    assert compile_excludes([]) is None
+    assert compile_excludes([""]) is None
+
+
+def test_iter_python_files_honors_ignore_files():
+    """Test that ignore files and project excludes prune directories, unless disabled."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        _make_tree(dirpath)
+        (dirpath / ".gitignore").write_text("build/\n")
+        (dirpath / "pkg" / ".ignore").write_text("*_pb2.py\n")
+        (dirpath / "pyproject.toml").write_text('[tool.pycole]\nexclude = ["/main.py"]\n')
+
+        scanned = []
+        real_scandir = os.scandir
+
+        def tracking_scandir(path):
+            scanned.append(Path(path).name)
+            return real_scandir(path)
+
+        with patch("pycole.walker.os.scandir", side_effect=tracking_scandir):
+            files = list(iter_python_files(dirpath))
+
+        assert _relative(dirpath, files) == ["pkg/__init__.py", "pkg/core.py"]
+        assert "build" not in scanned
+        assert len(list(iter_python_files(dirpath, use_ignore_files=False))) == 5
+
+
+def test_is_excluded_with_ignore_files():
+    """Test that single paths are checked against the same ignore rules as the walk."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir)
+        _make_tree(dirpath)
+        (dirpath / ".gitignore").write_text("build/\n")
+        ignore = IgnoreMatcher(dirpath)
+
+        assert is_excluded("build/lib/copy.py", None, ignore)
+        assert not is_excluded("build/lib/copy.py", None)
+        assert not is_excluded("pkg/core.py", None, ignore)
@@ -0,0 +1,133 @@
+"""Tests for the pycole watch mode."""
+
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from pycole.analyzer import CodeMetrics, analyze_directory, analyze_file
+from pycole.watch import MetricsTable, TreeWatcher
+
+
+def test_metrics_table_incremental_totals():
+    """Test that totals follow added, replaced and removed files."""
+    table = MetricsTable()
+    table.set("a.py", CodeMetrics(10, 8, 5, 0, 0))
+    table.set("b.py", CodeMetrics(4, 0, 0, 4, 3))
+    table.set("a.py", CodeMetrics(12, 9, 6, 0, 0))
+    assert table.totals == CodeMetrics(16, 9, 6, 4, 3)
+
+    table.remove("b.py")
+    table.remove("missing.py")
+    assert table.totals == CodeMetrics(12, 9, 6, 0, 0)
+    assert len(table) == 1
+
+
+def test_watcher_detects_changes():
+    """Test that added, modified and removed files and directories are detected."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.py").write_text("x = 1\n")
+        (root / "pkg").mkdir()
+        (root / "pkg" / "b.py").write_text("y = 1\n")
+        (root / ".venv").mkdir()
+
+        watcher = TreeWatcher(root)
+        assert watcher.start() == analyze_directory(root)
+        assert watcher.poll() == (set(), set())
+
+        (root / "a.py").write_text("x = 1\nx = 2\n")
+        (root / "pkg" / "sub").mkdir()
+        (root / "pkg" / "sub" / "c.py").write_text("z = 1\n")
+        (root / ".venv" / "ignored.py").write_text("ignored = 1\n")
+        changed, removed = watcher.poll()
+        assert changed == {str(root / "a.py"), str(root / "pkg" / "sub" / "c.py")}
+        assert removed == set()
+
+        shutil.rmtree(root / "pkg")
+        assert watcher.poll() == (set(), {str(root / "pkg" / "b.py"), str(root / "pkg" / "sub" / "c.py")})
+
+
+def test_watcher_apply_reanalyzes_only_touched_files():
+    """Test that an update re-analyzes only changed files and matches a full run."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        for i in range(5):
+            (root / f"mod{i}.py").write_text(f"x = {i}\n")
+        watcher = TreeWatcher(root)
+        watcher.start()
+
+        (root / "mod0.py").write_text("x = 0\ny = 1\n\n# comment\n")
+        (root / "mod1.py").unlink()
+        changed, removed = watcher.poll()
+
+        with patch("pycole.parallel.analyze_file", wraps=analyze_file) as spy:
+            update = watcher.apply(changed, removed)
+
+        assert spy.call_count == 1
+        assert update.changed == [root / "mod0.py"]
+        assert update.removed == [root / "mod1.py"]
+        assert update.totals == analyze_directory(root)
+        assert update.elapsed >= 0
+
+
+def test_watcher_run_debounces_bursts():
+    """Test that a burst of changes is applied as a single update."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.py").write_text("x = 1\n")
+        watcher = TreeWatcher(root)
+        watcher.start()
+
+        polls = 0
+        real_poll = watcher.poll
+
+        def bursty_poll():
+            nonlocal polls
+            polls += 1
+            if polls <= 3:
+                (root / f"new{polls}.py").write_text("y = 1\n" * polls)
+            return real_poll()
+
+        updates = []
+        with patch.object(watcher, "poll", side_effect=bursty_poll):
+            watcher.run(updates.append, interval=0.01, debounce=0.02, should_stop=lambda: len(updates) > 0)
+
+        assert len(updates) == 1
+        assert len(updates[0].changed) == 3
+        assert updates[0].totals == analyze_directory(root)
+        assert updates[0].latency >= updates[0].elapsed
+
+
+def test_metrics_table_recomputes_removed_maximum():
+    """Test that removing or shrinking the file holding a maximum recomputes it from the other files."""
+    table = MetricsTable()
+    table.set("a.py", CodeMetrics(10, 8, 5, 0, 0, max_complexity=7, max_nesting=2))
+    table.set("b.py", CodeMetrics(4, 4, 2, 0, 0, max_complexity=3, max_nesting=4))
+    assert (table.totals.max_complexity, table.totals.max_nesting) == (7, 4)
+
+    table.set("a.py", CodeMetrics(10, 8, 5, 0, 0, max_complexity=1, max_nesting=1))
+    assert (table.totals.max_complexity, table.totals.max_nesting) == (3, 4)
+
+    table.remove("b.py")
+    assert table.totals == CodeMetrics(10, 8, 5, 0, 0, max_complexity=1, max_nesting=1)
+
+
+def test_watcher_apply_treats_vanished_files_as_removed():
+    """Test that a file deleted between the poll and its analysis is reported as removed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.py").write_text("x = 1\n")
+        watcher = TreeWatcher(root)
+        watcher.start()
+
+        (root / "b.py").write_text("y = 1\n")
+        (root / "c.py").write_text("z = 1\n")
+        changed, removed = watcher.poll()
+        (root / "b.py").unlink()
+        update = watcher.apply(changed, removed)
+
+        assert update.changed == [root / "c.py"]
+        assert update.removed == [root / "b.py"]
+        assert update.totals == analyze_directory(root)
+        assert watcher.poll() == (set(), set())